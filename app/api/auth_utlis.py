@@ -1,12 +1,18 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import partial
 import re
-from uuid import UUID
+import threading
+from uuid import UUID, uuid4
 from jose import JWTError, jwt
-from typing import Optional
+from typing import Optional, Tuple
 import os
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from dotenv import load_dotenv
 from passlib.context import CryptContext
+from app.services import token_cache
 
 
 load_dotenv()
@@ -26,21 +32,46 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti identifies the token so it can be revoked before it expires
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_token_claims(token: str, credentials_exception) -> dict:
+    # The signature is checked once per token; later requests reuse the verified claims until exp
+    token_digest = token_cache.digest(token)
+    claims = token_cache.get_claims(token_digest)
+    if claims is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise credentials_exception
+        if payload.get("sub") is None or payload.get("exp") is None:
+            raise credentials_exception
+        claims = {"sub": payload["sub"], "jti": payload.get("jti"), "exp": payload["exp"]}
+        token_cache.put_claims(token_digest, claims)
+
+    if claims["jti"] is not None and token_cache.is_revoked(claims["jti"]):
+        raise credentials_exception
+    return claims
+
 # JWT token verification
 def verify_token(token: str, credentials_exception):
+    claims = decode_token_claims(token, credentials_exception)
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        return UUID(user_id)
-    except JWTError:
+        return UUID(claims["sub"])
+    except ValueError:
         raise credentials_exception
 
+def revoke_token(token: str, credentials_exception) -> None:
+    claims = decode_token_claims(token, credentials_exception)
+    if claims["jti"] is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked, please log in again to get a revocable token.",
+        )
+    token_cache.revoke(claims["jti"], claims["exp"])
+
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -52,4 +83,57 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # Returns a replacement hash when the stored one uses deprecated settings
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+#Password hashing pool settings
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# bcrypt is deliberately slow, so it runs on a dedicated bounded pool instead of the event loop
+# or the shared threadpool that serves sync endpoints
+def _create_password_executor() -> Executor:
+    if PASSWORD_HASH_EXECUTOR == "process":
+        return ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    return ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+_password_executor = _create_password_executor()
+_pending_password_jobs = 0
+_pending_lock = threading.Lock()
+
+async def _run_password_job(func, *args):
+    global _pending_password_jobs
+    # Admission control: shed load instead of queueing an unbounded login storm
+    with _pending_lock:
+        if _pending_password_jobs >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        _pending_password_jobs += 1
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, partial(func, *args))
+    finally:
+        with _pending_lock:
+            _pending_password_jobs -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_password_job(verify_and_update_password, plain_password, hashed_password)
 
+def shutdown_password_executor() -> None:
+    global _password_executor
+    _password_executor.shutdown(wait=False, cancel_futures=True)
+    # Workers start lazily, so a fresh pool is cheap and lets the app start again in the same process
+    _password_executor = _create_password_executor()
@@ -0,0 +1,45 @@
+import hashlib
+import os
+from typing import Mapping, Optional
+from fastapi import Request, Response, status
+
+
+# Cache-Control for the public product routes; clients revalidate with If-None-Match afterwards
+PRODUCT_CACHE_CONTROL = f"public, max-age={int(os.getenv('PRODUCT_HTTP_MAX_AGE', '30'))}"
+# Order reads are per user and must always be revalidated
+ORDER_CACHE_CONTROL = "private, no-cache"
+
+
+# Weak ETag derived from row ids and versions, so it can be computed without serializing the body
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+# The detail body changes when the order or the name of its status changes; line items are immutable
+def order_etag(order) -> str:
+    return make_etag(order.id, order.version, order.status.version if order.status else None)
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+# extra_headers carries what the full response would have sent alongside the body, e.g. X-Next-Cursor
+def not_modified(etag: str, cache_control: Optional[str] = None, extra_headers: Optional[Mapping[str, str]] = None) -> Response:
+    headers = {**(extra_headers or {}), "ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+def set_cache_headers(response: Response, etag: str, cache_control: Optional[str] = None) -> None:
+    response.headers["ETag"] = etag
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
@@ -1,9 +1,21 @@
 from fastapi import APIRouter
 
-from app.api.routes import user, login, status, order
+from app import database
+from app.api.routes import user, login, status, order, product, admin
+from app.api.routes import async_user, async_order, async_product
 
 api_router = APIRouter()
+
+# In async mode the AsyncSession routers are registered first so they take precedence
+# over the sync routes with the same paths; everything else stays on the sync stack
+if database.DB_MODE == "async":
+    api_router.include_router(async_user.router, prefix="/users", tags=["users"])
+    api_router.include_router(async_order.router, prefix="/orders", tags=["orders"])
+    api_router.include_router(async_product.router, tags=["products"])
+
 api_router.include_router(login.router, prefix="/login",tags=["login"])
 api_router.include_router(user.router, prefix="/users", tags=["users"])
 api_router.include_router(status.router, prefix="/statuses", tags=["statuses"])
 api_router.include_router(order.router, prefix="/orders", tags=["orders"])
+api_router.include_router(product.router, tags=["products"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,113 @@
+from datetime import datetime
+from enum import Enum
+from typing import Iterator, List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from app import database, schemas
+from app.api.routes import dependencies
+from app.jobs import queue as job_queue
+from app.pool_metrics import pool_status
+from app.query_budget import budget as query_budget
+from app.services import analytics_service, export_service, idempotency_service, product_cache, token_cache, user_cache
+
+router = APIRouter()
+
+# Connection pool usage, checkout wait histogram and timeouts per engine
+@router.get("/db-pool", status_code=status.HTTP_200_OK)
+def get_db_pool_metrics(admin_user = Depends(dependencies.get_current_admin)):
+    return pool_status()
+
+# Size, hit ratio and eviction counters of the in-process read caches
+@router.get("/cache", status_code=status.HTTP_200_OK)
+def get_cache_metrics(admin_user = Depends(dependencies.get_current_admin)):
+    return {"users": user_cache.stats(), "products": product_cache.stats(), "tokens": token_cache.stats()}
+
+# Background job queue depth and outcome counters
+@router.get("/jobs", status_code=status.HTTP_200_OK)
+def get_job_metrics(admin_user = Depends(dependencies.get_current_admin)):
+    return job_queue.stats()
+
+# Worst-case statements and ORM rows per route against the stored baseline
+@router.get("/query-budget", status_code=status.HTTP_200_OK)
+def get_query_budget(admin_user = Depends(dependencies.get_current_admin)):
+    return query_budget.report()
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+EXPORT_MEDIA_TYPES = {ExportFormat.csv: "text/csv", ExportFormat.ndjson: "application/x-ndjson"}
+
+def _export_response(name: str, stmt, fmt: ExportFormat) -> StreamingResponse:
+    def generate() -> Iterator[str]:
+        # The session is owned by the generator because the response outlives the request dependencies
+        db = database.SessionLocal()
+        try:
+            yield from export_service.stream_export(db, stmt, fmt.value)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt.value}"'},
+    )
+
+@router.get("/export/users", status_code=status.HTTP_200_OK)
+def export_users(format: ExportFormat = ExportFormat.csv, admin_user = Depends(dependencies.get_current_admin)):
+    return _export_response("users", export_service.users_statement(), format)
+
+@router.get("/export/products", status_code=status.HTTP_200_OK)
+def export_products(format: ExportFormat = ExportFormat.csv, admin_user = Depends(dependencies.get_current_admin)):
+    return _export_response("products", export_service.products_statement(), format)
+
+# created_from is inclusive and created_to exclusive
+@router.get("/export/orders", status_code=status.HTTP_200_OK)
+def export_orders(
+    format: ExportFormat = ExportFormat.csv,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    admin_user = Depends(dependencies.get_current_admin)
+):
+    return _export_response("orders", export_service.orders_statement(created_from, created_to), format)
+
+
+class Granularity(str, Enum):
+    hour = "hour"
+    day = "day"
+
+class SalesSource(str, Enum):
+    live = "live"
+    rollup = "rollup"
+
+# Units and revenue per time bucket, product and status; start is inclusive and end exclusive
+@router.get("/analytics/sales", response_model=List[schemas.SalesBucket], status_code=status.HTTP_200_OK)
+def get_sales_analytics(
+    granularity: Granularity = Granularity.day,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    product_id: Optional[UUID] = None,
+    order_status: Optional[str] = None,
+    source: SalesSource = SalesSource.live,
+    db: Session = Depends(database.get_db),
+    admin_user = Depends(dependencies.get_current_admin)
+):
+    query = analytics_service.sales_by_bucket_from_rollup if source == SalesSource.rollup else analytics_service.sales_by_bucket
+    return query(db, granularity.value, start, end, product_id, order_status)
+
+# Fold orders since the last high-water mark into the hourly rollup
+@router.post("/analytics/sales/refresh", response_model=schemas.SalesRollupRefreshResult, status_code=status.HTTP_200_OK)
+def refresh_sales_rollup(
+    full: bool = False,
+    db: Session = Depends(database.get_db),
+    admin_user = Depends(dependencies.get_current_admin)
+):
+    return analytics_service.refresh_sales_rollup(db, full=full)
+
+# Remove idempotency keys older than IDEMPOTENCY_KEY_TTL_HOURS in batches
+@router.post("/idempotency/purge", status_code=status.HTTP_200_OK)
+def purge_idempotency_keys(db: Session = Depends(database.get_db), admin_user = Depends(dependencies.get_current_admin)):
+    return {"purged": idempotency_service.purge_expired(db)}
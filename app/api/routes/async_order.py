@@ -0,0 +1,42 @@
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ... import schemas, database
+from app.services import async_order_service, idempotency_service, order_service
+from app.api.routes import dependencies
+from app.api.http_cache import ORDER_CACHE_CONTROL, is_not_modified, not_modified, order_etag, set_cache_headers
+
+# Order endpoints of order.py served through AsyncSession when DB_MODE=async
+
+router = APIRouter()
+
+@router.post("/orders/", response_model=schemas.OrderCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_order_endpoint(
+    order: schemas.OrderCreateRequest, 
+    db: AsyncSession = Depends(database.get_async_db), 
+    current_user: schemas.CurrentUser = Depends(dependencies.get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    if idempotency_key is None:
+        return await async_order_service.create_order(db, current_user.id, order)
+
+    body_hash = idempotency_service.request_hash(order.model_dump_json().encode())
+    return await db.run_sync(lambda session: idempotency_service.run_once(
+        session, current_user.id, idempotency_key, "POST /orders/", body_hash,
+        lambda work_session, save: order_service.create_order_response(work_session, current_user.id, order, save),
+        status.HTTP_201_CREATED,
+    ))
+
+@router.get("/orders/{order_id}", response_model=schemas.OrderDetailResponse, status_code=status.HTTP_200_OK)
+async def get_order_endpoint(order_id: UUID, request: Request, response: Response, db: AsyncSession = Depends(database.get_async_db), current_user: schemas.CurrentUser = Depends(dependencies.get_current_active_user)):
+    order = await async_order_service.get_order_by_id(order_id, db)
+
+    if not current_user.is_admin and order.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You do not have permission to view this order.")
+
+    etag = order_etag(order)
+    if is_not_modified(request, etag):
+        return not_modified(etag, ORDER_CACHE_CONTROL)
+    set_cache_headers(response, etag, ORDER_CACHE_CONTROL)
+    return order
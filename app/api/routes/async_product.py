@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+from ... import schemas, database
+from app.services import async_products, product_cache
+from app.api.routes import dependencies
+from app.schemas import ProductSearchParams
+from app.pagination import MAX_PAGE_SIZE
+from app.api.serialization import PRODUCT_LIST_ADAPTER, list_response
+from app.api.http_cache import PRODUCT_CACHE_CONTROL, is_not_modified, make_etag, not_modified, set_cache_headers
+
+# Read endpoints of product.py served through AsyncSession when DB_MODE=async
+
+router = APIRouter()
+
+# Endpoint to list all products
+@router.get("/products", response_model=List[schemas.ProductResponse], status_code=status.HTTP_200_OK)
+async def list_products_endpoint(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(database.get_async_db),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    in_stock: bool = False
+):
+    products_list, next_cursor = await async_products.list_products(db, page=page, page_size=page_size, cursor=cursor, in_stock=in_stock)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    etag = make_etag(next_cursor, *(f"{product.id}.{product.version}" for product in products_list))
+    if is_not_modified(request, etag):
+        # The client still needs the cursor to fetch the next page from a cached body
+        return not_modified(etag, PRODUCT_CACHE_CONTROL, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+    set_cache_headers(response, etag, PRODUCT_CACHE_CONTROL)
+    return list_response(PRODUCT_LIST_ADAPTER, products_list, response)
+
+# Endpoint to search for products based on query params
+@router.get("/products/search", response_model=List[schemas.ProductResponse], status_code=status.HTTP_200_OK)
+async def search_products_endpoint(
+    response: Response,
+    filter_query: ProductSearchParams = Depends(),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    products_list, next_cursor, total = await async_products.search_products(db, filter_query=filter_query)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    return list_response(PRODUCT_LIST_ADAPTER, products_list, response)
+
+# Endpoint for the low-stock report: sellable products with at most `threshold` units left
+# Declared before /products/{product_id} so "low-stock" is not captured as a product id
+@router.get("/products/low-stock", response_model=List[schemas.ProductResponse], status_code=status.HTTP_200_OK)
+async def low_stock_products_endpoint(
+    threshold: int = Query(10, ge=1),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(database.get_async_db),
+    admin_user: schemas.CurrentUser = Depends(dependencies.get_current_admin)
+):
+    return await async_products.list_low_stock(db, threshold, limit)
+
+# Endpoint to get a product by its ID
+@router.get("/products/{product_id}", response_model=schemas.ProductResponse, status_code=status.HTTP_200_OK)
+async def get_product_endpoint(
+    product_id: UUID, 
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    product = await product_cache.get_product_async(product_id, db)
+    etag = make_etag(product["id"], product["version"])
+    if is_not_modified(request, etag):
+        return not_modified(etag, PRODUCT_CACHE_CONTROL)
+    set_cache_headers(response, etag, PRODUCT_CACHE_CONTROL)
+    return product
@@ -0,0 +1,58 @@
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.routes import dependencies
+from app.api.serialization import ORDER_LIST_ADAPTER, USER_LIST_ADAPTER, list_response
+from app.pagination import MAX_PAGE_SIZE
+from app.services import async_user_service, async_order_service
+from ... import schemas, database
+
+# Read endpoints of user.py served through AsyncSession when DB_MODE=async
+
+router = APIRouter()
+
+@router.get("/users/{user_id}", response_model=schemas.GetUserResponseModel, status_code=status.HTTP_200_OK)
+async def get_user_details(
+    user_id: UUID, 
+    db: AsyncSession = Depends(database.get_async_db), 
+    current_user: schemas.CurrentUser = Depends(dependencies.get_current_user)
+):
+    if not current_user.is_admin and current_user.id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Access denied."
+        )
+
+    return await async_user_service.get_user_by_id(user_id, db)
+
+
+@router.get("/users", response_model=list[schemas.GetUserResponseModel], status_code=status.HTTP_200_OK)
+async def get_users(
+    response: Response,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(dependencies.get_current_admin)  
+):
+    return list_response(USER_LIST_ADAPTER, await async_user_service.get_all_users(db), response)
+
+
+@router.get("/users/{user_id}/orders", response_model=list[schemas.OrderDetailResponse], status_code=status.HTTP_200_OK)
+async def list_orders_for_user(
+    user_id: UUID,
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(dependencies.get_current_active_user)
+):
+    if user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to view these orders."
+        )
+
+    orders, next_cursor = await async_order_service.get_orders_for_user(user_id, db, page=page, page_size=page_size, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return list_response(ORDER_LIST_ADAPTER, orders, response)
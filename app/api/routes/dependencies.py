@@ -1,34 +1,69 @@
 from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models import User
-from auth_utlis import verify_token, oauth2_scheme
-from database import get_db  
-from app.services import user_service
+from app.api.auth_utlis import verify_token, oauth2_scheme
+from app.database import DB_MODE, get_async_db, get_db
+from app.services import async_user_service, user_service, user_cache
+from app.schemas import CurrentUser
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+def _unexpected_error(e: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"An unexpected error occurred: {str(e)}"
+    )
 
+def get_current_user_sync(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> CurrentUser:
+    credentials_exception = _credentials_exception()
     try:
         user_id = verify_token(token, credentials_exception)
 
-        user = user_service.get_user_by_id(user_id, db)
+        # Serve the principal from the cache and only hit the users table on a miss
+        user = user_cache.get_user(user_id)
         if user is None:
+            generation = user_cache.generation(user_id)
+            user = user_cache.put_user(user_service.get_user_by_id(user_id, db), generation)
+
+        return user
+
+    except HTTPException as e:
+        if e.status_code == status.HTTP_404_NOT_FOUND:
             raise credentials_exception
+        raise e
+    except Exception as e:
+        raise _unexpected_error(e)
+
+# Same as get_current_user_sync through the AsyncSession, so in async mode a cache miss does not
+# need a sync pool connection; routes that also use get_async_db share the request's session
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
+    credentials_exception = _credentials_exception()
+    try:
+        user_id = verify_token(token, credentials_exception)
+
+        user = user_cache.get_user(user_id)
+        if user is None:
+            generation = user_cache.generation(user_id)
+            user = user_cache.put_user(await async_user_service.get_user_by_id(user_id, db), generation)
 
         return user
 
+    except HTTPException as e:
+        if e.status_code == status.HTTP_404_NOT_FOUND:
+            raise credentials_exception
+        raise e
     except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {str(e)}"
-        )
+        raise _unexpected_error(e)
+
+get_current_user = get_current_user_async if DB_MODE == "async" else get_current_user_sync
+
 # Dependency to get current active user
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if not current_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -37,7 +72,7 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 # Dependency to get current admin user
-async def get_current_admin(current_user: User = Depends(get_current_active_user)) -> User:
+async def get_current_admin(current_user: CurrentUser = Depends(get_current_active_user)) -> CurrentUser:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
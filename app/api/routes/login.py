@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import  OAuth2PasswordRequestForm
-from app.api.auth_utlis import create_access_token
-from models import Token, User
-from user import users_db
+from sqlalchemy.orm import Session
+from app.api.auth_utlis import create_access_token, oauth2_scheme, revoke_token, verify_and_update_password_async
+from app import database
+from app.schemas import Token
+from app.services import user_service
 from datetime import timedelta
-from api.auth_utlis import pwd_context, get_password_hash
-from dependencies import get_user_by_username
 
 
 router = APIRouter()
@@ -15,19 +16,40 @@ router = APIRouter()
 
 #POST /login
 @router.post("/login", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = await get_user_by_username(form_data.username)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
+    # The lookup and the rehash commit block, so they run in the threadpool; bcrypt runs in the password pool
+    user = await run_in_threadpool(user_service.get_user_by_username, form_data.username, db)
 
-# Verify the provided password against the stored hashed password
-    if not user or not pwd_context.verify(form_data.password, get_password_hash(user)):
+# Verify the provided password against the stored hashed password, off the event loop
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await verify_and_update_password_async(form_data.password, user.hashed_password)
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Transparently upgrade hashes made with deprecated settings
+    if new_hash:
+        await run_in_threadpool(user_service.save_password_hash, user, new_hash, db)
+
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
         data={"sub": str(user.id)}, expires_delta=access_token_expires
     )
-    return Token(access_token=access_token, token_type="bearer")
\ No newline at end of file
+    return Token(access_token=access_token, token_type="bearer")
+
+
+#POST /logout
+# Revokes the presented token until it expires
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(token: str = Depends(oauth2_scheme)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    revoke_token(token, credentials_exception)
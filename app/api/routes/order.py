@@ -1,50 +1,203 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+import json
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import AsyncIterator, List, Optional
+from uuid import UUID
 from ... import models,schemas, database
-from app.services import order_service
+from app.services import idempotency_service, order_service
 from app.api.routes import dependencies
+from app.api.http_cache import ORDER_CACHE_CONTROL, is_not_modified, not_modified, order_etag, set_cache_headers
 
 router = APIRouter()
 
+BULK_ORDER_CHUNK_SIZE = int(os.getenv("BULK_ORDER_CHUNK_SIZE", "500"))
+
 @router.post("/orders/", response_model=schemas.OrderCreateResponse, status_code=status.HTTP_201_CREATED)
 def create_order_endpoint(
     order: schemas.OrderCreateRequest, 
     db: Session = Depends(database.get_db), 
-    current_user: dict = Depends(dependencies.get_current_user)
+    current_user: schemas.CurrentUser = Depends(dependencies.get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
-    new_order = order_service.create_order(db, current_user["id"], order)
-    return new_order
+    if idempotency_key is None:
+        return order_service.create_order(db, current_user.id, order)
+
+    # Retries with the same key get the stored response instead of a second order
+    return idempotency_service.run_once(
+        db, current_user.id, idempotency_key, "POST /orders/",
+        idempotency_service.request_hash(order.model_dump_json().encode()),
+        lambda session, save: order_service.create_order_response(session, current_user.id, order, save),
+        status.HTTP_201_CREATED,
+    )
 
 @router.get("/orders/{order_id}", response_model=schemas.OrderDetailResponse, status_code=status.HTTP_200_OK)
-def get_order_endpoint(order_id: str, db: Session = Depends(database.get_db), current_user: dict = Depends(dependencies.get_current_user)):
+def get_order_endpoint(order_id: UUID, request: Request, response: Response, db: Session = Depends(database.get_db), current_user: schemas.CurrentUser = Depends(dependencies.get_current_active_user)):
     order = order_service.get_order_by_id(order_id, db)
 
-    if not current_user["is_admin"] and order.user_id != current_user["id"]:
+    if not current_user.is_admin and order.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="You do not have permission to view this order.")
 
+    etag = order_etag(order)
+    if is_not_modified(request, etag):
+        return not_modified(etag, ORDER_CACHE_CONTROL)
+    set_cache_headers(response, etag, ORDER_CACHE_CONTROL)
     return order
 
 @router.put("/orders/{order_id}/status", response_model=schemas.OrderUpdateResponse, status_code=status.HTTP_200_OK)
 def update_order_status_endpoint(
-    order_id: str, 
+    order_id: UUID, 
     status_request: schemas.UpdateOrderStatusRequest, 
     db: Session = Depends(database.get_db), 
-    admin_user: dict = Depends(dependencies.get_admin_user)
+    admin_user: dict = Depends(dependencies.get_current_admin)
 ):
     updated_order = order_service.update_order_status(order_id, status_request.status, db)
     return updated_order
 
 @router.delete("/orders/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
 def cancel_order_endpoint(
-    order_id: str, 
+    order_id: UUID, 
     db: Session = Depends(database.get_db), 
-    current_user: dict = Depends(dependencies.get_current_user)
+    current_user: schemas.CurrentUser = Depends(dependencies.get_current_active_user)
 ):
     order = order_service.get_order_by_id(order_id, db)
 
-    if not current_user["is_admin"] and order.user_id != current_user["id"]:
+    if not current_user.is_admin and order.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="You do not have permission to cancel this order.")
 
     order_service.cancel_order(order_id, db)
-    return {"message": f"Order {order_id} has been successfully canceled."}
\ No newline at end of file
+    return {"message": f"Order {order_id} has been successfully canceled."}
+
+
+# StreamingResponse normally runs a disconnect listener that calls receive() alongside the body
+# iterator and throws away whatever request body chunks it gets. The bulk generator reads the
+# request body itself, so this response only streams; a client disconnect surfaces as
+# ClientDisconnect from request.stream() instead.
+class RequestConsumingStreamingResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def _iter_ndjson_lines(request: Request, body_hash=None) -> AsyncIterator[bytes]:
+    # Split the request body into lines as it arrives instead of buffering it whole
+    buffer = b""
+    async for piece in request.stream():
+        if body_hash is not None:
+            body_hash.update(piece)
+        buffer += piece
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+def _ndjson(result: dict) -> bytes:
+    return (json.dumps(result, default=str) + "\n").encode()
+
+async def _stream_bulk_results(request: Request, user_id, chunk_size: int, body_hash=None, stage_progress=None) -> AsyncIterator[bytes]:
+    # The session is owned by the generator because the response outlives the request dependencies.
+    # stage_progress(db, lines) is called inside each transaction that creates orders, with their result lines.
+    db = database.SessionLocal()
+    try:
+        index = 0
+        chunk_indexes, chunk_orders = [], []
+
+        async def flush():
+            before_commit = None
+            if stage_progress is not None:
+                before_commit = lambda created: stage_progress(
+                    db, b"".join(_ndjson({"index": chunk_indexes[i], **result}) for i, result in created).decode()
+                )
+            results = await run_in_threadpool(order_service.create_orders_bulk, db, user_id, chunk_orders, before_commit)
+            return b"".join(_ndjson({"index": i, **result}) for i, result in zip(chunk_indexes, results))
+
+        async for line in _iter_ndjson_lines(request, body_hash):
+            try:
+                chunk_orders.append(schemas.OrderCreateRequest.model_validate_json(line))
+                chunk_indexes.append(index)
+            except ValidationError as e:
+                yield _ndjson({"index": index, "status": "invalid", "error": e.errors(include_url=False)})
+            index += 1
+
+            if len(chunk_orders) >= chunk_size:
+                yield await flush()
+                chunk_indexes, chunk_orders = [], []
+
+        if chunk_orders:
+            yield await flush()
+    finally:
+        db.close()
+
+def _finish_bulk_key(user_id, idempotency_key: str, token: str, body: Optional[str], body_hash: Optional[str]) -> None:
+    db = database.SessionLocal()
+    try:
+        if body is not None:
+            idempotency_service.complete(db, user_id, idempotency_key, token, status.HTTP_200_OK, body, body_hash)
+        else:
+            # Committed chunks were recorded with their orders, so the key becomes partial if there were
+            # any and is released otherwise
+            idempotency_service.abandon(db, user_id, idempotency_key, token)
+    finally:
+        db.close()
+
+async def _idempotent_bulk_results(request: Request, user_id, chunk_size: int, idempotency_key: str, token: str) -> AsyncIterator[bytes]:
+    body_hash = hashlib.sha256()
+    produced: List[bytes] = []
+    finished = False
+
+    def stage_progress(db: Session, lines: str) -> None:
+        # Also renews the key's lease, so a long upload is not taken over by a retry
+        idempotency_service.stage_progress(db, user_id, idempotency_key, token, lines)
+
+    try:
+        async for piece in _stream_bulk_results(request, user_id, chunk_size, body_hash, stage_progress):
+            produced.append(piece)
+            yield piece
+        finished = True
+    finally:
+        # Not awaited: a cancelled stream would cancel the await before the key is settled
+        body = b"".join(produced).decode() if finished else None
+        _finish_bulk_key(user_id, idempotency_key, token, body, body_hash.hexdigest())
+
+def _claim_bulk_key(user_id, idempotency_key: str, token: str):
+    db = database.SessionLocal()
+    try:
+        # The body hash is only known once the stream has been read, so it is checked after the claim
+        return idempotency_service.claim_key(db, user_id, idempotency_key, "POST /orders/bulk", None, token)
+    finally:
+        db.close()
+
+# Bulk order ingestion: NDJSON of OrderCreateRequest in, NDJSON of per-order results out
+@router.post("/orders/bulk", status_code=status.HTTP_200_OK)
+async def bulk_create_orders_endpoint(
+    request: Request,
+    chunk_size: int = Query(BULK_ORDER_CHUNK_SIZE, ge=1, le=5000),
+    admin_user: schemas.CurrentUser = Depends(dependencies.get_current_admin),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    if idempotency_key is None:
+        return RequestConsumingStreamingResponse(
+            _stream_bulk_results(request, admin_user.id, chunk_size),
+            media_type="application/x-ndjson",
+        )
+
+    token = idempotency_service.new_claim_token()
+    stored = await run_in_threadpool(_claim_bulk_key, admin_user.id, idempotency_key, token)
+    if stored is not None:
+        body_hash = hashlib.sha256()
+        async for piece in request.stream():
+            body_hash.update(piece)
+        idempotency_service.check_request_hash(stored, body_hash.hexdigest())
+        return idempotency_service.replay(stored, media_type="application/x-ndjson")
+
+    return RequestConsumingStreamingResponse(
+        _idempotent_bulk_results(request, admin_user.id, chunk_size, idempotency_key, token),
+        media_type="application/x-ndjson",
+    )
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+import csv
+import io
+from fastapi import APIRouter, Body, Depends, File, Query, Request, Response, UploadFile, status, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 from ... import models, schemas, database
-from app.services import products
+from app.services import products, product_cache
 from app.api.routes import dependencies
-from database import get_db
-from schemas import Product,ProductUpdate,ProductCreate,ProductSearchParams
+from app.api.serialization import PRODUCT_LIST_ADAPTER, list_response
+from app.api.http_cache import PRODUCT_CACHE_CONTROL, is_not_modified, make_etag, not_modified, set_cache_headers
+from app.schemas import ProductSearchParams
+from app.pagination import MAX_PAGE_SIZE
 
 router = APIRouter()
     
 # Endpoint to create a new product
-@router.post("/products/", response_model=schemas.Product, status_code=status.HTTP_201_CREATED)
+@router.post("/products/", response_model=schemas.ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product_endpoint(
     product: schemas.ProductCreate, 
     db: Session = Depends(database.get_db), 
@@ -19,27 +24,81 @@ def create_product_endpoint(
     try:
         new_product = products.create_product(db, product)
         return new_product
-    except ValueErrorr:
+    except ValueError:
         raise HTTPException(status_code=404, detail="Bad Request .")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+# Endpoint to bulk import products from a JSON array; rows are upserted by name
+@router.post("/products/import", response_model=schemas.ProductImportResult, status_code=status.HTTP_200_OK)
+def import_products_endpoint(
+    rows: List[Dict[str, Any]] = Body(...),
+    db: Session = Depends(database.get_db),
+    admin_user: dict = Depends(dependencies.get_current_admin)
+):
+    return products.import_products(db, rows)
+
+# Endpoint to bulk import products from a CSV upload with a header row
+@router.post("/products/import/csv", response_model=schemas.ProductImportResult, status_code=status.HTTP_200_OK)
+def import_products_csv_endpoint(
+    file: UploadFile = File(...),
+    db: Session = Depends(database.get_db),
+    admin_user: dict = Depends(dependencies.get_current_admin)
+):
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig"))
+    # Empty cells fall back to the schema defaults instead of failing validation
+    rows = ({key: value for key, value in row.items() if value != ""} for row in reader)
+    return products.import_products(db, rows)
+
+# Endpoint to search for products based on query params
+# Declared before /products/{product_id} so "search" is not captured as a product id
+@router.get("/products/search", response_model=List[schemas.ProductResponse], status_code=status.HTTP_200_OK)
+def search_products_endpoint(
+    response: Response,
+    filter_query: ProductSearchParams = Depends(),
+    db: Session = Depends(database.get_db)
+):
+    products_list, next_cursor, total = products.search_products(
+        db,
+        filter_query=filter_query 
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    return list_response(PRODUCT_LIST_ADAPTER, products_list, response)
+
+# Endpoint for the low-stock report: sellable products with at most `threshold` units left
+# Declared before /products/{product_id} so "low-stock" is not captured as a product id
+@router.get("/products/low-stock", response_model=List[schemas.ProductResponse], status_code=status.HTTP_200_OK)
+def low_stock_products_endpoint(
+    threshold: int = Query(10, ge=1),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(database.get_db),
+    admin_user: dict = Depends(dependencies.get_current_admin)
+):
+    return products.list_low_stock(db, threshold, limit)
+
 # Endpoint to get a product by its ID
-@router.get("/products/{product_id}", response_model=schemas.Product, status_code=status.HTTP_200_OK)
+@router.get("/products/{product_id}", response_model=schemas.ProductResponse, status_code=status.HTTP_200_OK)
 def get_product_endpoint(
-    product_id: str, 
+    product_id: UUID, 
+    request: Request,
+    response: Response,
     db: Session = Depends(database.get_db)
 ):
-    product = products.get_product_by_id(product_id, db)
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product with ID {product_id} not found.")
+    product = product_cache.get_product(product_id, db)
+    etag = make_etag(product["id"], product["version"])
+    if is_not_modified(request, etag):
+        return not_modified(etag, PRODUCT_CACHE_CONTROL)
+    set_cache_headers(response, etag, PRODUCT_CACHE_CONTROL)
     return product
 
 # Endpoint to update product details by ID
-@router.put("/products/{product_id}", response_model=schemas.Product, status_code=status.HTTP_200_OK)
+@router.put("/products/{product_id}", response_model=schemas.ProductResponse, status_code=status.HTTP_200_OK)
 def update_product_endpoint(
-    product_id: str, 
-    product_update: schemas.ProductUpdateRequest, 
+    product_id: UUID, 
+    product_update: schemas.ProductUpdate, 
     db: Session = Depends(database.get_db), 
     admin_user: dict = Depends(dependencies.get_current_admin)
 ):
@@ -57,7 +116,7 @@ def update_product_endpoint(
 # Endpoint to delete a product by ID
 @router.delete("/products/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_product_endpoint(
-    product_id: str, 
+    product_id: UUID, 
     db: Session = Depends(database.get_db), 
     admin_user: dict = Depends(dependencies.get_current_admin)
 ):
@@ -67,22 +126,23 @@ def delete_product_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 # Endpoint to list all products
-@router.get("/products", response_model=List[schemas.Product], status_code=status.HTTP_200_OK)
+@router.get("/products", response_model=List[schemas.ProductResponse], status_code=status.HTTP_200_OK)
 def list_products_endpoint(
+    request: Request,
+    response: Response,
     db: Session = Depends(database.get_db),
-    page: int = 1,  # Default page is 1
-    page_size: int = 10  # Default page size is 10
+    page: int = Query(1, ge=1),  # Default page is 1, ignored when a cursor is given
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),  # Default page size is 10
+    cursor: Optional[str] = None,  # Opaque token from the X-Next-Cursor header of the previous page
+    in_stock: bool = False  # Skip sold-out and unavailable products
 ):
-    products_list = products.list_products(db, page=page, page_size=page_size)
-    return products_list
-# Endpoint to search for products based on query params
-@router.get("/products/search", response_model=List[schemas.ProductResponse], status_code=status.HTTP_200_OK)
-async def search_products_endpoint(
-    filter_query: ProductSearchParams = Depends(),
-    db: Session = Depends(database.get_db)
-):
-    products_list = products.search_products(
-        db,
-        filter_query=filter_query 
-    )
-    return products_list
\ No newline at end of file
+    products_list, next_cursor = products.list_products(db, page=page, page_size=page_size, cursor=cursor, in_stock=in_stock)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    etag = make_etag(next_cursor, *(f"{product.id}.{product.version}" for product in products_list))
+    if is_not_modified(request, etag):
+        # The client still needs the cursor to fetch the next page from a cached body
+        return not_modified(etag, PRODUCT_CACHE_CONTROL, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+    set_cache_headers(response, etag, PRODUCT_CACHE_CONTROL)
+    return list_response(PRODUCT_LIST_ADAPTER, products_list, response)
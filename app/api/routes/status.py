@@ -1,17 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
 from uuid import UUID
-from schemas import StatusCreate, StatusUpdate
-from models import Status
-from dependencies import get_current_admin
-from services.statuss import create_status_service,get_status_by_id_service,update_status_service,delete_status_service
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas import StatusCreate, StatusUpdate
+from app.api.routes.dependencies import get_current_admin
+from app.services.statuss import create_status as create_status_service, get_status_by_id as get_status_by_id_service, update_status as update_status_service, delete_status as delete_status_service
 
 router = APIRouter()
 
 """Create Status"""
 @router.post("/statuses/", status_code=201)
-async def create_status(status: StatusCreate, admin: bool = Depends(get_current_admin)):
+def create_status(status: StatusCreate, db: Session = Depends(get_db), admin: bool = Depends(get_current_admin)):
     try:
-        new_status = create_status_service(status)
+        new_status = create_status_service(db, status)
         return new_status
     except HTTPException as e:
         raise e
@@ -20,9 +21,9 @@ async def create_status(status: StatusCreate, admin: bool = Depends(get_current_
     
 """Get Status by ID"""
 @router.get("/statuses/{status_id}", status_code=200)
-async def get_status(status_id: UUID, admin: bool = Depends(get_current_admin)):
+def get_status(status_id: UUID, db: Session = Depends(get_db), admin: bool = Depends(get_current_admin)):
     try:
-        status = get_status_by_id_service(status_id)
+        status = get_status_by_id_service(db, status_id)
         return status
     except HTTPException as e:
         raise e
@@ -31,9 +32,9 @@ async def get_status(status_id: UUID, admin: bool = Depends(get_current_admin)):
     
 """Update Status by ID"""
 @router.put("/statuses/{status_id}", status_code=200)
-async def update_status(status_id: UUID, status_update: StatusUpdate, admin: bool = Depends(get_current_admin)):
+def update_status(status_id: UUID, status_update: StatusUpdate, db: Session = Depends(get_db), admin: bool = Depends(get_current_admin)):
     try:
-        updated_status = update_status_service(status_id, status_update)
+        updated_status = update_status_service(db, status_id, status_update)
         return updated_status
     except HTTPException as e:
         raise e
@@ -42,9 +43,9 @@ async def update_status(status_id: UUID, status_update: StatusUpdate, admin: boo
 
 """Delete Status by ID"""
 @router.delete("/statuses/{status_id}", status_code=200)
-async def delete_status(status_id: UUID, admin: bool = Depends(get_current_admin)):
+def delete_status(status_id: UUID, db: Session = Depends(get_db), admin: bool = Depends(get_current_admin)):
     try:
-        delete_status_service(status_id)
+        delete_status_service(db, status_id)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -1,15 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import UUID
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from uuid import UUID
 from sqlalchemy.orm import Session
 from app.api.routes import dependencies
-from app.services import user_service, order_service
+from app.api.serialization import ORDER_LIST_ADAPTER, USER_LIST_ADAPTER, list_response
+from app.pagination import MAX_PAGE_SIZE
+from app.services import user_service, order_service, order_summary_service
 from ... import models,schemas, database
 
 router = APIRouter()
 
 @router.post("/users/", response_model=schemas.UserCreateResponseModel, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreateRequestModel, db: Session = Depends(database.get_db)):
-   return user_service.create_user(db=db,user=user)  
+async def create_user(user: schemas.UserCreateRequestModel, db: Session = Depends(database.get_db)):
+   return await user_service.create_user(db=db,user=user)  
+
+
+# Declared before /users/{user_id} so "change_role" is not captured as a user id
+@router.put("/users/change_role", status_code=status.HTTP_200_OK)
+def change_role(
+    request: schemas.ChangeRoleRequest,
+    current_user: models.User = Depends(dependencies.get_current_admin),
+    db: Session = Depends(database.get_db)
+):
+    try:
+        user_service.change_user_role(request.user_id, request.is_admin, db)
+        return {"message": "User role updated successfully."}
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
 @router.get("/users/{user_id}", response_model=schemas.GetUserResponseModel, status_code=status.HTTP_200_OK)
@@ -19,7 +36,7 @@ async def get_user_details(
     current_user: models.User = Depends(dependencies.get_current_user)
 ):
 
-    if not current_user.is_admin and current_user.id != user.id:
+    if not current_user.is_admin and current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="Access denied."
@@ -27,7 +44,7 @@ async def get_user_details(
         
     user = user_service.get_user_by_id(user_id, db)
 
-    return schemas.GetUserResponseModel(user)
+    return schemas.GetUserResponseModel.model_validate(user)
 
     
 
@@ -46,9 +63,9 @@ async def update_user(
             detail="You are not authorized to update this user."
         )
 
-    updated_user = user_service.update_user_in_db(user_id, update_data, db)
+    updated_user = await user_service.update_user_in_db(user_id, update_data, db)
 
-    return schemas.UserUpdateResponseModel(updated_user)
+    return schemas.UserUpdateResponseModel.model_validate(updated_user)
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_200_OK)
@@ -72,12 +89,13 @@ async def delete_user(
 
 @router.get("/users", response_model=list[schemas.GetUserResponseModel], status_code=status.HTTP_200_OK)
 def get_users(
+    response: Response,
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(dependencies.get_current_admin)  
 ):
     try:
         users = user_service.get_all_users(db)
-        return users
+        return list_response(USER_LIST_ADAPTER, users, response)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -87,6 +105,10 @@ def get_users(
 @router.get("/users/{user_id}/orders", response_model=list[schemas.OrderDetailResponse], status_code=status.HTTP_200_OK)
 def list_orders_for_user(
     user_id: UUID,
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(dependencies.get_current_active_user)
 ):
@@ -96,18 +118,22 @@ def list_orders_for_user(
             detail="You are not authorized to view these orders."
         )
 
-    orders = order_service.get_orders_for_user(str(user_id), db)
-    return orders
+    orders, next_cursor = order_service.get_orders_for_user(user_id, db, page=page, page_size=page_size, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return list_response(ORDER_LIST_ADAPTER, orders, response)
 
 
-@router.put("/users/change_role", status_code=status.HTTP_200_OK)
-def change_role(
-    request: schemas.ChangeRoleRequest,
-    current_user: models.User = Depends(dependencies.get_current_admin),
-    db: Session = Depends(database.get_db)
+@router.get("/users/{user_id}/orders/summary", response_model=schemas.UserOrderSummaryResponse, status_code=status.HTTP_200_OK)
+def get_order_summary_for_user(
+    user_id: UUID,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(dependencies.get_current_active_user)
 ):
-    try:
-        user_service.change_user_role(request.user_id, request.is_admin, db)
-        return {"message": "User role updated successfully."}
-    except Exception:
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+    if user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to view these orders."
+        )
+
+    return order_summary_service.get_user_summary(user_id, db)
@@ -0,0 +1,51 @@
+import os
+from typing import Any, List
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from app import schemas
+from app.instrumentation import timed_serialization
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; without it the fast path still uses pydantic's serializer
+    orjson = None
+
+
+# Opt-in fast serialization: orjson as the default response class, and list endpoints encoded
+# straight to bytes by precompiled pydantic TypeAdapters instead of response_model + jsonable_encoder
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+PRODUCT_LIST_ADAPTER = TypeAdapter(List[schemas.ProductResponse])
+ORDER_LIST_ADAPTER = TypeAdapter(List[schemas.OrderDetailResponse])
+USER_LIST_ADAPTER = TypeAdapter(List[schemas.GetUserResponseModel])
+
+
+# Body encoding is timed so Server-Timing can report it separately from endpoint work
+class TimedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with timed_serialization():
+            return super().render(content)
+
+class TimedORJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        with timed_serialization():
+            return super().render(content)
+
+def default_response_class():
+    if FAST_JSON and orjson is not None:
+        return TimedORJSONResponse
+    return TimedJSONResponse
+
+def list_response(adapter: TypeAdapter, items: List[Any], response: Response):
+    if not FAST_JSON:
+        return items
+
+    with timed_serialization():
+        body = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    fast_response = Response(content=body, media_type="application/json")
+    # Carry over headers the endpoint already set (pagination cursors, ETag, ...)
+    for name, value in response.headers.items():
+        if name != "content-length":
+            fast_response.headers[name] = value
+    return fast_response
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+# Interface for cache stores. Values are plain JSON-compatible data so a shared
+# store (Redis, memcached, ...) can sit behind the same calls and keep several
+# uvicorn workers coherent.
+class CacheBackend:
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+# Bounded in-process cache with per-entry expiry and least-recently-used eviction
+class LRUTTLCache(CacheBackend):
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# Cache-aside loads race with invalidations: a reader that fetched a row just before a writer committed
+# could store its stale copy after the writer's delete. Invalidations bump a counter and a load stores
+# its result only if the counter it read before querying is unchanged. Counters are striped so memory
+# stays fixed; a collision only skips one store. This orders loads against invalidations made in this
+# process; with a shared backend, staleness caused by other workers is still bounded by the entry TTL.
+class Generations:
+    def __init__(self, stripes: int = 1024):
+        self._counters = [0] * stripes
+        self._lock = threading.Lock()
+
+    def _stripe(self, key: str) -> int:
+        return hash(key) % len(self._counters)
+
+    # Read before loading from the database
+    def current(self, key: str) -> int:
+        return self._counters[self._stripe(key)]
+
+    def invalidate(self, backend: CacheBackend, key: str) -> None:
+        with self._lock:
+            self._counters[self._stripe(key)] += 1
+            backend.delete(key)
+
+    def set_if_current(self, backend: CacheBackend, key: str, value: Any, generation: int) -> bool:
+        with self._lock:
+            if self._counters[self._stripe(key)] != generation:
+                return False
+            backend.set(key, value)
+            return True
@@ -1,16 +1,54 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker, declarative_base
+from .pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_pool
 
 
 
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# "async" serves the hot read/order routes through AsyncSession; needs ASYNC_DATABASE_URL
+# with an async driver, e.g. postgresql+asyncpg://... or sqlite+aiosqlite:///...
+DB_MODE = os.getenv("DB_MODE", "sync")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+if DB_MODE == "async" and not ASYNC_DATABASE_URL:
+    raise RuntimeError("DB_MODE=async requires ASYNC_DATABASE_URL to be set.")
+
+# Connection pool sizing; tune per worker count so workers * (size + overflow) fits the server
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+def _engine_options(url: str, poolclass) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    # SQLite uses its own single-connection pools which take no sizing arguments
+    if url and not url.startswith("sqlite"):
+        options.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, InstrumentedQueuePool))
+instrument_pool("sync", engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+if ASYNC_DATABASE_URL:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool))
+    instrument_pool("async", async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine else None
+
 Base = declarative_base()
 
 def get_db():
@@ -19,3 +57,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dialect insert() supporting INSERT ... ON CONFLICT; PostgreSQL and SQLite share the same syntax
+def dialect_insert(db, table):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {dialect}.")
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
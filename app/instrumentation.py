@@ -0,0 +1,234 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .pool_metrics import pool_status
+from .query_budget import budget as query_budget
+
+
+logger = logging.getLogger("app.performance")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+# Per-request accumulator. The middleware sets a fresh object; the endpoint task, the threadpool
+# running sync endpoints and the SQLAlchemy event hooks all see the same instance through the context
+class RequestStats:
+    __slots__ = ("queries", "rows", "db_seconds", "serialize_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+@contextmanager
+def timed_serialization():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.serialize_seconds += time.perf_counter() - started
+
+
+class Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class RouteMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str, int], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], int] = {}
+        self.db_seconds: Dict[Tuple[str, str], float] = {}
+        self.slow_queries = 0
+
+    def record(self, method: str, route: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            histogram = self.latency.setdefault((method, route, status_code), Histogram(LATENCY_BUCKETS))
+            histogram.observe(seconds)
+            self.queries[(method, route)] = self.queries.get((method, route), 0) + stats.queries
+            self.db_seconds[(method, route)] = self.db_seconds.get((method, route), 0.0) + stats.db_seconds
+
+    def record_slow_query(self) -> None:
+        with self._lock:
+            self.slow_queries += 1
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (method, route, status_code), histogram in sorted(self.latency.items()):
+                labels = f'method="{method}",route="{route}",status="{status_code}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+            lines += ["# HELP db_statements_total SQL statements executed by route.", "# TYPE db_statements_total counter"]
+            for (method, route), count in sorted(self.queries.items()):
+                lines.append(f'db_statements_total{{method="{method}",route="{route}"}} {count}')
+
+            lines += ["# HELP db_time_seconds_total Time spent in SQL by route.", "# TYPE db_time_seconds_total counter"]
+            for (method, route), seconds in sorted(self.db_seconds.items()):
+                lines.append(f'db_time_seconds_total{{method="{method}",route="{route}"}} {seconds}')
+
+            lines += ["# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS.", "# TYPE db_slow_queries_total counter"]
+            lines.append(f"db_slow_queries_total {self.slow_queries}")
+
+        # Each metric family is written in one block, after its own HELP and TYPE lines
+        pools = pool_status()
+        lines += ["# HELP db_pool_connections Pool connections by state.", "# TYPE db_pool_connections gauge"]
+        for name, pool in pools.items():
+            for state in ("checked_out", "idle", "overflow"):
+                if state in pool:
+                    lines.append(f'db_pool_connections{{engine="{name}",state="{state}"}} {pool[state]}')
+
+        lines += ["# HELP db_pool_checkout_timeouts_total Checkouts that gave up waiting for a pool connection.", "# TYPE db_pool_checkout_timeouts_total counter"]
+        for name, pool in pools.items():
+            lines.append(f'db_pool_checkout_timeouts_total{{engine="{name}"}} {pool["checkout_timeouts"]}')
+
+        return "\n".join(lines) + "\n"
+
+metrics = RouteMetrics()
+
+
+# Listening on the Engine class covers the sync engine and the one behind the async engine
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        metrics.record_slow_query()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:1000])
+
+# A failed statement never reaches after_cursor_execute, so its start time is dropped here
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+# ORM instances loaded from result rows; Core-only reads (exports, analytics) are not counted
+@event.listens_for(Mapper, "load")
+def _on_instance_load(target, context):
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def _server_timing(stats: RequestStats, elapsed: float) -> str:
+    app_seconds = max(elapsed - stats.db_seconds - stats.serialize_seconds, 0.0)
+    return (
+        f"db;dur={stats.db_seconds * 1000:.2f};desc=\"{stats.queries} statements\", "
+        f"serialize;dur={stats.serialize_seconds * 1000:.2f}, "
+        f"app;dur={app_seconds * 1000:.2f}"
+    )
+
+
+# Plain ASGI rather than BaseHTTPMiddleware so the request is measured until the last body chunk is
+# sent; streaming responses (exports, bulk orders) do their queries after the endpoint has returned
+class PerformanceMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        started = time.perf_counter()
+        status_code = 500
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            recorded = True
+            elapsed = time.perf_counter() - started
+
+            # Label by route template so /products/{product_id} is one series, not one per id
+            method = scope["method"]
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            metrics.record(method, route_path, status_code, elapsed, stats)
+            if route is not None:
+                query_budget.observe(method, route_path, stats.queries, stats.rows)
+
+            if elapsed * 1000 >= SLOW_REQUEST_MS:
+                logger.warning(
+                    "Slow request %s %s: %.1f ms, %d statements, %.1f ms in db",
+                    method, route_path, elapsed * 1000, stats.queries, stats.db_seconds * 1000,
+                )
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Headers go out before a streamed body is produced, so this covers the work done so far
+                if SERVER_TIMING:
+                    MutableHeaders(scope=message)["Server-Timing"] = _server_timing(stats, time.perf_counter() - started)
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            # The response never completed: the endpoint raised or the client went away mid-stream
+            if not recorded:
+                record()
+
+
+def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
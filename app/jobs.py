@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional
+
+
+logger = logging.getLogger("app.jobs")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_CAPACITY = int(os.getenv("JOB_QUEUE_CAPACITY", "1000"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY_SECONDS = float(os.getenv("JOB_RETRY_DELAY_SECONDS", "0.5"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    __slots__ = ("name", "run", "on_failure")
+
+    def __init__(self, name: str, run: Callable[[], Awaitable[None]], on_failure: Optional[Callable[[Exception], Awaitable[None]]] = None):
+        self.name = name
+        self.run = run
+        # Called once every attempt has failed
+        self.on_failure = on_failure
+
+
+# In-process asyncio work queue. Capacity is bounded: submit() waits for room, which slows the
+# producer down instead of letting memory grow, and try_submit() refuses work when the queue is full.
+class JobQueue:
+    def __init__(self, workers: int, capacity: int, max_attempts: int, retry_delay: float):
+        self.workers = workers
+        self.capacity = capacity
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        # The queue is created here so it belongs to the running event loop
+        self._queue = asyncio.Queue(maxsize=self.capacity)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stopping job queue with %d jobs still queued", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def submit(self, job: Job) -> None:
+        await self._queue.put(job)
+
+    def try_submit(self, job: Job) -> None:
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull(f"Job queue is full ({self.capacity} jobs).")
+
+    async def _run(self, job: Job) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await job.run()
+                self.completed += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self.failed += 1
+                    logger.exception("Job %s failed after %d attempts", job.name, attempt)
+                    if job.on_failure is not None:
+                        await job.on_failure(e)
+                    return
+                self.retried += 1
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failure handler of job %s raised", job.name)
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "capacity": self.capacity,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+queue = JobQueue(JOB_WORKERS, JOB_QUEUE_CAPACITY, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY_SECONDS)
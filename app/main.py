@@ -1,13 +1,46 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .database import engine
+from .database import SessionLocal, async_engine, engine
 from . import models
 from .api.routes import *
+from .api.auth_utlis import shutdown_password_executor
+from .api.serialization import default_response_class
+from .instrumentation import PerformanceMiddleware, metrics_endpoint
+from .jobs import queue as job_queue
+# order_events registers the outbox handlers on import
+from .services import order_events, outbox
+from .services.status_registry import registry as status_registry
 from app.api.main import api_router
 
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db = SessionLocal()
+    try:
+        status_registry.load(db)
+    finally:
+        db.close()
 
+    await job_queue.start()
+    stop_drainer = asyncio.Event()
+    drainer = asyncio.create_task(outbox.run_drainer(job_queue, stop_drainer)) if outbox.OUTBOX_DRAINER_ENABLED else None
+    yield
+    stop_drainer.set()
+    if drainer is not None:
+        await drainer
+    await job_queue.stop()
+    shutdown_password_executor()
+    if async_engine is not None:
+        await async_engine.dispose()
 
-app.include_router(api_router, prefix="/api/v1")
\ No newline at end of file
+
+app = FastAPI(lifespan=lifespan, default_response_class=default_response_class())
+app.add_middleware(PerformanceMiddleware)
+app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+
+
+app.include_router(api_router, prefix="/api/v1")
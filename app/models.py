@@ -1,13 +1,14 @@
 from datetime import datetime, timezone
 import uuid
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Numeric, String, func
+from sqlalchemy import DDL, Boolean, and_, Column, DateTime, Float, ForeignKey, Index, Integer, Numeric, String, Text, event, func
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 from sqlalchemy.orm import relationship
 from .database import Base
 from pydantic import BaseModel,Field
 from typing import Optional
 class User(Base):
     __tablename__ = "users"
-    id = Column(uuid(as_uuid=True), primary_key=True, default=uuid, unique=True, index=True)
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True)
     username = Column(String(50), nullable=False, unique=True, index=True)
     email = Column(String(100), nullable=False, unique=True, index=True)
     hashed_password = Column(String(255), nullable=False)
@@ -28,71 +29,185 @@ class Product(Base):
     price = Column(Float, nullable=False)
     stock = Column(Integer, nullable=False)
     is_available = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped on every change; drives ETags. A plain counter rather than version_id_col, so writers
+    # increment it in SQL and never fail on a concurrent bump (e.g. a checkout reserving stock)
+    version = Column(Integer, nullable=False, default=1)
+
+    # Composite indexes backing keyset pagination on (sort_key, id)
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        # Partial indexes over sellable products only, so listings that skip sold-out rows and the
+        # low-stock report never touch them. Queries must repeat this exact predicate to use them.
+        Index(
+            "ix_products_in_stock_created_at_id", "created_at", "id",
+            postgresql_where=and_(is_available.is_(True), stock > 0),
+            sqlite_where=and_(is_available.is_(True), stock > 0),
+        ),
+        Index(
+            "ix_products_in_stock_stock_id", "stock", "id",
+            postgresql_where=and_(is_available.is_(True), stock > 0),
+            sqlite_where=and_(is_available.is_(True), stock > 0),
+        ),
+        # Trigram index serving prefix and substring ILIKE name search on PostgreSQL only
+        Index(
+            "ix_products_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     def __repr__(self):
         return f"<Product(name={self.name}, price={self.price}, stock={self.stock}, is_available={self.is_available})>"
 
-    orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
+
+# The trigram operator class has to exist before the products table and its indexes are created
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
 
 
 class Order(Base):
     __tablename__ = "orders"
 
-    id = Column(uuid.UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True)
-    user_id = Column(uuid.UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    status_id = Column(uuid.UUID(as_uuid=True), ForeignKey("order_status.id", ondelete="SET NULL"), nullable=True)
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True)
+    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    status_id = Column(PostgresUUID(as_uuid=True), ForeignKey("order_status.id", ondelete="SET NULL"), nullable=True)
     total_price = Column(Numeric(10, 2), nullable=False)
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=datetime.now(timezone.utc))
+    # ETag counter, incremented by every write; see Product.version
+    version = Column(Integer, nullable=False, default=1)
 
     user = relationship("User", back_populates="orders")
     status = relationship("OrderStatus", back_populates="orders")
     products = relationship("OrderProduct", back_populates="order", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Backs keyset pagination of a user's order history, newest first
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Time-range scans for sales analytics and the rollup refresh
+        Index("ix_orders_created_at", "created_at"),
+    )
+
 
 class OrderStatus(Base):
     __tablename__ = "order_status"
 
-    id = Column(uuid.UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True)
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True)
     name = Column(String(50), unique=True, nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), onupdate=datetime.now(timezone.utc))
+    # ETag counter, incremented by every write; see Product.version
+    version = Column(Integer, nullable=False, default=1)
 
     orders = relationship("Order", back_populates="status")
 
 
+# Single-row counter bumped on every status write so workers can detect a stale status registry
+class StatusRegistryVersion(Base):
+    __tablename__ = "status_registry_version"
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# Per user, per status order count and spend, maintained in the same transaction as order writes
+class UserOrderSummary(Base):
+    __tablename__ = "user_order_summary"
+
+    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    status_id = Column(PostgresUUID(as_uuid=True), ForeignKey("order_status.id", ondelete="CASCADE"), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+# Hourly sales rollup per product and status, refreshed incrementally by the analytics service.
+# Rows are only ever rewritten a whole bucket at a time, so a surrogate key is enough and
+# product_id can stay null for lines whose product has since been deleted.
+class SalesRollup(Base):
+    __tablename__ = "sales_rollup"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    product_id = Column(PostgresUUID(as_uuid=True), nullable=True)
+    status_id = Column(PostgresUUID(as_uuid=True), nullable=False)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_sales_rollup_bucket_product_status", "bucket_start", "product_id", "status_id"),
+    )
+
+
+# High-water marks of incremental jobs, e.g. the last Order.created_at folded into sales_rollup
+class AnalyticsWatermark(Base):
+    __tablename__ = "analytics_watermark"
+
+    name = Column(String(50), primary_key=True)
+    high_water = Column(DateTime(timezone=True), nullable=False)
+
+
+# Client-supplied Idempotency-Key per user and endpoint, with the response to replay on retries
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    endpoint = Column(String(100), nullable=False)
+    # SHA-256 of the request body; null until known for streamed bodies
+    request_hash = Column(String(64), nullable=True)
+    state = Column(String(20), nullable=False, default="in_progress")
+    # Start of the current lease on an in-progress key; refreshed as long-running requests make progress
+    claimed_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Identifies the request holding the lease; writes for the key check it so a request that lost
+    # its lease to a retry cannot also commit its work
+    claim_token = Column(String(32), nullable=True)
+    response_status = Column(Integer, nullable=True)
+    # Final response, or for an in-progress bulk request the results committed so far
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+
+
+# Transactional outbox: events are written in the same transaction as the change that caused them
+# and handed to background workers by the outbox drainer
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    # Not picked up before this time; moved forward while a worker holds the event and after failures
+    available_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Only unprocessed events are ever scanned by the drainer
+        Index(
+            "ix_outbox_events_pending",
+            "available_at",
+            postgresql_where=processed_at.is_(None),
+            sqlite_where=processed_at.is_(None),
+        ),
+    )
+
+
 class OrderProduct(Base):
     __tablename__ = "order_product"
 
-    id = Column(uuid.UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True)
-    order_id = Column(uuid.UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
-    product_id = Column(uuid.UUID(as_uuid=True), ForeignKey("products.id", ondelete="SET NULL"), nullable=True)
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True)
+    order_id = Column(PostgresUUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(PostgresUUID(as_uuid=True), ForeignKey("products.id", ondelete="SET NULL"), nullable=True)
     quantity = Column(Integer, nullable=False)
+    # Price per unit at the time of the order; null only on rows created before it was captured
+    unit_price = Column(Numeric(10, 2), nullable=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), onupdate=datetime.now(timezone.utc))
 
     order = relationship("Order", back_populates="products")
-
-class Product(Base):
-    __tablename__ = "products"
-    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
-    name = Column(String(255), unique=True, nullable=False)
-    description = Column(Text, nullable=True)
-    price = Column(Float, nullable=False)
-    stock = Column(Integer, nullable=False)
-    is_available = Column(Boolean, default=True)
-
-    def __repr__(self):
-        return f"<Product(name={self.name}, price={self.price}, stock={self.stock}, is_available={self.is_available})>"
-
-    orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
-
-class Status(Base):
-    __tablename__ = "statuses"
-
-    id = Column(uuid(as_uuid=True), primary_key=True, default=uuid, index=True)
-    name = Column(String(20), unique=True, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-
-    order = relationship("Order", back_populates="products")
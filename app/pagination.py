@@ -0,0 +1,92 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+import uuid
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+# Upper bound for page_size on the list routes; every page is one LIMIT query
+MAX_PAGE_SIZE = 100
+
+
+# Cursors are opaque to clients: base64url encoded JSON holding the last row's (sort_key, id)
+def encode_cursor(sort_value: Any, row_id: uuid.UUID) -> str:
+    if isinstance(sort_value, datetime):
+        key = ["dt", sort_value.isoformat()]
+    elif isinstance(sort_value, Decimal):
+        key = ["dec", str(sort_value)]
+    elif isinstance(sort_value, uuid.UUID):
+        key = ["uuid", str(sort_value)]
+    else:
+        key = ["raw", sort_value]
+    payload = json.dumps([key, str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        (kind, value), row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if kind == "dt":
+            value = datetime.fromisoformat(value)
+        elif kind == "dec":
+            value = Decimal(value)
+        elif kind == "uuid":
+            value = uuid.UUID(value)
+        return value, uuid.UUID(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor.")
+
+# The helpers below only use filter/order_by/limit/offset, so they accept both ORM Query
+# objects and 2.0-style select() statements for the async session path
+
+def _order(query, sort_column, id_column, descending: bool):
+    if descending:
+        return query.order_by(sort_column.desc(), id_column.desc())
+    return query.order_by(sort_column.asc(), id_column.asc())
+
+def _seek(query, sort_column, id_column, cursor: Optional[str], descending: bool):
+    # Seek past the last seen (sort_key, id) instead of counting rows with OFFSET,
+    # so every page costs the same index range scan regardless of depth
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        row_key = tuple_(sort_column, id_column)
+        if descending:
+            query = query.filter(row_key < tuple_(last_value, last_id))
+        else:
+            query = query.filter(row_key > tuple_(last_value, last_id))
+    return _order(query, sort_column, id_column, descending)
+
+def _cursor_after(rows: List[Any], sort_column, id_column) -> str:
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+def keyset_statement(query, sort_column, id_column, cursor: Optional[str], limit: int, descending: bool = False):
+    # Fetch one extra row to find out whether another page exists
+    return _seek(query, sort_column, id_column, cursor, descending).limit(limit + 1)
+
+def keyset_page(rows: List[Any], sort_column, id_column, limit: int) -> Tuple[List[Any], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _cursor_after(rows, sort_column, id_column)
+
+def offset_statement(query, sort_column, id_column, page: int, page_size: int, descending: bool = False):
+    return _order(query, sort_column, id_column, descending).offset((page - 1) * page_size).limit(page_size)
+
+def offset_page(rows: List[Any], sort_column, id_column, page_size: int) -> Tuple[List[Any], Optional[str]]:
+    # Kept for page-number clients; a full page also hands back a cursor so they can switch to keyset
+    if not rows or len(rows) < page_size:
+        return rows, None
+    return rows, _cursor_after(rows, sort_column, id_column)
+
+def paginate_keyset(query, sort_column, id_column, cursor: Optional[str], limit: int, descending: bool = False) -> Tuple[List[Any], Optional[str]]:
+    rows = keyset_statement(query, sort_column, id_column, cursor, limit, descending).all()
+    return keyset_page(rows, sort_column, id_column, limit)
+
+def paginate_offset(query, sort_column, id_column, page: int, page_size: int, descending: bool = False) -> Tuple[List[Any], Optional[str]]:
+    rows = offset_statement(query, sort_column, id_column, page, page_size, descending).all()
+    return offset_page(rows, sort_column, id_column, page_size)
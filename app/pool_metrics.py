@@ -0,0 +1,115 @@
+import threading
+import time
+from typing import Dict, List
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait_bucket_counts: List[int] = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.checkout_timeouts = 0
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        index = len(WAIT_BUCKETS)
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self.wait_bucket_counts[index] += 1
+            self.wait_count += 1
+            self.wait_sum += seconds
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            # Cumulative counts, Prometheus style
+            cumulative, buckets = 0, {}
+            for bound, count in zip(WAIT_BUCKETS + ["+Inf"], self.wait_bucket_counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "checkout_wait_seconds": {"buckets": buckets, "count": self.wait_count, "sum": self.wait_sum},
+                "checkout_timeouts": self.checkout_timeouts,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+            }
+
+
+# Pool events only fire once a connection has been handed out, so the time spent waiting
+# for one (and the QueuePool timeout) is measured around the pool's own checkout
+class _TimedCheckoutMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.increment("checkout_timeouts")
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - started)
+
+    # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_registry: Dict[str, object] = {}
+
+
+def instrument_pool(name: str, engine) -> None:
+    pool = engine.pool
+    metrics = PoolMetrics()
+    if isinstance(pool, _TimedCheckoutMixin):
+        pool.metrics = metrics
+
+    event.listen(pool, "connect", lambda *args: metrics.increment("connects"))
+    event.listen(pool, "checkout", lambda *args: metrics.increment("checkouts"))
+    event.listen(pool, "checkin", lambda *args: metrics.increment("checkins"))
+    event.listen(pool, "invalidate", lambda *args: metrics.increment("invalidations"))
+    _registry[name] = (engine, metrics)
+
+
+def pool_status() -> Dict[str, Dict]:
+    report = {}
+    for name, (engine, metrics) in _registry.items():
+        pool = engine.pool
+        stats = metrics.snapshot()
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        report[name] = stats
+    return report
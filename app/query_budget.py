@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+
+logger = logging.getLogger("app.performance")
+
+# Baseline of SQL statements and ORM rows per route, e.g.
+# {"GET /api/v1/products/": {"statements": 1, "rows": 50}}, or the baseline recorded by the route
+# benchmark suite (tests/route_baseline.json). The file is only read; baselines are updated from the tests.
+QUERY_BUDGET_FILE = os.getenv("QUERY_BUDGET_FILE", "query_budget.json")
+# Statements allowed above the baseline before a request counts as a regression
+QUERY_BUDGET_SLACK = int(os.getenv("QUERY_BUDGET_SLACK", "0"))
+
+
+def load_baseline(path: str = QUERY_BUDGET_FILE) -> Dict[str, Dict[str, int]]:
+    try:
+        with open(path) as f:
+            baseline = json.load(f)
+        return baseline.get("routes", baseline)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        logger.exception("Could not read query budget baseline from %s", path)
+        return {}
+
+
+class QueryBudget:
+    def __init__(self, baseline: Dict[str, Dict[str, int]]):
+        self._lock = threading.Lock()
+        self.baseline = baseline
+        # Worst case seen per route since startup, and how many requests went over budget
+        self.observed: Dict[str, Dict[str, int]] = {}
+        self.regressions: Dict[str, int] = {}
+
+    def observe(self, method: str, route: str, statements: int, rows: int) -> None:
+        key = f"{method} {route}"
+        with self._lock:
+            seen = self.observed.setdefault(key, {"statements": 0, "rows": 0, "requests": 0})
+            seen["statements"] = max(seen["statements"], statements)
+            seen["rows"] = max(seen["rows"], rows)
+            seen["requests"] += 1
+
+            budget = self.baseline.get(key)
+            if budget is None or statements <= budget["statements"] + QUERY_BUDGET_SLACK:
+                return
+            self.regressions[key] = self.regressions.get(key, 0) + 1
+
+        # Statement count growing with page size is the usual N+1 signature, so rows are logged alongside
+        logger.warning(
+            "Query budget exceeded for %s: %d statements (baseline %d), %d rows (baseline %d)",
+            key, statements, budget["statements"], rows, budget.get("rows", 0),
+        )
+
+    def report(self) -> Dict[str, Dict[str, Optional[int]]]:
+        with self._lock:
+            routes = sorted(set(self.observed) | set(self.baseline))
+            return {
+                key: {
+                    "statements": self.observed.get(key, {}).get("statements"),
+                    "rows": self.observed.get(key, {}).get("rows"),
+                    "requests": self.observed.get(key, {}).get("requests", 0),
+                    "baseline_statements": self.baseline.get(key, {}).get("statements"),
+                    "baseline_rows": self.baseline.get(key, {}).get("rows"),
+                    "regressions": self.regressions.get(key, 0),
+                }
+                for key in routes
+            }
+
+budget = QueryBudget(load_baseline())
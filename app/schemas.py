@@ -1,10 +1,9 @@
-from typing import List, Optional
+from typing import Annotated, List, Optional
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
-from pydantic import BaseModel, EmailStr, Field, condecimal, PositiveInt
+from pydantic import BaseModel, EmailStr, Field, condecimal, PositiveInt, BeforeValidator
 from fastapi import Query
 from decimal import Decimal
-from app.api.routes.dependencies import get_current_time
 from enum import Enum
 
 
@@ -92,8 +91,42 @@ class UserUpdateResponseModel(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc),description="User creation timestamp.")
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc),description="Last updated timestamp.")
 
-    class config:
-        orm_mode = True
+    class Config:
+        from_attributes = True
+
+# Authenticated principal kept in the user cache; holds only what authorization checks need
+class CurrentUser(BaseModel):
+    id: UUID
+    username: str
+    email: str
+    is_admin: bool = False
+    is_active: bool = True
+
+    class Config:
+        from_attributes = True
+
+class StatusOrderSummary(BaseModel):
+    status: Optional[str]
+    order_count: int
+    total_spent: Decimal
+
+class UserOrderSummaryResponse(BaseModel):
+    user_id: UUID
+    order_count: int
+    total_spent: Decimal
+    by_status: List[StatusOrderSummary]
+
+class SalesBucket(BaseModel):
+    bucket: datetime
+    product_id: Optional[UUID]
+    status: Optional[str]
+    units: int
+    revenue: Decimal
+
+class SalesRollupRefreshResult(BaseModel):
+    refreshed_from: Optional[datetime] = Field(None, description="Start of the oldest bucket recomputed; null for a full refresh.")
+    high_water: datetime
+    rows: int
 
 class ChangeRoleRequest(BaseModel):
     user_id: UUID
@@ -107,7 +140,10 @@ class GetUserResponseModel(BaseModel):
     is_admin: bool
     is_active: bool
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 
 
@@ -117,13 +153,25 @@ class ProductOrder(BaseModel):
     product_id: UUID = Field(..., description="The ID of the product being ordered.")
     quantity: int = Field(..., ge=1, description="The quantity of the product being ordered.")
 
+class StockReservationFailure(BaseModel):
+    product_id: UUID
+    requested: int
+    available: int
+    reason: str = Field(..., description="One of not_found, unavailable or insufficient_stock.")
+
 class OrderCreateRequest(BaseModel):
     products: List[ProductOrder] = Field(..., description="List of products to order.")
 
+# Orders expose their status as a name; accept the loaded OrderStatus row as well
+def _status_name(value):
+    return getattr(value, "name", value)
+
+StatusName = Annotated[str, BeforeValidator(_status_name)]
+
 class OrderCreateResponse(BaseModel):
     id: UUID
     user_id: UUID
-    status: str
+    status: StatusName
     total_price: float
     created_at: datetime
 
@@ -134,10 +182,10 @@ class OrderCreateResponse(BaseModel):
 class OrderDetailResponse(BaseModel):
     id: UUID
     user_id: UUID
-    status: str
+    status: StatusName
     total_price: float
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime]
     products: List[ProductOrder]
     
     class config:
@@ -150,7 +198,7 @@ class UpdateOrderStatusRequest(BaseModel):
 class OrderUpdateResponse(BaseModel):
     id: UUID
     user_id: UUID
-    status: str
+    status: StatusName
     total_price: float
     created_at: datetime
     updated_at: Optional[datetime]
@@ -179,7 +227,7 @@ class Product:
         self.price = price
         self.stock = stock
         self.is_available = is_available
-        self.created_at = get_current_time()  
+        self.created_at = datetime.now(timezone.utc)  
         self.updated_at = self.created_at  
     
     def update(self, name: Optional[str], description: Optional[str], price: Optional[float], stock: Optional[int], is_available: Optional[bool]):
@@ -193,7 +241,7 @@ class Product:
             self.stock = stock
         if is_available is not None:
             self.is_available = is_available
-        self.updated_at = get_current_time()
+        self.updated_at = datetime.now(timezone.utc)
     
     def to_dict(self):
         return {
@@ -222,6 +270,16 @@ class ProductUpdate(BaseModel):
     stock: Optional[int] = Field(None, ge=0, description="The available stock of the product.")
     is_available: Optional[bool] = Field(None, description="Is the product available for sale?")
 
+class ProductImportError(BaseModel):
+    row: int = Field(..., description="Zero-based position of the row in the upload.")
+    error: str
+
+class ProductImportResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[ProductImportError] = Field(default_factory=list, description="First rejected rows, capped.")
+
 # Enum for sort_by options
 class SortByEnum(str, Enum):
     name = "name"
@@ -232,15 +290,39 @@ class SortByEnum(str, Enum):
 class SortOrderEnum(str, Enum):
     asc = "asc"
     desc = "desc"
+
+# Enum for name matching options
+class NameMatchEnum(str, Enum):
+    prefix = "prefix"
+    substring = "substring"
+
 class ProductSearchParams(BaseModel):
     name: Optional[str] = None
+    name_match: NameMatchEnum = NameMatchEnum.substring
     min_price: Optional[float] = Field(None, ge=0)
     max_price: Optional[float] = Field(None, ge=0)
     is_available: Optional[bool] = None
+    in_stock: bool = Field(False, description="Only return available products with stock left.")
     page: int = Field(1, ge=1)
     page_size: int = Field(10, gt=0, le=100)
+    cursor: Optional[str] = Field(None, description="Opaque token from the X-Next-Cursor header of the previous page.")
+    include_total: bool = Field(False, description="Also count all matches and return it in the X-Total-Count header.")
     sort_by: SortByEnum = SortByEnum.created_at  
     sort_order: SortOrderEnum = SortOrderEnum.asc  
+
+class ProductResponse(BaseModel):
+    id: UUID
+    name: str
+    description: Optional[str] = None
+    price: float
+    stock: int
+    is_available: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int
+
+    class Config:
+        from_attributes = True
     
 class StatusCreate(BaseModel):
     name: str
@@ -0,0 +1,175 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import uuid
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from .. import models, schemas
+from ..database import dialect_insert
+from .status_registry import registry as status_registry
+
+
+SALES_ROLLUP_WATERMARK = "sales_rollup"
+# Orders newer than this are left for the next refresh so in-flight transactions are not skipped
+SALES_ROLLUP_LAG_SECONDS = int(os.getenv("SALES_ROLLUP_LAG_SECONDS", "60"))
+
+# Same text layout SQLAlchemy uses to store DateTime on SQLite, so buckets compare equal to bound datetimes
+SQLITE_BUCKET_FORMATS = {"hour": "%Y-%m-%d %H:00:00.000000", "day": "%Y-%m-%d 00:00:00.000000"}
+
+
+# Truncate a timestamp column to the start of its hour/day bucket in SQL
+def bucket_expression(db: Session, column, granularity: str):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime(SQLITE_BUCKET_FORMATS[granularity], column)
+    return func.date_trunc(granularity, column)
+
+# Revenue uses the captured unit price; older lines without one fall back to the live price
+def line_revenue():
+    return models.OrderProduct.quantity * func.coalesce(models.OrderProduct.unit_price, models.Product.price)
+
+def _status_filter_id(status: Optional[str], db: Session) -> Optional[uuid.UUID]:
+    if status is None:
+        return None
+    status_id = status_registry.get_id(status, db)
+    if not status_id:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    return status_id
+
+def _to_buckets(rows, db: Session) -> List[schemas.SalesBucket]:
+    return [
+        schemas.SalesBucket(
+            bucket=row.bucket,
+            product_id=row.product_id,
+            status=status_registry.get_name(row.status_id, db),
+            units=row.units,
+            revenue=row.revenue,
+        )
+        for row in rows
+    ]
+
+# Live aggregation straight from order_product / orders / products
+def sales_by_bucket(
+    db: Session,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    product_id: Optional[uuid.UUID] = None,
+    status: Optional[str] = None,
+) -> List[schemas.SalesBucket]:
+    bucket = bucket_expression(db, models.Order.created_at, granularity).label("bucket")
+    stmt = (
+        select(
+            bucket,
+            models.OrderProduct.product_id,
+            models.Order.status_id,
+            func.sum(models.OrderProduct.quantity).label("units"),
+            func.sum(line_revenue()).label("revenue"),
+        )
+        .join(models.Order, models.OrderProduct.order_id == models.Order.id)
+        .outerjoin(models.Product, models.OrderProduct.product_id == models.Product.id)
+        .group_by(bucket, models.OrderProduct.product_id, models.Order.status_id)
+        .order_by(bucket, models.OrderProduct.product_id)
+    )
+    if start is not None:
+        stmt = stmt.filter(models.Order.created_at >= start)
+    if end is not None:
+        stmt = stmt.filter(models.Order.created_at < end)
+    if product_id is not None:
+        stmt = stmt.filter(models.OrderProduct.product_id == product_id)
+    status_id = _status_filter_id(status, db)
+    if status_id is not None:
+        stmt = stmt.filter(models.Order.status_id == status_id)
+
+    return _to_buckets(db.execute(stmt), db)
+
+# Same shape served from the hourly rollup; day buckets are summed from hours
+def sales_by_bucket_from_rollup(
+    db: Session,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    product_id: Optional[uuid.UUID] = None,
+    status: Optional[str] = None,
+) -> List[schemas.SalesBucket]:
+    rollup = models.SalesRollup
+    bucket = (rollup.bucket_start if granularity == "hour" else bucket_expression(db, rollup.bucket_start, granularity)).label("bucket")
+    stmt = (
+        select(
+            bucket,
+            rollup.product_id,
+            rollup.status_id,
+            func.sum(rollup.units).label("units"),
+            func.sum(rollup.revenue).label("revenue"),
+        )
+        .group_by(bucket, rollup.product_id, rollup.status_id)
+        .order_by(bucket, rollup.product_id)
+    )
+    if start is not None:
+        stmt = stmt.filter(rollup.bucket_start >= start)
+    if end is not None:
+        stmt = stmt.filter(rollup.bucket_start < end)
+    if product_id is not None:
+        stmt = stmt.filter(rollup.product_id == product_id)
+    status_id = _status_filter_id(status, db)
+    if status_id is not None:
+        stmt = stmt.filter(rollup.status_id == status_id)
+
+    return _to_buckets(db.execute(stmt), db)
+
+def refresh_sales_rollup(db: Session, full: bool = False) -> schemas.SalesRollupRefreshResult:
+    # Recompute every hourly bucket from the one holding the high-water mark up to now - lag.
+    # Rewriting whole buckets keeps the refresh idempotent. Status changes on orders in older
+    # buckets are only picked up by a full refresh.
+    # Concurrent refreshes are serialised on the watermark row: without the lock a second refresh
+    # could delete the range before the first one commits its rows and then add the same sales again.
+    # The row is created first (a no-op when it exists) so even the very first refresh has one to lock.
+    created = db.execute(
+        dialect_insert(db, models.AnalyticsWatermark)
+        .values(name=SALES_ROLLUP_WATERMARK, high_water=datetime.now(timezone.utc))
+        .on_conflict_do_nothing(index_elements=["name"])
+    ).rowcount == 1
+    watermark = (
+        db.query(models.AnalyticsWatermark)
+        .filter(models.AnalyticsWatermark.name == SALES_ROLLUP_WATERMARK)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+    upper = datetime.now(timezone.utc) - timedelta(seconds=SALES_ROLLUP_LAG_SECONDS)
+    lower = None
+    if not created and not full:
+        lower = watermark.high_water.replace(minute=0, second=0, microsecond=0)
+
+    clear = delete(models.SalesRollup)
+    if lower is not None:
+        clear = clear.filter(models.SalesRollup.bucket_start >= lower)
+    db.execute(clear)
+
+    bucket = bucket_expression(db, models.Order.created_at, "hour")
+    aggregate = (
+        select(
+            bucket,
+            models.OrderProduct.product_id,
+            models.Order.status_id,
+            func.sum(models.OrderProduct.quantity),
+            func.sum(line_revenue()),
+        )
+        .join(models.Order, models.OrderProduct.order_id == models.Order.id)
+        .outerjoin(models.Product, models.OrderProduct.product_id == models.Product.id)
+        .filter(models.Order.created_at < upper, models.Order.status_id.is_not(None))
+        .group_by(bucket, models.OrderProduct.product_id, models.Order.status_id)
+    )
+    if lower is not None:
+        aggregate = aggregate.filter(models.Order.created_at >= lower)
+
+    result = db.execute(
+        insert(models.SalesRollup).from_select(
+            ["bucket_start", "product_id", "status_id", "units", "revenue"], aggregate
+        )
+    )
+
+    watermark.high_water = upper
+    db.commit()
+
+    return schemas.SalesRollupRefreshResult(refreshed_from=lower, high_water=upper, rows=max(result.rowcount, 0))
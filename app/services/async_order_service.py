@@ -0,0 +1,50 @@
+from typing import List, Optional, Tuple
+import uuid
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from fastapi import HTTPException, status
+from .. import models, schemas
+from ..pagination import keyset_page, keyset_statement, offset_page, offset_statement
+from . import order_service
+
+# Async counterparts of services/order_service.py for the AsyncSession path
+
+
+def order_detail_statement():
+    return select(models.Order).options(
+        joinedload(models.Order.status),
+        selectinload(models.Order.products),
+    )
+
+async def get_order_by_id(order_id: str, db: AsyncSession):
+    result = await db.execute(order_detail_statement().filter(models.Order.id == order_id))
+    order = result.unique().scalars().first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+async def get_orders_for_user(user_id: uuid.UUID, db: AsyncSession, page: int = 1, page_size: int = 10, cursor: Optional[str] = None) -> Tuple[List[models.Order], Optional[str]]:
+    stmt = order_detail_statement().filter(models.Order.user_id == user_id)
+    if cursor:
+        stmt = keyset_statement(stmt, models.Order.created_at, models.Order.id, cursor, page_size, descending=True)
+        orders = (await db.execute(stmt)).unique().scalars().all()
+        orders, next_cursor = keyset_page(orders, models.Order.created_at, models.Order.id, page_size)
+    else:
+        stmt = offset_statement(stmt, models.Order.created_at, models.Order.id, page, page_size, descending=True)
+        orders = (await db.execute(stmt)).unique().scalars().all()
+        orders, next_cursor = offset_page(orders, models.Order.created_at, models.Order.id, page_size)
+
+    if not orders:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No orders found for the specified user."
+        )
+
+    return orders, next_cursor
+
+async def create_order(db: AsyncSession, user_id: uuid.UUID, order_data: schemas.OrderCreateRequest):
+    # Reuse the sync pipeline (single product lookup, stock reservation, one commit); run_sync
+    # drives it through the async driver so the event loop is never blocked on I/O
+    new_order = await db.run_sync(lambda session: order_service.create_order(session, user_id, order_data))
+    return await get_order_by_id(new_order.id, db)
@@ -0,0 +1,59 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from .. import models, schemas
+from ..pagination import keyset_page, keyset_statement, offset_page, offset_statement
+from .products import SEARCH_SORT_COLUMNS, apply_product_search_filters, in_stock_condition, low_stock_statement
+
+# Async counterparts of services/products.py for the AsyncSession path
+
+
+async def _fetch_page(db: AsyncSession, stmt, sort_column, cursor: Optional[str], page: int, page_size: int, descending: bool = False):
+    if cursor:
+        stmt = keyset_statement(stmt, sort_column, models.Product.id, cursor, page_size, descending)
+        rows = (await db.execute(stmt)).scalars().all()
+        return keyset_page(rows, sort_column, models.Product.id, page_size)
+
+    stmt = offset_statement(stmt, sort_column, models.Product.id, page, page_size, descending)
+    rows = (await db.execute(stmt)).scalars().all()
+    return offset_page(rows, sort_column, models.Product.id, page_size)
+
+# Get Product by ID
+async def get_product_by_id(product_id: str, db: AsyncSession):
+    product = await db.get(models.Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found.")
+    return product
+
+# List Products
+async def list_products(db: AsyncSession, page: int = 1, page_size: int = 10, cursor: Optional[str] = None, in_stock: bool = False) -> Tuple[List[models.Product], Optional[str]]:
+    stmt = select(models.Product)
+    if in_stock:
+        stmt = stmt.where(in_stock_condition())
+    products, next_cursor = await _fetch_page(db, stmt, models.Product.created_at, cursor, page, page_size)
+
+    if not products:
+        raise HTTPException(status_code=404, detail="No products found.")
+
+    return products, next_cursor
+
+# Search Products
+async def search_products(db: AsyncSession, filter_query: schemas.ProductSearchParams) -> Tuple[List[models.Product], Optional[str], Optional[int]]:
+    stmt = apply_product_search_filters(select(models.Product), filter_query)
+
+    total = None
+    if filter_query.include_total:
+        total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+    sort_column = SEARCH_SORT_COLUMNS[filter_query.sort_by]
+    descending = filter_query.sort_order == schemas.SortOrderEnum.desc
+    products, next_cursor = await _fetch_page(
+        db, stmt, sort_column, filter_query.cursor, filter_query.page, filter_query.page_size, descending
+    )
+
+    return products, next_cursor, total
+
+# Low-stock report
+async def list_low_stock(db: AsyncSession, threshold: int, limit: int = 100) -> List[models.Product]:
+    return (await db.execute(low_stock_statement(threshold, limit))).scalars().all()
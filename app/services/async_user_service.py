@@ -0,0 +1,21 @@
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from .. import models, schemas
+
+# Async counterparts of services/user_service.py for the AsyncSession path
+
+
+async def get_user_by_id(user_id: UUID, db: AsyncSession) -> models.User:
+    user = await db.get(models.User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found."
+        )
+    return user
+
+async def get_all_users(db: AsyncSession) -> list[schemas.GetUserResponseModel]:
+    users = (await db.execute(select(models.User))).scalars().all()
+    return [schemas.GetUserResponseModel.model_validate(user, from_attributes=True) for user in users]
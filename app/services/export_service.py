@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .. import models
+
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Plain column selects, so rows are never turned into ORM objects held by the session
+def users_statement():
+    return select(
+        models.User.id,
+        models.User.username,
+        models.User.email,
+        models.User.is_admin,
+        models.User.is_active,
+        models.User.created_at,
+        models.User.updated_at,
+    ).order_by(models.User.id)
+
+def products_statement():
+    return select(
+        models.Product.id,
+        models.Product.name,
+        models.Product.description,
+        models.Product.price,
+        models.Product.stock,
+        models.Product.is_available,
+        models.Product.created_at,
+        models.Product.updated_at,
+    ).order_by(models.Product.id)
+
+def orders_statement(created_from: Optional[datetime] = None, created_to: Optional[datetime] = None):
+    stmt = (
+        select(
+            models.Order.id,
+            models.Order.user_id,
+            models.OrderStatus.name.label("status"),
+            models.Order.total_price,
+            models.Order.created_at,
+            models.Order.updated_at,
+        )
+        .outerjoin(models.OrderStatus, models.Order.status_id == models.OrderStatus.id)
+        .order_by(models.Order.created_at, models.Order.id)
+    )
+    if created_from is not None:
+        stmt = stmt.filter(models.Order.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.filter(models.Order.created_at < created_to)
+    return stmt
+
+def _csv_chunk(rows) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerows(rows)
+    return out.getvalue()
+
+def _ndjson_chunk(columns, rows) -> str:
+    return "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+
+def stream_export(db: Session, stmt, fmt: str = "csv") -> Iterator[str]:
+    # Server-side cursor: the driver hands rows over in batches of EXPORT_BATCH_SIZE,
+    # and each batch is encoded and yielded before the next is fetched, so memory stays flat
+    result = db.execute(stmt, execution_options={"stream_results": True, "yield_per": EXPORT_BATCH_SIZE})
+    columns = list(result.keys())
+
+    if fmt == "csv":
+        yield _csv_chunk([columns])
+    for rows in result.partitions():
+        yield _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(columns, rows)
@@ -0,0 +1,241 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import os
+from typing import Callable, Optional
+from uuid import UUID, uuid4
+from fastapi import HTTPException, Response, status
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import dialect_insert
+
+
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+IDEMPOTENCY_PURGE_BATCH_SIZE = int(os.getenv("IDEMPOTENCY_PURGE_BATCH_SIZE", "1000"))
+# An in-progress key whose lease is older than this is treated as abandoned by a crashed worker
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+# Interrupted after committing part of its work; retrying it could duplicate that work
+PARTIAL = "partial"
+
+
+def request_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+def _record_filter(query, user_id: UUID, key: str):
+    return query.filter(models.IdempotencyKey.user_id == user_id, models.IdempotencyKey.key == key)
+
+def check_request_hash(record: models.IdempotencyKey, body_hash: str) -> None:
+    if record.request_hash is not None and record.request_hash != body_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request body."
+        )
+
+class LeaseLost(Exception):
+    # The key was reclaimed by a retry while this request still held it; its work must not commit
+    pass
+
+def new_claim_token() -> str:
+    return uuid4().hex
+
+def _owned(db: Session, user_id: UUID, key: str, token: str):
+    return _record_filter(db.query(models.IdempotencyKey), user_id, key).filter(
+        models.IdempotencyKey.state == IN_PROGRESS,
+        models.IdempotencyKey.claim_token == token,
+    )
+
+def _reclaim_stale(db: Session, user_id: UUID, key: str, endpoint: str, body_hash: Optional[str], token: str) -> bool:
+    # Conditional updates, so of several retries racing for an abandoned key only one takes it over
+    now = datetime.now(timezone.utc)
+    stale = _record_filter(db.query(models.IdempotencyKey), user_id, key).filter(
+        models.IdempotencyKey.state == IN_PROGRESS,
+        models.IdempotencyKey.claimed_at < now - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+    )
+    # A stale key that recorded progress had already committed some work, so it is never run again
+    stale.filter(models.IdempotencyKey.response_body.is_not(None)).update(
+        {models.IdempotencyKey.state: PARTIAL}, synchronize_session=False
+    )
+    # Work is committed together with the key's response, so a stale key without one committed nothing
+    reclaimed = stale.filter(models.IdempotencyKey.response_body.is_(None)).update(
+        {
+            models.IdempotencyKey.claimed_at: now,
+            models.IdempotencyKey.claim_token: token,
+            models.IdempotencyKey.endpoint: endpoint,
+            models.IdempotencyKey.request_hash: body_hash,
+        },
+        synchronize_session=False,
+    ) == 1
+    db.commit()
+    return reclaimed
+
+def claim_key(db: Session, user_id: UUID, key: str, endpoint: str, body_hash: Optional[str], token: str) -> Optional[models.IdempotencyKey]:
+    # Returns None when this request owns the key and should do the work, or the completed record to replay.
+    # The insert is the lock: of two concurrent requests with the same key only one row insert succeeds.
+    now = datetime.now(timezone.utc)
+    stmt = dialect_insert(db, models.IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        endpoint=endpoint,
+        request_hash=body_hash,
+        state=IN_PROGRESS,
+        claimed_at=now,
+        claim_token=token,
+        created_at=now,
+    ).on_conflict_do_nothing(index_elements=["user_id", "key"])
+    claimed = db.execute(stmt).rowcount == 1
+    db.commit()
+    if claimed or _reclaim_stale(db, user_id, key, endpoint, body_hash, token):
+        return None
+
+    record = _record_filter(db.query(models.IdempotencyKey), user_id, key).first()
+    if record is None or record.state == IN_PROGRESS:
+        # Either the first request is still running or it just gave the key up; both are safe to retry
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress.",
+            headers={"Retry-After": "1"},
+        )
+    if record.endpoint != endpoint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different endpoint."
+        )
+    if record.state == PARTIAL:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "The request with this Idempotency-Key was interrupted. Only the listed results were "
+                           "committed; resubmit the remaining items under a new key.",
+                "results": [json.loads(line) for line in (record.response_body or "").splitlines()],
+            },
+        )
+    if body_hash is not None:
+        check_request_hash(record, body_hash)
+    return record
+
+# The functions below that take a claim token only write while the token still holds the lease.
+# stage_* do not commit: they join the caller's transaction so the key and the work commit together.
+
+def stage_completion(db: Session, user_id: UUID, key: str, token: str, status_code: int, body: str, body_hash: Optional[str] = None) -> None:
+    values = {"state": COMPLETED, "response_status": status_code, "response_body": body}
+    if body_hash is not None:
+        values["request_hash"] = body_hash
+    if _owned(db, user_id, key, token).update(values, synchronize_session=False) != 1:
+        raise LeaseLost()
+
+def stage_progress(db: Session, user_id: UUID, key: str, token: str, lines: str) -> None:
+    # Append the results of a chunk of work and renew the lease of a long-running request
+    updated = _owned(db, user_id, key, token).update(
+        {
+            models.IdempotencyKey.response_body: func.coalesce(models.IdempotencyKey.response_body, "") + lines,
+            models.IdempotencyKey.claimed_at: datetime.now(timezone.utc),
+        },
+        synchronize_session=False,
+    )
+    if updated != 1:
+        raise LeaseLost()
+
+def complete(db: Session, user_id: UUID, key: str, token: str, status_code: int, body: str, body_hash: Optional[str] = None) -> None:
+    try:
+        stage_completion(db, user_id, key, token, status_code, body, body_hash)
+    except LeaseLost:
+        db.rollback()
+        return
+    db.commit()
+
+def abandon(db: Session, user_id: UUID, key: str, token: str) -> None:
+    # Give up a key whose request failed. If some of its work was committed the key becomes partial
+    # so that work is never repeated; otherwise it is deleted and a retry may run the request again.
+    db.rollback()
+    owned = _owned(db, user_id, key, token)
+    owned.filter(models.IdempotencyKey.response_body.is_not(None)).update(
+        {models.IdempotencyKey.state: PARTIAL}, synchronize_session=False
+    )
+    owned.filter(models.IdempotencyKey.response_body.is_(None)).delete(synchronize_session=False)
+    db.commit()
+
+def record_error(db: Session, user_id: UUID, key: str, token: str, error: HTTPException) -> None:
+    # Client errors (unknown product, insufficient stock, ...) are replayed like successes; server errors free the key
+    if error.status_code >= 500:
+        abandon(db, user_id, key, token)
+        return
+    db.rollback()
+    complete(db, user_id, key, token, error.status_code, json.dumps({"detail": error.detail}, default=str))
+
+def replay(record: models.IdempotencyKey, media_type: str = "application/json") -> Response:
+    return Response(
+        content=record.response_body,
+        status_code=record.response_status,
+        media_type=media_type,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+def run_once(db: Session, user_id: UUID, key: str, endpoint: str, body_hash: str, work: Callable[[Session, Callable[[str], None]], str], status_code: int) -> Response:
+    # work performs the request and returns the JSON body; retries with the same key get that body back.
+    # work must call save(body) inside the transaction that commits its changes, so the key is completed
+    # atomically with them and can never be released or reclaimed after the work committed.
+    token = new_claim_token()
+    stored = claim_key(db, user_id, key, endpoint, body_hash, token)
+    if stored is not None:
+        return replay(stored)
+
+    def save(body: str) -> None:
+        stage_completion(db, user_id, key, token, status_code, body)
+
+    try:
+        body = work(db, save)
+    except LeaseLost:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A retry with this Idempotency-Key took over the request.",
+        )
+    except HTTPException as e:
+        record_error(db, user_id, key, token, e)
+        raise
+    except Exception:
+        db.rollback()
+        record = _record_filter(db.query(models.IdempotencyKey), user_id, key).first()
+        if record is not None and record.state == COMPLETED and record.claim_token == token:
+            # The work committed and only a later step failed; answer with what was stored
+            return replay(record)
+        abandon(db, user_id, key, token)
+        raise
+
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+def purge_expired(db: Session, ttl_hours: float = IDEMPOTENCY_KEY_TTL_HOURS, batch_size: int = IDEMPOTENCY_PURGE_BATCH_SIZE) -> int:
+    # Delete in short batches so the purge never holds locks on a large part of the table
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=ttl_hours)
+    columns = (models.IdempotencyKey.user_id, models.IdempotencyKey.key)
+    purged = 0
+    while True:
+        batch = db.query(*columns).filter(models.IdempotencyKey.created_at < cutoff).limit(batch_size).all()
+        if not batch:
+            break
+        db.query(models.IdempotencyKey).filter(tuple_(*columns).in_([tuple(row) for row in batch])).delete(synchronize_session=False)
+        db.commit()
+        purged += len(batch)
+        if len(batch) < batch_size:
+            break
+    return purged
+
+
+if __name__ == "__main__":
+    # python -m app.services.idempotency_service purge
+    from ..database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the idempotency_keys table.")
+    parser.add_argument("command", choices=["purge"])
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        print(f"Purged {purge_expired(session)} idempotency keys.")
+    finally:
+        session.close()
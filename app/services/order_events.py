@@ -0,0 +1,56 @@
+import logging
+from typing import Iterable
+from uuid import UUID
+from sqlalchemy.orm import Session
+from .. import models
+from . import outbox
+
+
+logger = logging.getLogger("app.notifications")
+
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+
+# Producers: called inside the order transaction, before its commit
+
+def order_created(db: Session, order: models.Order, product_ids: Iterable[UUID]) -> None:
+    outbox.add_event(db, ORDER_CREATED, {
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "total_price": order.total_price,
+        "product_ids": list(product_ids),
+    })
+
+def order_status_changed(db: Session, order: models.Order, old_status_id: UUID, new_status_id: UUID) -> None:
+    outbox.add_event(db, ORDER_STATUS_CHANGED, {
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "old_status_id": old_status_id,
+        "new_status_id": new_status_id,
+    })
+
+
+# Consumers: run by the job queue workers, off the request path
+
+@outbox.handler(ORDER_CREATED)
+def send_order_confirmation(db: Session, payload: dict) -> None:
+    # Delivery (mail, push) hooks in here; until then the confirmation is only logged
+    logger.info("Order %s confirmed for user %s, total %s", payload["order_id"], payload["user_id"], payload["total_price"])
+
+    # Products this order sold out, so they can be restocked or reindexed
+    sold_out = (
+        db.query(models.Product.id, models.Product.name)
+        .filter(models.Product.id.in_([UUID(product_id) for product_id in payload["product_ids"]]), models.Product.stock <= 0)
+        .all()
+    )
+    for product in sold_out:
+        logger.warning("Product %s (%s) is out of stock", product.name, product.id)
+
+@outbox.handler(ORDER_STATUS_CHANGED)
+def send_status_notification(db: Session, payload: dict) -> None:
+    new_status = db.get(models.OrderStatus, UUID(payload["new_status_id"]))
+    logger.info(
+        "Order %s of user %s is now %s",
+        payload["order_id"], payload["user_id"], new_status.name if new_status else payload["new_status_id"],
+    )
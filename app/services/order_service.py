@@ -1,14 +1,21 @@
-from typing import List
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.orm import Session, joinedload, selectinload
 from fastapi import HTTPException , status
 from .. import models, schemas
+from ..pagination import paginate_keyset, paginate_offset
+from . import order_events, order_summary_service, pricing, product_cache, stock_service
+from .status_registry import registry as status_registry
 
 
 def has_active_orders(user_id: str, db: Session) -> bool:
+    # Orders still pending or being processed
+    active_status_ids = [status_registry.get_id(name, db) for name in ("pending", "processing")]
     return (
-        db.query(models.Order)
-        .filter(models.Order.user_id == user_id, models.Order.status == "active")
+        db.query(models.Order.id)
+        .filter(models.Order.user_id == user_id, models.Order.status_id.in_(active_status_ids))
         .first()
         is not None
     )
@@ -24,77 +31,213 @@ def get_product_by_id(product_id: str, db: Session) -> models.Product:
     return product
 
 def update_product_stock(product_id: str, quantity: int, db: Session) -> None:
-    product = get_product_by_id(product_id, db)
-
-    if product.stock < quantity:
+    failures = stock_service.reserve_stock(db, {product_id: quantity})
+    if failures:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Insufficient stock for product."
         )
-
-    product.stock -= quantity
     db.commit()
+    product_cache.invalidate_product(product_id)
 
-def calculate_total_price(db: Session, products):
-    total_price = 0
+def get_products_by_ids(db: Session, product_ids) -> Dict[uuid.UUID, models.Product]:
+    # Load every referenced product in a single IN (...) query
+    products = db.query(models.Product).filter(models.Product.id.in_(set(product_ids))).all()
+    return {product.id: product for product in products}
 
+def merge_order_lines(products) -> Dict[uuid.UUID, int]:
+    # Collapse repeated product lines so stock is checked against the summed quantity
+    quantities: Dict[uuid.UUID, int] = {}
     for product_data in products:
-        product = db.query(models.Product).filter(models.Product.id == product_data.product_id).first()
+        quantities[product_data.product_id] = quantities.get(product_data.product_id, 0) + product_data.quantity
+    return quantities
+
+def validate_order_lines(products_by_id: Dict[uuid.UUID, models.Product], quantities: Dict[uuid.UUID, int], available_stock: Optional[Dict[uuid.UUID, int]] = None) -> None:
+    # available_stock lets batch callers check against stock already promised to earlier orders
+    for product_id, quantity in quantities.items():
+        product = products_by_id.get(product_id)
         if not product:
-            raise HTTPException(status_code=404, detail=f"Product {product_data.product_id} not found.")
-        
+            raise HTTPException(status_code=404, detail=f"Product {product_id} not found.")
+
         if not product.is_available:
             raise HTTPException(
                 status_code=400, detail=f"Product '{product.name}' is currently unavailable."
             )
 
-        if product.stock < product_data.quantity:
+        stock = product.stock if available_stock is None else available_stock[product_id]
+        if stock < quantity:
             raise HTTPException(
                 status_code=400, detail=f"Insufficient stock for product '{product.name}'."
             )
 
-        total_price += product.price * product_data.quantity
+def add_order_products(db: Session, order_id: uuid.UUID, quantities: Dict[uuid.UUID, int], unit_prices: Dict[uuid.UUID, Decimal]):
+    # Bulk insert all line items with their unit price snapshot and reserve their stock; the caller commits
+    db.add_all([
+        models.OrderProduct(order_id=order_id, product_id=product_id, quantity=quantity, unit_price=unit_prices[product_id])
+        for product_id, quantity in quantities.items()
+    ])
 
-    return total_price
+    failures = stock_service.reserve_stock(db, quantities)
+    if failures:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=[failure.model_dump(mode="json") for failure in failures]
+        )
 
-def add_order_products(db: Session, order_id: uuid.UUID, products):
-    for product_data in products:
-        product = get_product_by_id(product_data.product_id, db)
+# before_commit runs after the order is flushed and before it commits, so callers can write their own
+# records (e.g. the idempotency key's stored response) in the same transaction
+def create_order(db: Session, user_id: uuid.UUID, order_data: schemas.OrderCreateRequest, before_commit: Optional[Callable[[models.Order], None]] = None):
+    pending_status_id = status_registry.get_id("pending", db)
+    if not pending_status_id:
+        raise HTTPException(status_code=500, detail="Default status 'pending' not found.")
 
-        order_product = models.OrderProduct(
-            order_id=order_id,
-            product_id=product.id,
-            quantity=product_data.quantity,
-        )
-        db.add(order_product)
+    quantities = merge_order_lines(order_data.products)
+    products_by_id = get_products_by_ids(db, quantities.keys())
+    validate_order_lines(products_by_id, quantities)
+    unit_prices = pricing.unit_prices_for(products_by_id)
+    total_price = pricing.price_order(quantities, unit_prices)
 
-        update_product_stock(product.id, product_data.quantity, db)
+    try:
+        new_order = models.Order(id=uuid.uuid4(), user_id=user_id, status_id=pending_status_id, total_price=total_price)
+        db.add(new_order)
+        add_order_products(db, new_order.id, quantities, unit_prices)
+        order_summary_service.record_orders_created(db, [new_order])
+        order_events.order_created(db, new_order, quantities.keys())
+        if before_commit is not None:
+            db.flush()
+            before_commit(new_order)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    product_cache.invalidate_products(quantities.keys())
 
-    db.commit()
+    db.refresh(new_order)
+    return new_order
+
+
+def create_order_response(db: Session, user_id: uuid.UUID, order_data: schemas.OrderCreateRequest, save_response: Optional[Callable[[str], None]] = None) -> str:
+    # create_order serialized as OrderCreateResponse JSON, for callers that store the response.
+    # The body is built before the commit so save_response can store it in the order's transaction.
+    body = None
 
-def create_order(db: Session, user_id: uuid.UUID, order_data: schemas.OrderCreateRequest):
-    status = db.query(models.OrderStatus).filter(models.OrderStatus.name == "pending").first()
-    if not status:
+    def before_commit(order: models.Order) -> None:
+        nonlocal body
+        body = schemas.OrderCreateResponse.model_validate(order, from_attributes=True).model_dump_json()
+        if save_response is not None:
+            save_response(body)
+
+    create_order(db, user_id, order_data, before_commit)
+    return body
+
+
+def _bulk_result(order: models.Order) -> dict:
+    return {"status": "created", "order_id": str(order.id), "total_price": float(order.total_price)}
+
+def create_orders_bulk(db: Session, user_id: uuid.UUID, orders: List[schemas.OrderCreateRequest], before_commit: Optional[Callable[[List[Tuple[int, dict]]], None]] = None) -> List[dict]:
+    # Create a chunk of orders with one product lookup, one set-based stock reservation and one commit.
+    # Returns one result per input order, in order. before_commit receives the (position, result) pairs
+    # of the orders each transaction is about to commit.
+    pending_status_id = status_registry.get_id("pending", db)
+    if not pending_status_id:
         raise HTTPException(status_code=500, detail="Default status 'pending' not found.")
 
-    total_price = calculate_total_price(db, order_data.products)
+    order_lines = [merge_order_lines(order_data.products) for order_data in orders]
+    products_by_id = get_products_by_ids(db, {product_id for lines in order_lines for product_id in lines})
+    available_stock = {product_id: product.stock for product_id, product in products_by_id.items()}
 
-    new_order = models.Order(user_id=user_id, status_id=status.id, total_price=total_price)
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
+    results: List[dict] = [None] * len(orders)
+    accepted: List[int] = []
+    reserved: Dict[uuid.UUID, int] = {}
+    for index, lines in enumerate(order_lines):
+        try:
+            validate_order_lines(products_by_id, lines, available_stock)
+        except HTTPException as e:
+            results[index] = {"status": "rejected", "error": e.detail}
+            continue
+        accepted.append(index)
+        for product_id, quantity in lines.items():
+            available_stock[product_id] -= quantity
+            reserved[product_id] = reserved.get(product_id, 0) + quantity
 
-    add_order_products(db, new_order.id, order_data.products)
+    # Price every accepted order of the chunk in one pass
+    unit_prices = pricing.unit_prices_for(products_by_id)
+    _, order_totals = pricing.price_orders([order_lines[index] for index in accepted], unit_prices)
 
-    return new_order
+    created: List[models.Order] = []
+    try:
+        for index, total_price in zip(accepted, order_totals):
+            new_order = models.Order(id=uuid.uuid4(), user_id=user_id, status_id=pending_status_id, total_price=total_price)
+            db.add(new_order)
+            db.add_all([
+                models.OrderProduct(order_id=new_order.id, product_id=product_id, quantity=quantity, unit_price=unit_prices[product_id])
+                for product_id, quantity in order_lines[index].items()
+            ])
+            order_events.order_created(db, new_order, order_lines[index].keys())
+            created.append(new_order)
+            results[index] = _bulk_result(new_order)
 
+        failures = stock_service.reserve_stock(db, reserved) if reserved else []
+        if not failures:
+            order_summary_service.record_orders_created(db, created)
+            if before_commit is not None:
+                before_commit([(index, results[index]) for index in accepted])
+            db.commit()
+            product_cache.invalidate_products(reserved.keys())
+            return results
+        db.rollback()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Stock moved underneath us between the lookup and the reservation;
+    # fall back to one transaction per order so only the affected orders are rejected
+    results = []
+    for index, order_data in enumerate(orders):
+        on_commit = None
+        if before_commit is not None:
+            on_commit = lambda order, index=index: before_commit([(index, _bulk_result(order))])
+        try:
+            results.append(_bulk_result(create_order(db, user_id, order_data, on_commit)))
+        except HTTPException as e:
+            results.append({"status": "rejected", "error": e.detail})
+    return results
+
+
+# Eager-load what OrderDetailResponse serializes: the status is joined in and all line items
+# come from one extra SELECT ... IN, so a page of orders costs two queries regardless of its size
+def order_detail_query(db: Session):
+    return db.query(models.Order).options(
+        joinedload(models.Order.status),
+        selectinload(models.Order.products),
+    )
 
 def get_order_by_id(order_id: str, db: Session):
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    order = order_detail_query(db).filter(models.Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
+def _change_status(db: Session, order: models.Order, new_status_id: uuid.UUID) -> bool:
+    # Conditional on the status this request read, so of two concurrent changes only one matches the row
+    # and the summary moves the order once. Returns False when the order already has that status.
+    old_status_id = order.status_id
+    if old_status_id == new_status_id:
+        return False
+    result = db.execute(
+        update(models.Order)
+        .where(models.Order.id == order.id, models.Order.status_id == old_status_id)
+        .values(status_id=new_status_id, version=models.Order.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order status was changed concurrently; retry.")
+    order_summary_service.record_status_change(db, order, old_status_id, new_status_id)
+    order_events.order_status_changed(db, order, old_status_id, new_status_id)
+    return True
+
 def update_order_status(order_id: str, status_name: str, db: Session):
     order = get_order_by_id(order_id, db)
     if not order:
@@ -102,31 +245,35 @@ def update_order_status(order_id: str, status_name: str, db: Session):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Order with ID {order_id} not found."
         )
-    status = db.query(models.OrderStatus).filter(models.OrderStatus.name == status_name).first()
-    if not status:
+    status_id = status_registry.get_id(status_name, db)
+    if not status_id:
         raise HTTPException(status_code=400, detail="Invalid status")
-    order.status_id = status.id
-    db.commit()
-    db.refresh(order)
+    if _change_status(db, order, status_id):
+        db.commit()
+        db.refresh(order)
     return order
 
 def cancel_order(order_id: str, db: Session):
     order = get_order_by_id(order_id, db)
-    if order.status.name != "pending":
+    if status_registry.get_name(order.status_id, db) != "pending":
         raise HTTPException(status_code=400, detail="Only pending orders can be canceled")
-    status = db.query(models.OrderStatus).filter(models.OrderStatus.name == "canceled").first()
-    if not status:
+    canceled_status_id = status_registry.get_id("canceled", db)
+    if not canceled_status_id:
         raise HTTPException(status_code=500, detail="Status 'canceled' not found")
-    order.status_id = status.id
+    _change_status(db, order, canceled_status_id)
     db.commit()
     return {"message": f"Order {order_id} has been successfully canceled."}
 
 
 
 
-def get_orders_for_user(user_id: str, db: Session) -> List[schemas.OrderDetailResponse]:
-    # Query all orders to the given user_id
-    orders = db.query(models.Order).filter(models.Order.user_id == user_id).all()
+def get_orders_for_user(user_id: str, db: Session, page: int = 1, page_size: int = 10, cursor: Optional[str] = None) -> Tuple[List[models.Order], Optional[str]]:
+    # Page through the user's orders newest first
+    query = order_detail_query(db).filter(models.Order.user_id == user_id)
+    if cursor:
+        orders, next_cursor = paginate_keyset(query, models.Order.created_at, models.Order.id, cursor, page_size, descending=True)
+    else:
+        orders, next_cursor = paginate_offset(query, models.Order.created_at, models.Order.id, page, page_size, descending=True)
 
     if not orders:
         raise HTTPException(
@@ -134,4 +281,4 @@ def get_orders_for_user(user_id: str, db: Session) -> List[schemas.OrderDetailRe
             detail="No orders found for the specified user."
         )
 
-    return orders
\ No newline at end of file
+    return orders, next_cursor
@@ -0,0 +1,140 @@
+import argparse
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+import uuid
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..database import dialect_insert
+from .status_registry import registry as status_registry
+
+
+SummaryKey = Tuple[uuid.UUID, uuid.UUID]
+
+
+def apply_deltas(db: Session, deltas: Dict[SummaryKey, Tuple[int, Decimal]]) -> None:
+    # Upsert count/amount deltas per (user, status); call inside the order write transaction
+    rows = [
+        {"user_id": user_id, "status_id": status_id, "order_count": count, "total_spent": amount}
+        for (user_id, status_id), (count, amount) in deltas.items()
+        if user_id is not None and status_id is not None and (count or amount)
+    ]
+    if not rows:
+        return
+
+    stmt = dialect_insert(db, models.UserOrderSummary)
+    table = models.UserOrderSummary.__table__
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.status_id],
+            set_={
+                "order_count": table.c.order_count + stmt.excluded.order_count,
+                "total_spent": table.c.total_spent + stmt.excluded.total_spent,
+            },
+        ),
+        rows,
+    )
+
+def _add(deltas: Dict[SummaryKey, Tuple[int, Decimal]], key: SummaryKey, count: int, amount) -> None:
+    current_count, current_amount = deltas.get(key, (0, Decimal("0")))
+    deltas[key] = (current_count + count, current_amount + Decimal(str(amount)))
+
+def record_orders_created(db: Session, orders: Iterable[models.Order]) -> None:
+    deltas: Dict[SummaryKey, Tuple[int, Decimal]] = {}
+    for order in orders:
+        _add(deltas, (order.user_id, order.status_id), 1, order.total_price)
+    apply_deltas(db, deltas)
+
+def record_status_change(db: Session, order: models.Order, old_status_id: uuid.UUID, new_status_id: uuid.UUID) -> None:
+    if old_status_id == new_status_id:
+        return
+    deltas: Dict[SummaryKey, Tuple[int, Decimal]] = {}
+    _add(deltas, (order.user_id, old_status_id), -1, -Decimal(str(order.total_price)))
+    _add(deltas, (order.user_id, new_status_id), 1, order.total_price)
+    apply_deltas(db, deltas)
+
+def get_user_summary(user_id: uuid.UUID, db: Session) -> schemas.UserOrderSummaryResponse:
+    # Primary-key range read of at most one row per status
+    rows = db.query(models.UserOrderSummary).filter(models.UserOrderSummary.user_id == user_id).all()
+
+    by_status = [
+        schemas.StatusOrderSummary(
+            status=status_registry.get_name(row.status_id, db),
+            order_count=row.order_count,
+            total_spent=row.total_spent,
+        )
+        for row in rows
+        if row.order_count
+    ]
+    return schemas.UserOrderSummaryResponse(
+        user_id=user_id,
+        order_count=sum(item.order_count for item in by_status),
+        total_spent=sum((item.total_spent for item in by_status), Decimal("0")),
+        by_status=by_status,
+    )
+
+def _aggregate_from_orders(db: Session):
+    return (
+        select(
+            models.Order.user_id,
+            models.Order.status_id,
+            func.count().label("order_count"),
+            func.coalesce(func.sum(models.Order.total_price), 0).label("total_spent"),
+        )
+        .filter(models.Order.user_id.is_not(None), models.Order.status_id.is_not(None))
+        .group_by(models.Order.user_id, models.Order.status_id)
+    )
+
+# Backfill: recompute the whole table from orders in one transaction
+def rebuild_summary(db: Session) -> int:
+    db.execute(delete(models.UserOrderSummary))
+    rows = [dict(row._mapping) for row in db.execute(_aggregate_from_orders(db))]
+    if rows:
+        db.execute(models.UserOrderSummary.__table__.insert(), rows)
+    db.commit()
+    return len(rows)
+
+# Compare the maintained table with a fresh aggregate; returns the mismatching (user, status) keys
+def check_summary(db: Session) -> List[dict]:
+    expected = {
+        (row.user_id, row.status_id): (row.order_count, Decimal(str(row.total_spent)))
+        for row in db.execute(_aggregate_from_orders(db))
+    }
+    actual = {
+        (row.user_id, row.status_id): (row.order_count, Decimal(str(row.total_spent)))
+        for row in db.query(models.UserOrderSummary)
+        if row.order_count or row.total_spent
+    }
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        if expected.get(key) != actual.get(key):
+            mismatches.append({
+                "user_id": str(key[0]),
+                "status_id": str(key[1]),
+                "expected": expected.get(key),
+                "actual": actual.get(key),
+            })
+    return mismatches
+
+
+if __name__ == "__main__":
+    # python -m app.services.order_summary_service rebuild|check
+    from ..database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the user_order_summary table.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(f"Rebuilt user_order_summary with {rebuild_summary(session)} rows.")
+        else:
+            problems = check_summary(session)
+            for problem in problems:
+                print(problem)
+            print(f"{len(problems)} inconsistent rows.")
+            raise SystemExit(1 if problems else 0)
+    finally:
+        session.close()
@@ -0,0 +1,171 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, List
+from uuid import UUID
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import SessionLocal
+from ..jobs import Job, JobQueue
+
+
+logger = logging.getLogger("app.outbox")
+
+# Set to false on instances that should only serve requests, e.g. when one worker drains for all
+OUTBOX_DRAINER_ENABLED = os.getenv("OUTBOX_DRAINER_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+# How long a claimed event stays hidden from other drainers before it is handed out again
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETRY_SECONDS = float(os.getenv("OUTBOX_RETRY_SECONDS", "5"))
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "72"))
+OUTBOX_PURGE_INTERVAL_SECONDS = float(os.getenv("OUTBOX_PURGE_INTERVAL_SECONDS", "3600"))
+
+Handler = Callable[[Session, dict], None]
+_handlers: Dict[str, Handler] = {}
+
+
+def handler(event_type: str):
+    # Register the side effect for an event type. Handlers run at least once, so they must be safe to repeat.
+    def register(func: Handler) -> Handler:
+        _handlers[event_type] = func
+        return func
+    return register
+
+def add_event(db: Session, event_type: str, payload: dict) -> None:
+    # Part of the caller's transaction: the event exists exactly when the change that caused it commits
+    db.add(models.OutboxEvent(event_type=event_type, payload=json.dumps(payload, default=str)))
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def claim_batch(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> List[UUID]:
+    now = _now()
+    rows = (
+        db.query(models.OutboxEvent.id)
+        .filter(
+            models.OutboxEvent.processed_at.is_(None),
+            models.OutboxEvent.available_at <= now,
+            models.OutboxEvent.attempts < OUTBOX_MAX_ATTEMPTS,
+        )
+        .order_by(models.OutboxEvent.available_at)
+        .limit(batch_size)
+        # Several app instances can drain the same table; SKIP LOCKED keeps them off each other's rows
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    event_ids = [row.id for row in rows]
+    if event_ids:
+        db.query(models.OutboxEvent).filter(models.OutboxEvent.id.in_(event_ids)).update(
+            {models.OutboxEvent.available_at: now + timedelta(seconds=OUTBOX_LEASE_SECONDS)},
+            synchronize_session=False,
+        )
+    db.commit()
+    return event_ids
+
+def process_event(event_id: UUID) -> None:
+    db = SessionLocal()
+    try:
+        event = db.get(models.OutboxEvent, event_id)
+        if event is None or event.processed_at is not None:
+            return
+        event_handler = _handlers.get(event.event_type)
+        if event_handler is None:
+            logger.warning("No handler for outbox event type %s", event.event_type)
+        else:
+            event_handler(db, json.loads(event.payload))
+        # Marked in the handler's transaction, so database side effects are applied once
+        event.processed_at = _now()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def record_failure(event_id: UUID, error: Exception) -> None:
+    # Back off exponentially; after OUTBOX_MAX_ATTEMPTS the event is left for inspection
+    db = SessionLocal()
+    try:
+        event = db.get(models.OutboxEvent, event_id)
+        if event is None:
+            return
+        event.attempts += 1
+        event.last_error = repr(error)[:2000]
+        event.available_at = _now() + timedelta(seconds=OUTBOX_RETRY_SECONDS * 2 ** (event.attempts - 1))
+        db.commit()
+    finally:
+        db.close()
+
+def purge_processed(db: Session, retention_hours: float = OUTBOX_RETENTION_HOURS, batch_size: int = 1000) -> int:
+    cutoff = _now() - timedelta(hours=retention_hours)
+    purged = 0
+    while True:
+        batch = [
+            row.id for row in db.query(models.OutboxEvent.id)
+            .filter(models.OutboxEvent.processed_at < cutoff)
+            .limit(batch_size)
+            .all()
+        ]
+        if not batch:
+            break
+        db.query(models.OutboxEvent).filter(models.OutboxEvent.id.in_(batch)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(batch)
+        if len(batch) < batch_size:
+            break
+    return purged
+
+def _claim() -> List[UUID]:
+    db = SessionLocal()
+    try:
+        return claim_batch(db)
+    finally:
+        db.close()
+
+def _purge() -> int:
+    db = SessionLocal()
+    try:
+        return purge_processed(db)
+    finally:
+        db.close()
+
+def _event_job(event_id: UUID) -> Job:
+    async def run():
+        await run_in_threadpool(process_event, event_id)
+
+    async def on_failure(error: Exception):
+        await run_in_threadpool(record_failure, event_id, error)
+
+    return Job(f"outbox:{event_id}", run, on_failure)
+
+async def run_drainer(job_queue: JobQueue, stop: asyncio.Event) -> None:
+    # Hand pending events to the job queue in batches; submit() waits when the queue is full,
+    # so a slow consumer throttles claiming instead of piling events up in memory
+    last_purge = time.monotonic()
+    while not stop.is_set():
+        try:
+            event_ids = await run_in_threadpool(_claim)
+            for event_id in event_ids:
+                await job_queue.submit(_event_job(event_id))
+
+            if time.monotonic() - last_purge >= OUTBOX_PURGE_INTERVAL_SECONDS:
+                last_purge = time.monotonic()
+                await run_in_threadpool(_purge)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Outbox drain failed")
+            event_ids = []
+
+        # A full batch means more is probably waiting, so only sleep when the outbox is caught up
+        if len(event_ids) < OUTBOX_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(stop.wait(), OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,38 @@
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import accumulate
+from operator import mul
+from typing import Dict, List, Mapping, Sequence, Tuple
+import uuid
+
+
+CENT = Decimal("0.01")
+
+OrderLines = Mapping[uuid.UUID, int]
+
+
+# Prices are stored as floats on Product; go through str() so 19.99 stays 19.99 exactly
+def to_money(value) -> Decimal:
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+def unit_prices_for(products_by_id: Mapping[uuid.UUID, object]) -> Dict[uuid.UUID, Decimal]:
+    return {product_id: to_money(product.price) for product_id, product in products_by_id.items()}
+
+def price_orders(orders: Sequence[OrderLines], unit_prices: Mapping[uuid.UUID, Decimal]) -> Tuple[List[List[Decimal]], List[Decimal]]:
+    # Price a whole batch at once: flatten every line into parallel arrays, multiply them
+    # element-wise in Decimal, then cut the running sum back at each order boundary.
+    # Returns the line totals per order (in line order) and the order totals.
+    line_counts = [len(lines) for lines in orders]
+    quantities = [quantity for lines in orders for quantity in lines.values()]
+    prices = [unit_prices[product_id] for lines in orders for product_id in lines]
+
+    line_totals = list(map(mul, prices, map(Decimal, quantities)))
+    running = [Decimal("0"), *accumulate(line_totals)]
+    ends = list(accumulate(line_counts))
+    starts = [0, *ends[:-1]]
+
+    per_order_lines = [line_totals[start:end] for start, end in zip(starts, ends)]
+    order_totals = [(running[end] - running[start]).quantize(CENT, rounding=ROUND_HALF_UP) for start, end in zip(starts, ends)]
+    return per_order_lines, order_totals
+
+def price_order(lines: OrderLines, unit_prices: Mapping[uuid.UUID, Decimal]) -> Decimal:
+    return price_orders([lines], unit_prices)[1][0]
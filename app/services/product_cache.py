@@ -0,0 +1,71 @@
+import os
+import threading
+from typing import Dict, Iterable
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import schemas
+from ..cache import CacheBackend, Generations, LRUTTLCache
+from . import async_products, products
+
+
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "300"))
+PRODUCT_CACHE_MAX_SIZE = int(os.getenv("PRODUCT_CACHE_MAX_SIZE", "50000"))
+
+_backend: CacheBackend = LRUTTLCache(max_size=PRODUCT_CACHE_MAX_SIZE, ttl=PRODUCT_CACHE_TTL_SECONDS)
+
+# Striped locks give single-flight loading per key without keeping a lock per product around
+_LOAD_LOCK_STRIPES = 64
+_load_locks = [threading.Lock() for _ in range(_LOAD_LOCK_STRIPES)]
+_generations = Generations()
+
+
+def _key(product_id) -> str:
+    return f"product:{product_id}"
+
+# Swap in a shared backend at startup so every worker sees the same entries and invalidations
+def set_backend(backend: CacheBackend) -> None:
+    global _backend
+    _backend = backend
+
+# Read-through lookup returning the serialized schemas.ProductResponse payload
+def get_product(product_id: str, db: Session) -> dict:
+    key = _key(product_id)
+    payload = _backend.get(key)
+    if payload is not None:
+        return payload
+
+    # Only one request per stripe loads from the database; the rest wait and reuse its result
+    with _load_locks[hash(key) % _LOAD_LOCK_STRIPES]:
+        payload = _backend.get(key)
+        if payload is None:
+            generation = _generations.current(key)
+            product = products.get_product_by_id(product_id, db)
+            payload = schemas.ProductResponse.model_validate(product).model_dump(mode="json")
+            # Not stored if the product was invalidated while it loaded; the next miss reloads it
+            _generations.set_if_current(_backend, key, payload, generation)
+    return payload
+
+# Same lookup for the AsyncSession routes. The striped locks would block the event loop, so concurrent
+# misses for one product may each load it once; they all store the same payload.
+async def get_product_async(product_id, db: AsyncSession) -> dict:
+    key = _key(product_id)
+    payload = _backend.get(key)
+    if payload is None:
+        generation = _generations.current(key)
+        product = await async_products.get_product_by_id(product_id, db)
+        payload = schemas.ProductResponse.model_validate(product).model_dump(mode="json")
+        _generations.set_if_current(_backend, key, payload, generation)
+    return payload
+
+def invalidate_product(product_id) -> None:
+    _generations.invalidate(_backend, _key(product_id))
+
+def invalidate_products(product_ids: Iterable) -> None:
+    for product_id in product_ids:
+        invalidate_product(product_id)
+
+def stats() -> Dict[str, float]:
+    stats = dict(_backend.stats())
+    lookups = stats.get("hits", 0) + stats.get("misses", 0)
+    stats["hit_ratio"] = stats.get("hits", 0) / lookups if lookups else 0.0
+    return stats
@@ -1,7 +1,17 @@
-from typing import List
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from .. import models, schemas
+from ..database import dialect_insert
+from ..pagination import paginate_keyset, paginate_offset
+from . import product_cache
+
+# Matches the predicate of the partial in-stock indexes on products, so filtering on it is index-only work
+def in_stock_condition():
+    return and_(models.Product.is_available.is_(True), models.Product.stock > 0)
 
 # Create a Product
 def create_product(db: Session, product_data: schemas.ProductCreate):
@@ -14,13 +24,77 @@ def create_product(db: Session, product_data: schemas.ProductCreate):
         description=product_data.description,
         price=product_data.price,
         stock=product_data.stock,
-        is_available=product_data.is_available
+        is_available=product_data.is_available and product_data.stock > 0
     )
     db.add(new_product)
     db.commit()
     db.refresh(new_product)
     return new_product
 
+PRODUCT_IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+PRODUCT_IMPORT_MAX_ERRORS = 100
+
+def _upsert_statement(db: Session):
+    # INSERT ... ON CONFLICT (name) DO UPDATE
+    try:
+        stmt = dialect_insert(db, models.Product)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=500, detail=f"Bulk product import failed: {e}")
+    return stmt.on_conflict_do_update(
+        index_elements=[models.Product.name],
+        set_={
+            "description": stmt.excluded.description,
+            "price": stmt.excluded.price,
+            "stock": stmt.excluded.stock,
+            "is_available": stmt.excluded.is_available,
+            "updated_at": func.now(),
+            "version": models.Product.version + 1,
+        },
+    )
+
+def _upsert_batch(db: Session, batch: Dict[str, dict], result: schemas.ProductImportResult) -> None:
+    existing = dict(db.execute(select(models.Product.name, models.Product.id).filter(models.Product.name.in_(batch.keys()))).all())
+    db.execute(_upsert_statement(db), list(batch.values()))
+    db.commit()
+    # Only products that already existed can be cached
+    product_cache.invalidate_products(existing.values())
+    result.updated += len(existing)
+    result.inserted += len(batch) - len(existing)
+
+def _reject(result: schemas.ProductImportResult, row: int, error: str) -> None:
+    result.rejected += 1
+    if len(result.errors) < PRODUCT_IMPORT_MAX_ERRORS:
+        result.errors.append(schemas.ProductImportError(row=row, error=error))
+
+# Bulk import / sync of the catalog: validate rows with ProductCreate and upsert them by name in batches
+def import_products(db: Session, rows: Iterable[dict]) -> schemas.ProductImportResult:
+    result = schemas.ProductImportResult()
+    batch: Dict[str, dict] = {}
+    batch_rows: Dict[str, int] = {}
+
+    for index, row in enumerate(rows):
+        try:
+            product = schemas.ProductCreate.model_validate(row)
+        except ValidationError as e:
+            _reject(result, index, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+
+        # A name can only be upserted once per statement; a later row for the same name wins
+        if product.name in batch:
+            _reject(result, batch_rows[product.name], f"Superseded by a later row for '{product.name}'.")
+        batch[product.name] = product.model_dump()
+        batch[product.name]["is_available"] = product.is_available and product.stock > 0
+        batch_rows[product.name] = index
+
+        if len(batch) >= PRODUCT_IMPORT_BATCH_SIZE:
+            _upsert_batch(db, batch, result)
+            batch, batch_rows = {}, {}
+
+    if batch:
+        _upsert_batch(db, batch, result)
+
+    return result
+
 # Get Product by ID
 def get_product_by_id(product_id: str, db: Session):
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
@@ -43,12 +117,19 @@ def update_product(product_id: str, update_data: schemas.ProductUpdate, db: Sess
     if update_data.price is not None:
         product.price = update_data.price
     if update_data.stock is not None:
+        # Availability follows stock across zero: restocking a sold-out product puts it back on sale
+        if product.stock <= 0 < update_data.stock:
+            product.is_available = True
         product.stock = update_data.stock
     if update_data.is_available is not None:
         product.is_available = update_data.is_available
+    if product.stock <= 0:
+        product.is_available = False
+    product.version = models.Product.version + 1
 
     db.commit()
     db.refresh(product)
+    product_cache.invalidate_product(product.id)
     return product
 
 # Delete Product by ID
@@ -56,25 +137,81 @@ def delete_product(product_id: str, db: Session):
     product = get_product_by_id(product_id, db)
     db.delete(product)
     db.commit()
+    product_cache.invalidate_product(product.id)
     return {"message": "Product deleted successfully"}
 
 # List Products
-def list_products(db: Session, page: int = 1, page_size: int = 10) -> List[schemas.Product]:
-    offset = (page - 1) * page_size
-    products = db.query(models.Product).offset(offset).limit(page_size).all()
+def list_products(db: Session, page: int = 1, page_size: int = 10, cursor: Optional[str] = None, in_stock: bool = False) -> Tuple[List[models.Product], Optional[str]]:
+    query = db.query(models.Product)
+    if in_stock:
+        query = query.filter(in_stock_condition())
+    if cursor:
+        products, next_cursor = paginate_keyset(query, models.Product.created_at, models.Product.id, cursor, page_size)
+    else:
+        products, next_cursor = paginate_offset(query, models.Product.created_at, models.Product.id, page, page_size)
 
     if not products:
         raise HTTPException(status_code=404, detail="No products found.")
 
-    return products
+    return products, next_cursor
+
+# Columns the search endpoint may sort by; id is always the tie-breaker
+SEARCH_SORT_COLUMNS = {
+    schemas.SortByEnum.name: models.Product.name,
+    schemas.SortByEnum.price: models.Product.price,
+    schemas.SortByEnum.created_at: models.Product.created_at,
+}
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# Push every search filter into SQL; works on both Query objects and select() statements
+def apply_product_search_filters(query, filter_query: schemas.ProductSearchParams):
+    if filter_query.name:
+        pattern = _escape_like(filter_query.name) + "%"
+        if filter_query.name_match == schemas.NameMatchEnum.substring:
+            pattern = "%" + pattern
+        # ILIKE is served by the pg_trgm index on PostgreSQL and falls back to lower() LIKE elsewhere
+        query = query.filter(models.Product.name.ilike(pattern, escape="\\"))
+    if filter_query.min_price is not None:
+        query = query.filter(models.Product.price >= filter_query.min_price)
+    if filter_query.max_price is not None:
+        query = query.filter(models.Product.price <= filter_query.max_price)
+    if filter_query.is_available is not None:
+        query = query.filter(models.Product.is_available.is_(filter_query.is_available))
+    if filter_query.in_stock:
+        query = query.filter(in_stock_condition())
+
+    return query
+
+def build_product_search_query(db: Session, filter_query: schemas.ProductSearchParams):
+    return apply_product_search_filters(db.query(models.Product), filter_query)
+
 # Search Products
-def search_products(db: Session, filter_query: schemas.ProductSearchParams):
-    name = filter_query.name
-    min_price = filter_query.min_price
-    max_price = filter_query.max_price
-    is_available = filter_query.is_available
-    page = filter_query.page
-    page_size = filter_query.page_size
-    sort_by = filter_query.sort_by
-    sort_order = filter_query.sort_order
-    pass
\ No newline at end of file
+def search_products(db: Session, filter_query: schemas.ProductSearchParams) -> Tuple[List[models.Product], Optional[str], Optional[int]]:
+    query = build_product_search_query(db, filter_query)
+
+    # Counting is a second full scan of the matches, so only do it when the client asks
+    total = query.order_by(None).count() if filter_query.include_total else None
+
+    sort_column = SEARCH_SORT_COLUMNS[filter_query.sort_by]
+    descending = filter_query.sort_order == schemas.SortOrderEnum.desc
+    if filter_query.cursor:
+        products, next_cursor = paginate_keyset(query, sort_column, models.Product.id, filter_query.cursor, filter_query.page_size, descending)
+    else:
+        products, next_cursor = paginate_offset(query, sort_column, models.Product.id, filter_query.page, filter_query.page_size, descending)
+
+    return products, next_cursor, total
+
+def low_stock_statement(threshold: int, limit: int):
+    # Sellable products running out, lowest stock first, read from ix_products_in_stock_stock_id
+    return (
+        select(models.Product)
+        .where(in_stock_condition(), models.Product.stock <= threshold)
+        .order_by(models.Product.stock, models.Product.id)
+        .limit(limit)
+    )
+
+# Low-stock report
+def list_low_stock(db: Session, threshold: int, limit: int = 100) -> List[models.Product]:
+    return db.execute(low_stock_statement(threshold, limit)).scalars().all()
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+from uuid import UUID
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from .. import models
+
+
+STATUS_REGISTRY_CHECK_SECONDS = float(os.getenv("STATUS_REGISTRY_CHECK_SECONDS", "30"))
+# Minimum time between two reloads caused by a lookup that missed
+STATUS_REGISTRY_MISS_RELOAD_SECONDS = float(os.getenv("STATUS_REGISTRY_MISS_RELOAD_SECONDS", "5"))
+_VERSION_ROW_ID = 1
+
+
+def read_version(db: Session) -> int:
+    version = db.query(models.StatusRegistryVersion.version).filter(models.StatusRegistryVersion.id == _VERSION_ROW_ID).scalar()
+    return version or 0
+
+# Call inside the status write transaction, before commit
+def bump_version(db: Session) -> None:
+    result = db.execute(
+        update(models.StatusRegistryVersion)
+        .where(models.StatusRegistryVersion.id == _VERSION_ROW_ID)
+        .values(version=models.StatusRegistryVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(models.StatusRegistryVersion(id=_VERSION_ROW_ID, version=1))
+
+
+# In-memory name <-> id map of order statuses, loaded at startup.
+# Writes through the status service reload it directly; other workers notice the bumped
+# version at most STATUS_REGISTRY_CHECK_SECONDS later.
+# A lookup that misses reloads too, in case the status was created elsewhere, but at most once
+# per STATUS_REGISTRY_MISS_RELOAD_SECONDS: a stream of unknown names or ids is answered from memory
+# instead of turning every request into a full reload.
+class StatusRegistry:
+    def __init__(self, check_interval: float = STATUS_REGISTRY_CHECK_SECONDS, miss_reload_interval: float = STATUS_REGISTRY_MISS_RELOAD_SECONDS):
+        self.check_interval = check_interval
+        self.miss_reload_interval = miss_reload_interval
+        self.version = 0
+        self._by_name: Dict[str, UUID] = {}
+        self._by_id: Dict[UUID, str] = {}
+        self._loaded = False
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        version = read_version(db)
+        statuses = db.query(models.OrderStatus.id, models.OrderStatus.name).all()
+        by_name = {name: status_id for status_id, name in statuses}
+        by_id = {status_id: name for status_id, name in statuses}
+
+        with self._lock:
+            self._by_name = by_name
+            self._by_id = by_id
+            self.version = version
+            self._loaded = True
+            self._checked_at = self._loaded_at = time.monotonic()
+
+    def ensure_fresh(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+            return
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+
+        if read_version(db) != self.version:
+            self.load(db)
+        else:
+            self._checked_at = time.monotonic()
+
+    def _reload_after_miss(self, db: Session) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._loaded_at < self.miss_reload_interval:
+                return False
+            # Claimed before loading, so concurrent misses do not all reload at once
+            self._loaded_at = now
+        self.load(db)
+        return True
+
+    def get_id(self, name: str, db: Session) -> Optional[UUID]:
+        self.ensure_fresh(db)
+        status_id = self._by_name.get(name)
+        # A status created on another worker may not have reached us yet
+        if status_id is None and self._reload_after_miss(db):
+            status_id = self._by_name.get(name)
+        return status_id
+
+    def get_name(self, status_id: UUID, db: Session) -> Optional[str]:
+        self.ensure_fresh(db)
+        name = self._by_id.get(status_id)
+        if name is None and status_id is not None and self._reload_after_miss(db):
+            name = self._by_id.get(status_id)
+        return name
+
+
+registry = StatusRegistry()
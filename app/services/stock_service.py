@@ -0,0 +1,61 @@
+from typing import Dict, List
+import uuid
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+from .. import models, schemas
+
+
+def _classify_failures(db: Session, failed: Dict[uuid.UUID, int]) -> List[schemas.StockReservationFailure]:
+    # One extra query, only on the failure path, to tell the caller why each line was rejected
+    products = db.query(models.Product).filter(models.Product.id.in_(failed.keys())).all()
+    products_by_id = {product.id: product for product in products}
+
+    failures = []
+    for product_id, quantity in failed.items():
+        product = products_by_id.get(product_id)
+        if not product:
+            reason, available = "not_found", 0
+        elif not product.is_available:
+            reason, available = "unavailable", product.stock
+        else:
+            reason, available = "insufficient_stock", product.stock
+        failures.append(schemas.StockReservationFailure(
+            product_id=product_id, requested=quantity, available=available, reason=reason
+        ))
+    return failures
+
+def reserve_stock(db: Session, quantities: Dict[uuid.UUID, int]) -> List[schemas.StockReservationFailure]:
+    # One conditional UPDATE for all lines, so the check and the decrement happen in the database and the
+    # statement count does not grow with the cart. Multi-product carts first lock their rows in ascending
+    # product id order so concurrent orders lock in the same order. Nothing is committed here; on failure
+    # the caller rolls back the lines that did succeed.
+    # A line that takes the last units also marks the product unavailable in the same statement.
+    product_ids = sorted(quantities)
+    if len(product_ids) > 1:
+        db.execute(
+            select(models.Product.id)
+            .where(models.Product.id.in_(product_ids))
+            .order_by(models.Product.id)
+            .with_for_update()
+        )
+    requested = case(quantities, value=models.Product.id)
+    reserved = set(db.execute(
+        update(models.Product)
+        .where(
+            models.Product.id.in_(product_ids),
+            models.Product.is_available.is_(True),
+            models.Product.stock >= requested,
+        )
+        .values(
+            stock=models.Product.stock - requested,
+            is_available=case((models.Product.stock > requested, True), else_=False),
+            version=models.Product.version + 1,
+        )
+        .returning(models.Product.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    failed = {product_id: quantity for product_id, quantity in quantities.items() if product_id not in reserved}
+
+    if not failed:
+        return []
+    return _classify_failures(db, failed)
@@ -0,0 +1,83 @@
+import hashlib
+import heapq
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from ..cache import CacheBackend, LRUTTLCache
+
+
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "50000"))
+
+# Verified claims keyed by token digest; every entry carries its own ttl ending at the token's exp
+_verified: CacheBackend = LRUTTLCache(max_size=TOKEN_CACHE_MAX_SIZE, ttl=0)
+
+
+# Revoked jti values until the token would have expired anyway. Entries are never evicted early,
+# only once their exp has passed, so the set stays as small as the number of live revoked tokens.
+class RevocationList:
+    def __init__(self):
+        self._expires: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def _purge_expired(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._heap)
+            if self._expires.get(jti) == expires_at:
+                del self._expires[jti]
+
+    def add(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            self._purge_expired(time.time())
+            self._expires[jti] = expires_at
+            heapq.heappush(self._heap, (expires_at, jti))
+
+    def contains(self, jti: str) -> bool:
+        with self._lock:
+            expires_at = self._expires.get(jti)
+            return expires_at is not None and expires_at > time.time()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._expires)
+
+_revoked = RevocationList()
+# Optional shared store so a logout on one worker is seen by all of them
+_revocation_backend: Optional[CacheBackend] = None
+
+
+def digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def set_backend(backend: CacheBackend) -> None:
+    global _verified
+    _verified = backend
+
+def set_revocation_backend(backend: CacheBackend) -> None:
+    global _revocation_backend
+    _revocation_backend = backend
+
+def get_claims(token_digest: str) -> Optional[Dict[str, Any]]:
+    return _verified.get(token_digest)
+
+def put_claims(token_digest: str, claims: Dict[str, Any]) -> None:
+    ttl = claims["exp"] - time.time()
+    if ttl > 0:
+        _verified.set(token_digest, claims, ttl=ttl)
+
+def revoke(jti: str, expires_at: float) -> None:
+    ttl = expires_at - time.time()
+    if ttl <= 0:
+        return
+    _revoked.add(jti, expires_at)
+    if _revocation_backend is not None:
+        _revocation_backend.set(f"revoked:{jti}", True, ttl=ttl)
+
+def is_revoked(jti: str) -> bool:
+    if _revoked.contains(jti):
+        return True
+    return _revocation_backend is not None and _revocation_backend.get(f"revoked:{jti}") is not None
+
+def stats() -> Dict[str, int]:
+    return {**_verified.stats(), "revoked": len(_revoked)}
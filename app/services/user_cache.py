@@ -0,0 +1,43 @@
+import os
+from typing import Dict, Optional
+from uuid import UUID
+from .. import models, schemas
+from ..cache import CacheBackend, Generations, LRUTTLCache
+
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+_backend: CacheBackend = LRUTTLCache(max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+_generations = Generations()
+
+
+def _key(user_id) -> str:
+    return f"user:{user_id}"
+
+# Swap in a shared backend at startup so every worker sees the same entries and invalidations
+def set_backend(backend: CacheBackend) -> None:
+    global _backend
+    _backend = backend
+
+def get_user(user_id: UUID) -> Optional[schemas.CurrentUser]:
+    payload = _backend.get(_key(user_id))
+    if payload is None:
+        return None
+    return schemas.CurrentUser.model_validate(payload)
+
+# Take this before loading the user, and pass it to put_user
+def generation(user_id: UUID) -> int:
+    return _generations.current(_key(user_id))
+
+# Caches the loaded user unless it was invalidated since `generation` was taken
+def put_user(user: models.User, generation: int) -> schemas.CurrentUser:
+    principal = schemas.CurrentUser.model_validate(user)
+    _generations.set_if_current(_backend, _key(principal.id), principal.model_dump(mode="json"), generation)
+    return principal
+
+def invalidate_user(user_id: UUID) -> None:
+    _generations.invalidate(_backend, _key(user_id))
+
+def stats() -> Dict[str, int]:
+    return _backend.stats()
@@ -1,16 +1,20 @@
 from datetime import datetime, timezone
 from fastapi import HTTPException, status
-from sqlalchemy import UUID
+from fastapi.concurrency import run_in_threadpool
+from uuid import UUID
 from sqlalchemy.orm import Session
 from .. import models, schemas
-from api.auth_utlis import get_password_hash
-from app.services import order_service
+from app.api.auth_utlis import get_password_hash_async
+from app.services import order_service, user_cache
 
 
 
 def get_user_by_id(user_id: str, db: Session) -> models.User | None:
     return db.query(models.User).filter(models.User.id == user_id).first()
 
+def get_user_by_username(username: str, db: Session) -> models.User | None:
+    return db.query(models.User).filter(models.User.username == username).first()
+
 def find_user_by_email_and_id(email: str, exclude_user_id: str, db: Session) -> models.User | None:
     return (
         db.query(models.User)
@@ -18,13 +22,14 @@ def find_user_by_email_and_id(email: str, exclude_user_id: str, db: Session) ->
         .first()
     )
     
-async def create_user(db: Session, user: schemas.UserCreateRequestModel) -> schemas.UserCreateResponseModel:
+def _ensure_email_free(email: str, db: Session) -> None:
     # Check if the email already exists
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+    existing_user = db.query(models.User).filter(models.User.email == email).first()
     if existing_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered.")
-    
-    hashed_password = get_password_hash(user.password)
+
+
+def _insert_user(user: schemas.UserCreateRequestModel, hashed_password: str, db: Session) -> models.User:
     new_user = models.User(
         username=user.username,
         email=user.email,
@@ -36,10 +41,21 @@ async def create_user(db: Session, user: schemas.UserCreateRequestModel) -> sche
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
-
     return new_user
 
 
+# The blocking queries run in the threadpool and bcrypt in the password pool, so the event loop only awaits
+async def create_user(db: Session, user: schemas.UserCreateRequestModel) -> schemas.UserCreateResponseModel:
+    await run_in_threadpool(_ensure_email_free, user.email, db)
+    hashed_password = await get_password_hash_async(user.password)
+    return await run_in_threadpool(_insert_user, user, hashed_password, db)
+
+
+def save_password_hash(user: models.User, hashed_password: str, db: Session) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+
+
 
 def get_user_by_id(user_id: UUID, db: Session) -> models.User:
     user = db.query(models.User).filter(models.User.id == user_id).first()
@@ -51,9 +67,10 @@ def get_user_by_id(user_id: UUID, db: Session) -> models.User:
     return user
 
 
-def update_user_in_db(
-    user_id: UUID, 
-    update_data: schemas.UserUpdateRequestModel, 
+def _apply_user_update(
+    user_id: UUID,
+    update_data: schemas.UserUpdateRequestModel,
+    hashed_password: str | None,
     db: Session) -> models.User:
 
     user = db.query(models.User).filter(models.User.id == user_id).first()
@@ -72,16 +89,30 @@ def update_user_in_db(
             )
         user.email = update_data.email
 
-    if update_data.password:
-        user.hashed_password = get_password_hash(update_data.password)
+    if hashed_password:
+        user.hashed_password = hashed_password
 
     user.updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(user)
+    user_cache.invalidate_user(user_id)
 
     return user
 
 
+async def update_user_in_db(
+    user_id: UUID, 
+    update_data: schemas.UserUpdateRequestModel, 
+    db: Session) -> models.User:
+
+    # Hash before touching the database, so no transaction stays open while bcrypt runs
+    hashed_password = None
+    if update_data.password:
+        hashed_password = await get_password_hash_async(update_data.password)
+
+    return await run_in_threadpool(_apply_user_update, user_id, update_data, hashed_password, db)
+
+
 
 def delete_user_from_db(user_id: UUID, db: Session) -> None:
     user = db.query(models.User).filter(models.User.id == user_id).first()
@@ -96,6 +127,7 @@ def delete_user_from_db(user_id: UUID, db: Session) -> None:
         )
     db.delete(user)
     db.commit()
+    user_cache.invalidate_user(user_id)
 
 
 def get_all_users(db: Session) -> list[schemas.GetUserResponseModel]:
@@ -113,5 +145,6 @@ def change_user_role(user_id: UUID, is_admin: bool, db: Session) -> None:
 
     user.is_admin = is_admin
     db.commit()
+    user_cache.invalidate_user(user_id)
 
 
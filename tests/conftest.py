@@ -0,0 +1,111 @@
+import os
+import tempfile
+import uuid
+
+# Settings are read at import time, so they are fixed before the app is imported. The database is a
+# throwaway SQLite file rather than :memory: so concurrent tests get one connection per thread.
+_db_dir = tempfile.mkdtemp(prefix="app-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+# Outbox events are drained explicitly by the tests that cover them
+os.environ.setdefault("OUTBOX_DRAINER_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import database, models
+from app.api.auth_utlis import create_access_token
+from app.cache import LRUTTLCache
+from app.instrumentation import current_stats
+from app.main import app
+from app.services import product_cache, token_cache, user_cache
+from app.services.status_registry import registry as status_registry
+
+
+ORDER_STATUSES = ["pending", "processing", "completed", "canceled"]
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    models.Base.metadata.drop_all(bind=database.engine)
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        db.add_all([models.OrderStatus(name=name) for name in ORDER_STATUSES])
+        db.commit()
+        status_registry.load(db)
+    finally:
+        db.close()
+
+    user_cache.set_backend(LRUTTLCache(max_size=1000, ttl=60))
+    product_cache.set_backend(LRUTTLCache(max_size=1000, ttl=60))
+    token_cache.set_backend(LRUTTLCache(max_size=1000, ttl=0))
+    yield
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def make_user(db, is_admin: bool = False) -> models.User:
+    name = f"user-{uuid.uuid4().hex[:8]}"
+    user = models.User(username=name, email=f"{name}@example.com", hashed_password="not-used", is_admin=is_admin, is_active=True)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def auth_headers(user: models.User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+def make_product(db, stock: int = 10, price: float = 9.99, **fields) -> models.Product:
+    product = models.Product(name=fields.pop("name", f"product-{uuid.uuid4().hex[:8]}"), price=price, stock=stock, is_available=True, **fields)
+    db.add(product)
+    db.commit()
+    db.refresh(product)
+    return product
+
+
+class StatementCounter:
+    # Counts SQL statements sent through the sync engine while active. With requests_only, statements
+    # from background work (the outbox drainer) are ignored and only those of HTTP requests count.
+    def __init__(self, requests_only: bool = True):
+        self.requests_only = requests_only
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.requests_only and current_stats() is None:
+            return
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(database.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(database.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_statements():
+    return StatementCounter
@@ -0,0 +1,31 @@
+# Synthetic data for the benchmarks, written with core inserts so large volumes seed in seconds
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app import models
+
+WORDS = ["alpha", "bravo", "carbon", "delta", "ember", "falcon", "granite", "harbor", "iris", "juniper",
+         "kestrel", "lumen", "marble", "nova", "onyx", "pillar", "quartz", "raven", "sable", "tundra"]
+
+
+def generate_catalog(db, rows, sold_out_ratio=0.0, seed=0, batch_size=10000):
+    # Names are "<word> <word> <n>", prices 1-500, and `sold_out_ratio` of the products have no stock left
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    table = models.Product.__table__
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for i in range(offset, min(offset + batch_size, rows)):
+            sold_out = rng.random() < sold_out_ratio
+            batch.append({
+                "id": uuid.uuid4(),
+                "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                "price": rng.randint(100, 50000) / 100,
+                "stock": 0 if sold_out else rng.randint(1, 100),
+                "is_available": not sold_out,
+                "created_at": start + timedelta(seconds=i),
+                "version": 1,
+            })
+        db.execute(table.insert(), batch)
+    db.commit()
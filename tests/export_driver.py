@@ -0,0 +1,98 @@
+# Measures the peak RSS of one admin export in a fresh process, read from VmHWM in /proc/self/status.
+# ru_maxrss is not used: on Linux a child starts from its parent's high-water mark, so the pytest
+# process's size would hide the export.
+# `seed N` fills the database first, in its own process, so seeding does not count towards the peak.
+#
+#   DATABASE_URL=sqlite:///x.db python -m tests.export_driver seed 100000
+#   DATABASE_URL=sqlite:///x.db python -m tests.export_driver export products csv
+import asyncio
+import json
+import os
+import sys
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("OUTBOX_DRAINER_ENABLED", "false")
+
+from app import database, models
+from app.api.auth_utlis import create_access_token
+from app.main import app
+
+
+def _rss_kb(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def seed(rows):
+    from tests.datasets import generate_catalog
+
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        admin = models.User(username="exporter", email="exporter@example.com", hashed_password="not-used", is_admin=True, is_active=True)
+        db.add(admin)
+        db.commit()
+        generate_catalog(db, rows)
+    finally:
+        db.close()
+
+
+async def export(name, fmt):
+    # Drives the ASGI app directly and drops every body chunk as it arrives; the TestClient
+    # would collect the whole body in memory and hide what the endpoint itself holds
+    db = database.SessionLocal()
+    try:
+        admin_id = db.query(models.User.id).filter(models.User.username == "exporter").scalar()
+    finally:
+        db.close()
+    token = create_access_token({"sub": str(admin_id)}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": f"/api/v1/admin/export/{name}", "raw_path": f"/api/v1/admin/export/{name}".encode(),
+        "query_string": f"format={fmt}".encode(), "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"host", b"test"), (b"authorization", b"Bearer " + token)],
+    }
+    sent = {"status": None, "bytes": 0, "lines": 0}
+    done = asyncio.Event()
+
+    requested = False
+
+    async def receive():
+        # The request once, then a disconnect only after the whole body was sent
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            sent["bytes"] += len(message.get("body", b""))
+            sent["lines"] += message.get("body", b"").count(b"\n")
+            if not message.get("more_body", False):
+                done.set()
+
+    # Start the high-water mark from the current size, so the import of the app does not count
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+    baseline_kb = _rss_kb("VmRSS")
+    await app(scope, receive, send)
+    peak_kb = _rss_kb("VmHWM")
+    return {**sent, "baseline_rss_kb": baseline_kb, "peak_rss_kb": peak_kb, "growth_kb": peak_kb - baseline_kb}
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "seed":
+        seed(int(sys.argv[2]))
+    else:
+        json.dump(asyncio.run(export(sys.argv[2], sys.argv[3])), sys.stdout)
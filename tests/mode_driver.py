@@ -0,0 +1,85 @@
+# Runs the app in a fresh process, so DB_MODE and the database URLs (read at import time) can differ
+# from the test session's. Prints one JSON document with the results.
+#
+#   DB_MODE=async ASYNC_DATABASE_URL=sqlite+aiosqlite:///x.db DATABASE_URL=sqlite:///x.db python -m tests.mode_driver
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("OUTBOX_DRAINER_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import database, models
+from app.api.auth_utlis import create_access_token
+from app.instrumentation import current_stats
+from app.main import app
+
+THROUGHPUT_REQUESTS = int(os.getenv("MODE_THROUGHPUT_REQUESTS", "0"))
+THROUGHPUT_CONCURRENCY = int(os.getenv("MODE_THROUGHPUT_CONCURRENCY", "8"))
+
+
+def seed():
+    db = database.SessionLocal()
+    try:
+        db.add_all([models.OrderStatus(name=name) for name in ("pending", "processing", "completed", "canceled")])
+        user = models.User(username="driver", email="driver@example.com", hashed_password="not-used", is_admin=False, is_active=True)
+        products = [models.Product(name=f"driver-product-{i}", price=5, stock=1000, is_available=True) for i in range(20)]
+        db.add_all([user, *products])
+        db.commit()
+        return user.id, [product.id for product in products]
+    finally:
+        db.close()
+
+
+def main():
+    user_id, product_ids = seed()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    # Statements of HTTP requests that went through the sync engine
+    sync_statements = []
+    event.listen(database.engine, "before_cursor_execute", lambda *args: current_stats() is not None and sync_statements.append(args[2]))
+
+    result = {"db_mode": database.DB_MODE, "responses": {}}
+    with TestClient(app) as client:
+        created = client.post("/api/v1/orders/orders/", json={"products": [{"product_id": str(product_ids[0]), "quantity": 1}]}, headers=headers)
+        order_id = created.json().get("id")
+        checks = {
+            "create_order": created,
+            "get_order": client.get(f"/api/v1/orders/orders/{order_id}", headers=headers),
+            "user_orders": client.get(f"/api/v1/users/users/{user_id}/orders", headers=headers),
+            "get_user": client.get(f"/api/v1/users/users/{user_id}", headers=headers),
+            "get_product": client.get(f"/api/v1/products/{product_ids[1]}"),
+            "list_products": client.get("/api/v1/products"),
+        }
+        # A revalidated page must still hand out the cursor to the next one
+        first_page = client.get("/api/v1/products?page_size=5")
+        checks["list_products_not_modified"] = client.get("/api/v1/products?page_size=5", headers={"If-None-Match": first_page.headers.get("ETag", "")})
+        cursor = first_page.headers.get("X-Next-Cursor")
+        result["not_modified_cursor_kept"] = cursor is not None and checks["list_products_not_modified"].headers.get("X-Next-Cursor") == cursor
+        result["responses"] = {name: response.status_code for name, response in checks.items()}
+        result["sync_statements"] = len(sync_statements)
+
+        if THROUGHPUT_REQUESTS:
+            paths = [f"/api/v1/products/{product_ids[i % len(product_ids)]}" for i in range(THROUGHPUT_REQUESTS)]
+            paths = [path if i % 2 else f"/api/v1/users/users/{user_id}/orders" for i, path in enumerate(paths)]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=THROUGHPUT_CONCURRENCY) as pool:
+                statuses = list(pool.map(lambda path: client.get(path, headers=headers).status_code, paths))
+            elapsed = time.perf_counter() - started
+            result["throughput"] = {
+                "requests": len(statuses),
+                "errors": sum(1 for code in statuses if code != 200),
+                "requests_per_second": round(len(statuses) / elapsed, 1),
+            }
+
+    json.dump(result, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_app(tmp_path, db_mode: str, throughput_requests: int = 0) -> dict:
+    path = tmp_path / f"{db_mode}.db"
+    env = {
+        **os.environ,
+        "DB_MODE": db_mode,
+        "DATABASE_URL": f"sqlite:///{path}",
+        "MODE_THROUGHPUT_REQUESTS": str(throughput_requests),
+    }
+    if db_mode == "async":
+        env["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    else:
+        env.pop("ASYNC_DATABASE_URL", None)
+    result = subprocess.run([sys.executable, "-m", "tests.mode_driver"], env=env, cwd=ROOT, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+def test_async_mode_serves_its_routes_without_the_sync_pool(tmp_path):
+    result = run_app(tmp_path, "async")
+
+    assert result["db_mode"] == "async"
+    assert result["responses"] == {
+        "create_order": 201,
+        "get_order": 200,
+        "user_orders": 200,
+        "get_user": 200,
+        "get_product": 200,
+        "list_products": 200,
+        "list_products_not_modified": 304,
+    }
+    assert result["not_modified_cursor_kept"]
+    # Authentication and every route above go through the AsyncSession
+    assert result["sync_statements"] == 0
+
+
+# Same read mix against both stacks; the requests/sec are printed for comparison (pytest -s)
+# since they depend on the machine, and only correctness is asserted
+@pytest.mark.parametrize("db_mode", ["sync", "async"])
+def test_sync_vs_async_throughput(tmp_path, db_mode):
+    requests = int(os.getenv("BENCH_MODE_REQUESTS", "400"))
+    result = run_app(tmp_path, db_mode, throughput_requests=requests)
+
+    throughput = result["throughput"]
+    print(f"\n{db_mode}: {throughput['requests_per_second']} requests/s over {throughput['requests']} requests")
+    assert throughput["errors"] == 0
+    assert throughput["requests"] == requests
@@ -0,0 +1,66 @@
+import json
+import os
+import time
+
+from app import models
+from tests.conftest import auth_headers, make_product, make_user
+
+# Orders per path in the throughput benchmark
+BENCH_BULK_ORDERS = int(os.getenv("BENCH_BULK_ORDERS", "500"))
+BENCH_BULK_CHUNK_SIZE = int(os.getenv("BENCH_BULK_CHUNK_SIZE", "250"))
+
+
+def _ndjson_body(product_id, lines, piece_size=64 * 1024):
+    # Yielded in pieces so the upload is sent chunked and arrives across many receive() calls
+    body = b"".join(
+        json.dumps({"products": [{"product_id": str(product_id), "quantity": 1}]}).encode() + b"\n"
+        for _ in range(lines)
+    )
+    for start in range(0, len(body), piece_size):
+        yield body[start:start + piece_size]
+
+
+def test_bulk_upload_processes_every_line(client, db):
+    lines = 3000
+    admin = make_user(db, is_admin=True)
+    product = make_product(db, stock=lines)
+
+    response = client.post(
+        "/api/v1/orders/orders/bulk?chunk_size=500",
+        content=_ndjson_body(product.id, lines),
+        headers={**auth_headers(admin), "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(result["index"] for result in results) == list(range(lines))
+    assert all(result["status"] == "created" for result in results)
+    assert db.query(models.Order).count() == lines
+
+
+def test_bulk_throughput_versus_single_orders(client, db):
+    admin = make_user(db, is_admin=True)
+    headers = auth_headers(admin)
+    products = [make_product(db, stock=2 * BENCH_BULK_ORDERS) for _ in range(3)]
+    order = {"products": [{"product_id": str(p.id), "quantity": 1} for p in products]}
+    client.get(f"/api/v1/users/users/{admin.id}", headers=headers)
+
+    started = time.perf_counter()
+    for _ in range(BENCH_BULK_ORDERS):
+        assert client.post("/api/v1/orders/orders/", json=order, headers=headers).status_code == 201
+    single_rate = BENCH_BULK_ORDERS / (time.perf_counter() - started)
+
+    body = (json.dumps(order) + "\n").encode() * BENCH_BULK_ORDERS
+    started = time.perf_counter()
+    response = client.post(
+        f"/api/v1/orders/orders/bulk?chunk_size={BENCH_BULK_CHUNK_SIZE}",
+        content=body,
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    bulk_rate = BENCH_BULK_ORDERS / (time.perf_counter() - started)
+
+    print(f"\n{BENCH_BULK_ORDERS} three-line orders: POST /orders/ {single_rate:.0f} orders/s, bulk (chunk {BENCH_BULK_CHUNK_SIZE}) {bulk_rate:.0f} orders/s")
+    assert response.status_code == 200
+    assert all(json.loads(line)["status"] == "created" for line in response.text.splitlines())
+    assert db.query(models.Order).count() == 2 * BENCH_BULK_ORDERS
+    assert bulk_rate > single_rate
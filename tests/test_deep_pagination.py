@@ -0,0 +1,70 @@
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+from app.pagination import encode_cursor
+from tests.conftest import auth_headers, make_user
+
+# Catalog size for the deep-page benchmark; BENCH_DEEP_PAGE_ROWS=1000000 reproduces the production case
+DEEP_PAGE_ROWS = int(os.getenv("BENCH_DEEP_PAGE_ROWS", "100000"))
+DEEP_PAGE_SIZE = 50
+DEEP_PAGE_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+
+def _seed_catalog(db, rows):
+    # Core inserts in batches; the ORM would dominate the test time at this size
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    table = models.Product.__table__
+    last = []
+    for offset in range(0, rows, 10000):
+        batch = [
+            {"id": uuid.uuid4(), "name": f"deep-{i}", "price": 1.0, "stock": 5, "is_available": True,
+             "created_at": start + timedelta(seconds=i), "version": 1}
+            for i in range(offset, min(offset + 10000, rows))
+        ]
+        db.execute(table.insert(), batch)
+        last = batch
+    db.commit()
+    return last
+
+
+def _median_ms(client, url):
+    samples = []
+    for _ in range(DEEP_PAGE_ROUNDS):
+        started = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    return statistics.median(samples), response.json()
+
+
+@pytest.mark.parametrize("params", ["page_size=0", "page_size=-1", "page_size=101", "page=0", "page=-3"])
+def test_out_of_range_paging_parameters_are_rejected(client, params):
+    assert client.get(f"/api/v1/products?{params}").status_code == 422
+
+
+def test_user_orders_page_size_is_bounded(client, db):
+    user = make_user(db)
+    response = client.get(f"/api/v1/users/users/{user.id}/orders?page_size=0", headers=auth_headers(user))
+    assert response.status_code == 422
+
+
+def test_deep_page_by_cursor_matches_offset_and_is_faster(client, db):
+    tail = _seed_catalog(db, DEEP_PAGE_ROWS)
+    # The row just before the last page, as a client walking the cursors would have reached it
+    before_last_page = tail[-DEEP_PAGE_SIZE - 1]
+    cursor = encode_cursor(before_last_page["created_at"], before_last_page["id"])
+    last_page = DEEP_PAGE_ROWS // DEEP_PAGE_SIZE
+
+    offset_ms, by_offset = _median_ms(client, f"/api/v1/products?page={last_page}&page_size={DEEP_PAGE_SIZE}")
+    keyset_ms, by_cursor = _median_ms(client, f"/api/v1/products?cursor={cursor}&page_size={DEEP_PAGE_SIZE}")
+
+    print(f"\ndeep page of {DEEP_PAGE_ROWS} products: offset {offset_ms:.1f} ms, cursor {keyset_ms:.1f} ms")
+    assert [p["id"] for p in by_cursor] == [p["id"] for p in by_offset] == [str(row["id"]) for row in tail[-DEEP_PAGE_SIZE:]]
+    # OFFSET walks every earlier row; the cursor seeks straight to the page
+    assert keyset_ms < offset_ms
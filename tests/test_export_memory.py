@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Catalog sizes to export; BENCH_EXPORT_ROWS=10000,1000000 covers the full range
+BENCH_EXPORT_ROWS = [int(rows) for rows in os.getenv("BENCH_EXPORT_ROWS", "10000,100000").split(",")]
+# Allowed growth of the export's peak RSS between the smallest and the largest catalog
+EXPORT_RSS_SLACK_KB = int(os.getenv("EXPORT_RSS_SLACK_KB", str(16 * 1024)))
+
+
+def _driver(tmp_path, rows, *args):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / f'export-{rows}.db'}"}
+    env.pop("DB_MODE", None)
+    result = subprocess.run([sys.executable, "-m", "tests.export_driver", *args], env=env, cwd=ROOT, capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_export_peak_rss_stays_flat_as_rows_grow(tmp_path, fmt):
+    growth = {}
+    for rows in BENCH_EXPORT_ROWS:
+        _driver(tmp_path, rows, "seed", str(rows))
+        result = json.loads(_driver(tmp_path, rows, "export", "products", fmt))
+        assert result["status"] == 200
+        assert result["lines"] == rows + (1 if fmt == "csv" else 0)
+        growth[rows] = result["growth_kb"]
+
+    print(f"\n{fmt} product export, peak RSS growth: " + ", ".join(f"{rows} rows {kb / 1024:.1f} MB" for rows, kb in growth.items()))
+    assert growth[max(growth)] - growth[min(growth)] <= EXPORT_RSS_SLACK_KB
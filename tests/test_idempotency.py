@@ -0,0 +1,226 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+from app import database, models, schemas
+from app.api.routes import order as order_routes
+from app.services import idempotency_service, order_service
+from tests.conftest import auth_headers, make_product, make_user
+
+
+ENDPOINT = "POST /orders/"
+
+
+def _order_request(product_id):
+    return schemas.OrderCreateRequest(products=[{"product_id": product_id, "quantity": 1}])
+
+
+def _run_once(user_id, key, order, work=None):
+    session = database.SessionLocal()
+    try:
+        return idempotency_service.run_once(
+            session, user_id, key, ENDPOINT,
+            idempotency_service.request_hash(order.model_dump_json().encode()),
+            work or (lambda s, save: order_service.create_order_response(s, user_id, order, save)),
+            201,
+        )
+    finally:
+        session.close()
+
+
+def _age_lease(db, user_id, key):
+    db.query(models.IdempotencyKey).filter_by(user_id=user_id, key=key).update(
+        {models.IdempotencyKey.claimed_at: datetime.now(timezone.utc) - timedelta(seconds=2 * idempotency_service.IDEMPOTENCY_LEASE_SECONDS)}
+    )
+    db.commit()
+
+
+def test_overlapping_request_is_rejected_until_first_completes(db):
+    user = make_user(db)
+    product = make_product(db)
+    order = _order_request(product.id)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_work(session, save):
+        started.set()
+        finish.wait(5)
+        return order_service.create_order_response(session, user.id, order, save)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(_run_once, user.id, "key-1", order, slow_work)
+        assert started.wait(5)
+
+        with pytest.raises(HTTPException) as overlap:
+            _run_once(user.id, "key-1", order)
+        assert overlap.value.status_code == 409
+
+        finish.set()
+        original = first.result()
+
+    retry = _run_once(user.id, "key-1", order)
+    assert retry.body == original.body
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert db.query(models.Order).count() == 1
+
+
+def test_simultaneous_requests_with_same_key_create_one_order(client, db):
+    user = make_user(db)
+    product = make_product(db)
+    headers = {**auth_headers(user), "Idempotency-Key": "same-key"}
+    payload = {"products": [{"product_id": str(product.id), "quantity": 1}]}
+    barrier = threading.Barrier(8)
+
+    def post(_):
+        barrier.wait()
+        return client.post("/api/v1/orders/orders/", json=payload, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(post, range(8)))
+
+    assert db.query(models.Order).count() == 1
+    created = [r for r in responses if r.status_code == 201]
+    assert len(created) >= 1
+    # Everyone else either saw the key in progress or got the first response replayed
+    assert all(r.status_code == 409 for r in responses if r.status_code != 201)
+    assert len({r.json()["id"] for r in created}) == 1
+
+
+def _claim(db, user_id, key, endpoint=ENDPOINT, body_hash="hash"):
+    return idempotency_service.claim_key(db, user_id, key, endpoint, body_hash, idempotency_service.new_claim_token())
+
+
+def test_stale_in_progress_key_is_reclaimed(db):
+    user = make_user(db)
+    assert _claim(db, user.id, "crashed") is None
+
+    with pytest.raises(HTTPException) as live:
+        _claim(db, user.id, "crashed")
+    assert live.value.status_code == 409
+
+    _age_lease(db, user.id, "crashed")
+    assert _claim(db, user.id, "crashed") is None
+    # The new owner holds a fresh lease
+    with pytest.raises(HTTPException):
+        _claim(db, user.id, "crashed")
+
+
+def test_failure_after_the_order_committed_keeps_the_key(db):
+    user = make_user(db)
+    product = make_product(db)
+    order = _order_request(product.id)
+
+    def work_then_fail(session, save):
+        order_service.create_order_response(session, user.id, order, save)
+        raise RuntimeError("failed after commit")
+
+    first = _run_once(user.id, "key-1", order, work_then_fail)
+    retry = _run_once(user.id, "key-1", order)
+
+    # The stored response is answered instead of releasing the key and creating the order again
+    assert first.status_code == retry.status_code == 201
+    assert first.body == retry.body
+    assert db.query(models.Order).count() == 1
+
+
+def test_request_that_lost_its_lease_does_not_commit(db):
+    user = make_user(db)
+    product = make_product(db)
+    order = _order_request(product.id)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_work(session, save):
+        started.set()
+        finish.wait(5)
+        return order_service.create_order_response(session, user.id, order, save)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(_run_once, user.id, "key-1", order, slow_work)
+        assert started.wait(5)
+        # The first request outlives its lease and a retry takes the key over
+        _age_lease(db, user.id, "key-1")
+        assert _claim(db, user.id, "key-1", body_hash=idempotency_service.request_hash(order.model_dump_json().encode())) is None
+        finish.set()
+        with pytest.raises(HTTPException) as lost:
+            first.result()
+
+    assert lost.value.status_code == 409
+    assert db.query(models.Order).count() == 0
+
+
+def test_stale_key_with_progress_is_marked_partial(db):
+    user = make_user(db)
+    token = idempotency_service.new_claim_token()
+    idempotency_service.claim_key(db, user.id, "bulk", "POST /orders/bulk", None, token)
+    idempotency_service.stage_progress(db, user.id, "bulk", token, '{"index": 0, "status": "created"}\n')
+    db.commit()
+    _age_lease(db, user.id, "bulk")
+
+    with pytest.raises(HTTPException) as rejected:
+        _claim(db, user.id, "bulk", "POST /orders/bulk", None)
+
+    assert rejected.value.status_code == 409
+    assert rejected.value.detail["results"] == [{"index": 0, "status": "created"}]
+    db.expire_all()
+    assert db.query(models.IdempotencyKey).filter_by(user_id=user.id, key="bulk").one().state == idempotency_service.PARTIAL
+
+
+class _DisconnectingRequest:
+    # Delivers the given body, then behaves like a client that went away mid-upload
+    def __init__(self, body):
+        self.body = body
+
+    async def stream(self):
+        yield self.body
+        raise ClientDisconnect()
+
+
+def test_interrupted_bulk_upload_is_partial_and_retry_is_rejected(db):
+    admin = make_user(db, is_admin=True)
+    product = make_product(db, stock=10)
+    line = json.dumps({"products": [{"product_id": str(product.id), "quantity": 1}]}).encode() + b"\n"
+    token = idempotency_service.new_claim_token()
+    assert order_routes._claim_bulk_key(admin.id, "bulk-key", token) is None
+
+    async def consume():
+        produced = []
+        with pytest.raises(ClientDisconnect):
+            async for piece in order_routes._idempotent_bulk_results(_DisconnectingRequest(line * 3), admin.id, 2, "bulk-key", token):
+                produced.append(piece)
+        return produced
+
+    produced = asyncio.run(consume())
+
+    # The first chunk of two orders was committed before the upload broke off
+    assert len(b"".join(produced).splitlines()) == 2
+    assert db.query(models.Order).count() == 2
+    with pytest.raises(HTTPException) as retry:
+        order_routes._claim_bulk_key(admin.id, "bulk-key", idempotency_service.new_claim_token())
+    assert retry.value.status_code == 409
+    assert [result["index"] for result in retry.value.detail["results"]] == [0, 1]
+
+
+def test_bulk_progress_is_recorded_once_per_chunk(client, db, count_statements):
+    admin = make_user(db, is_admin=True)
+    product = make_product(db, stock=10)
+    line = json.dumps({"products": [{"product_id": str(product.id), "quantity": 1}]}).encode() + b"\n"
+
+    with count_statements() as counter:
+        response = client.post(
+            "/api/v1/orders/orders/bulk?chunk_size=2",
+            content=line * 6,
+            headers={**auth_headers(admin), "Content-Type": "application/x-ndjson", "Idempotency-Key": "bulk-key"},
+        )
+
+    assert response.status_code == 200
+    key_updates = [s for s in counter.statements if s.startswith("UPDATE idempotency_keys")]
+    # One progress update inside each of the three chunk transactions, then the completion
+    assert len(key_updates) == 4
+    record = db.query(models.IdempotencyKey).filter_by(user_id=admin.id, key="bulk-key").one()
+    assert record.state == idempotency_service.COMPLETED
+    assert record.response_body == response.text
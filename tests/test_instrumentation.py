@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import database
+from app.instrumentation import metrics
+from app.query_budget import budget as query_budget
+from tests.conftest import auth_headers, make_product, make_user
+
+
+def test_streaming_response_is_measured_until_the_body_is_sent(client, db, count_statements):
+    admin = make_user(db, is_admin=True)
+    for _ in range(3):
+        make_product(db)
+    key = ("GET", "/api/v1/admin/export/products")
+    before = metrics.queries.get(key, 0)
+
+    with count_statements() as counter:
+        response = client.get("/api/v1/admin/export/products?format=ndjson", headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
+    # The export query runs while the body streams, after the endpoint has returned
+    assert metrics.queries[key] - before == counter.count
+    assert any("FROM products" in statement for statement in counter.statements)
+    assert query_budget.observed["GET /api/v1/admin/export/products"]["statements"] >= counter.count
+
+
+def test_failed_statement_does_not_leak_its_start_time():
+    with database.engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("SELECT * FROM no_such_table")
+        assert conn.info.get("query_started") == []
+
+
+def test_server_timing_header(client, db, monkeypatch):
+    product = make_product(db)
+    monkeypatch.setattr("app.instrumentation.SERVER_TIMING", True)
+
+    response = client.get(f"/api/v1/products/{product.id}")
+
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_every_metric_family_is_declared_once_before_its_samples(client, db):
+    client.get(f"/api/v1/products/{make_product(db).id}")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    declared, seen = {}, []
+    for line in response.text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, family, kind = line.split()
+            assert family not in declared
+            declared[family] = kind
+            seen.append(family)
+        elif line and not line.startswith("#"):
+            family = line.split("{")[0].split()[0]
+            if declared.get(seen[-1]) == "histogram":
+                family = family.rsplit("_", 1)[0]
+            # Samples follow their own family's TYPE line, without interleaving
+            assert family == seen[-1], line
+    assert declared["db_pool_checkout_timeouts_total"] == "counter"
+    assert any(line.startswith("# HELP db_pool_checkout_timeouts_total ") for line in response.text.splitlines())
@@ -0,0 +1,58 @@
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api.auth_utlis import get_password_hash
+from tests.conftest import make_product, make_user
+
+# Volume of the flood; raise it for a longer measurement
+FLOOD_LOGINS = int(os.getenv("BENCH_LOGIN_FLOOD", "24"))
+FLOOD_CONCURRENCY = int(os.getenv("BENCH_LOGIN_FLOOD_CONCURRENCY", "8"))
+PROBES = int(os.getenv("BENCH_LOGIN_FLOOD_PROBES", "100"))
+
+
+def _p99(samples):
+    return statistics.quantiles(samples, n=100)[98]
+
+
+def _probe(client, path, stop=None):
+    samples = []
+    while len(samples) < PROBES or (stop is not None and not stop.is_set()):
+        started = time.perf_counter()
+        assert client.get(path).status_code == 200
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def test_cheap_requests_stay_fast_during_a_login_flood(client, db):
+    user = make_user(db)
+    user.hashed_password = get_password_hash("FloodPass1!")
+    db.commit()
+    path = f"/api/v1/products/{make_product(db).id}"
+
+    started = time.perf_counter()
+    get_password_hash("FloodPass1!")
+    hash_seconds = time.perf_counter() - started
+
+    quiet = _probe(client, path)
+
+    def login(_):
+        return client.post("/api/v1/login/login", data={"username": user.username, "password": "FloodPass1!"}).status_code
+
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=FLOOD_CONCURRENCY + 1) as pool:
+        probing = pool.submit(_probe, client, path, stop)
+        statuses = list(pool.map(login, range(FLOOD_LOGINS)))
+        stop.set()
+        flooded = probing.result()
+
+    print(
+        f"\nlogin flood: bcrypt {hash_seconds * 1000:.1f} ms, "
+        f"probe p99 quiet {_p99(quiet) * 1000:.1f} ms, during {FLOOD_LOGINS} logins {_p99(flooded) * 1000:.1f} ms"
+    )
+    # Logins either succeed or are shed by the password pool's admission control
+    assert set(statuses) <= {200, 503} and 200 in statuses
+    # With bcrypt on the event loop every probe would queue behind whole hashes
+    assert _p99(flooded) < hash_seconds * 2
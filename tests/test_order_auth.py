@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from tests.conftest import auth_headers, make_product, make_user
+
+
+def test_inactive_user_cannot_place_orders(client, db):
+    user = make_user(db)
+    user.is_active = False
+    db.commit()
+    product = make_product(db)
+
+    response = client.post(
+        "/api/v1/orders/orders/",
+        json={"products": [{"product_id": str(product.id), "quantity": 1}]},
+        headers=auth_headers(user),
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_async_mode_without_async_url_fails_at_startup():
+    env = {**os.environ, "DB_MODE": "async"}
+    env.pop("ASYNC_DATABASE_URL", None)
+    result = subprocess.run([sys.executable, "-c", "import app.database"], env=env, capture_output=True, text=True)
+
+    assert result.returncode != 0
+    assert "DB_MODE=async requires ASYNC_DATABASE_URL" in result.stderr
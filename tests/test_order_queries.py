@@ -0,0 +1,94 @@
+import os
+import statistics
+import time
+
+from app import models, schemas
+from app.services import order_service
+from tests.conftest import auth_headers, make_product, make_user
+
+BENCH_CART_SIZES = [int(size) for size in os.getenv("BENCH_CART_SIZES", "1,10,50,100").split(",")]
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+
+def _place_orders(db, user, count, lines_per_order=3):
+    products = [make_product(db, stock=1000) for _ in range(lines_per_order)]
+    request = schemas.OrderCreateRequest(products=[{"product_id": p.id, "quantity": 1} for p in products])
+    return [order_service.create_order(db, user.id, request) for _ in range(count)]
+
+
+def _list_orders(client, user, count_statements, page_size):
+    # One warm-up request so the principal cache is filled and every measured request does the same work
+    client.get(f"/api/v1/users/users/{user.id}/orders?page_size=1", headers=auth_headers(user))
+    with count_statements() as counter:
+        response = client.get(f"/api/v1/users/users/{user.id}/orders?page_size={page_size}", headers=auth_headers(user))
+    assert response.status_code == 200
+    assert len(response.json()) == page_size
+    return counter.count
+
+
+def test_order_list_statement_count_does_not_grow_with_page_size(client, db, count_statements):
+    user = make_user(db)
+    _place_orders(db, user, 12)
+
+    small_page = _list_orders(client, user, count_statements, page_size=2)
+    large_page = _list_orders(client, user, count_statements, page_size=12)
+
+    assert small_page == large_page
+    # Orders with their joined status, plus one SELECT ... IN for every line item of the page
+    assert large_page == 2
+
+
+def test_order_detail_loads_in_two_statements(client, db, count_statements):
+    user = make_user(db)
+    order = _place_orders(db, user, 1, lines_per_order=5)[0]
+    client.get(f"/api/v1/orders/orders/{order.id}", headers=auth_headers(user))
+
+    with count_statements() as counter:
+        response = client.get(f"/api/v1/orders/orders/{order.id}", headers=auth_headers(user))
+
+    assert response.status_code == 200
+    assert len(response.json()["products"]) == 5
+    assert counter.count == 2, counter.statements
+
+
+def _cart(client, db, cart_size):
+    user = make_user(db)
+    products = [make_product(db, stock=100) for _ in range(cart_size)]
+    payload = {"products": [{"product_id": str(p.id), "quantity": 1} for p in products]}
+    # Warm-up so the principal cache is filled before the measured requests
+    client.get(f"/api/v1/users/users/{user.id}", headers=auth_headers(user))
+    return user, products, payload
+
+
+def _create_order_statements(client, db, count_statements, cart_size):
+    user, products, payload = _cart(client, db, cart_size)
+
+    with count_statements() as counter:
+        response = client.post("/api/v1/orders/orders/", json=payload, headers=auth_headers(user))
+    assert response.status_code == 201
+    assert response.json()["total_price"] == round(9.99 * cart_size, 2)
+    db.expire_all()
+    assert {db.get(models.Product, p.id).stock for p in products} == {99}
+    return counter.statements
+
+
+def test_create_order_statement_count_does_not_grow_with_cart_size(client, db, count_statements):
+    counts = {size: len(_create_order_statements(client, db, count_statements, size)) for size in (2, 5, 25, 50)}
+    assert len(set(counts.values())) == 1, counts
+    # A single product needs no lock-ordering SELECT before its stock UPDATE
+    assert len(_create_order_statements(client, db, count_statements, 1)) == counts[2] - 1
+
+
+def test_create_order_latency_by_cart_size(client, db):
+    report = []
+    for cart_size in BENCH_CART_SIZES:
+        user, _, payload = _cart(client, db, cart_size)
+        samples = []
+        for _ in range(BENCH_ROUNDS):
+            started = time.perf_counter()
+            response = client.post("/api/v1/orders/orders/", json=payload, headers=auth_headers(user))
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 201
+        report.append(f"{cart_size} lines {statistics.median(samples):.1f} ms")
+
+    print("\ncreate_order median latency: " + ", ".join(report))
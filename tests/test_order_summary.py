@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app import database, models, schemas
+from app.services import order_events, order_service, order_summary_service
+from tests.conftest import auth_headers, make_product, make_user
+
+
+def _order(db, user, product, quantity=1):
+    return order_service.create_order(
+        db, user.id, schemas.OrderCreateRequest(products=[{"product_id": product.id, "quantity": quantity}])
+    )
+
+
+def test_summary_endpoint_follows_creates_and_status_changes(client, db):
+    user = make_user(db)
+    admin = make_user(db, is_admin=True)
+    product = make_product(db, stock=10, price=5)
+    first = _order(db, user, product, 2)
+    _order(db, user, product, 1)
+
+    response = client.put(f"/api/v1/orders/orders/{first.id}/status", json={"status": "processing"}, headers=auth_headers(admin))
+    assert response.status_code == 200
+
+    summary = client.get(f"/api/v1/users/users/{user.id}/orders/summary", headers=auth_headers(user))
+
+    assert summary.status_code == 200
+    body = summary.json()
+    assert body["order_count"] == 2
+    assert Decimal(str(body["total_spent"])) == Decimal("15")
+    assert {item["status"]: item["order_count"] for item in body["by_status"]} == {"pending": 1, "processing": 1}
+    assert order_summary_service.check_summary(db) == []
+
+
+def test_summary_of_another_user_is_forbidden(client, db):
+    user, other = make_user(db), make_user(db)
+
+    response = client.get(f"/api/v1/users/users/{user.id}/orders/summary", headers=auth_headers(other))
+
+    assert response.status_code == 403
+
+
+def test_unchanged_status_writes_nothing(db):
+    user = make_user(db)
+    order = _order(db, user, make_product(db))
+    version = order.version
+
+    order_service.update_order_status(order.id, "pending", db)
+
+    db.expire_all()
+    assert db.get(models.Order, order.id).version == version
+    assert db.query(models.OutboxEvent).filter_by(event_type=order_events.ORDER_STATUS_CHANGED).count() == 0
+    assert order_summary_service.check_summary(db) == []
+
+
+def test_status_change_based_on_a_stale_read_is_rejected(db):
+    user = make_user(db)
+    order = _order(db, user, make_product(db))
+    stale = database.SessionLocal()
+    try:
+        # Both requests read the order while it is pending
+        stale_order = order_service.get_order_by_id(order.id, stale)
+        order_service.update_order_status(order.id, "processing", db)
+
+        with pytest.raises(HTTPException) as conflict:
+            order_service.update_order_status(stale_order.id, "completed", stale)
+    finally:
+        stale.close()
+
+    assert conflict.value.status_code == 409
+    db.expire_all()
+    assert db.get(models.Order, order.id).version == order.version
+    assert order_summary_service.check_summary(db) == []
+
+
+def test_concurrent_cancel_and_status_change_move_the_order_once(db):
+    user = make_user(db)
+    order = _order(db, user, make_product(db))
+    stale = database.SessionLocal()
+    try:
+        # Both requests see the order as pending
+        stale_order = order_service.get_order_by_id(order.id, stale)
+        order_service.update_order_status(order.id, "processing", db)
+
+        with pytest.raises(HTTPException) as conflict:
+            order_service.cancel_order(stale_order.id, stale)
+    finally:
+        stale.close()
+
+    assert conflict.value.status_code == 409
+    assert order_summary_service.check_summary(db) == []
+
+
+def test_check_summary_reports_drift_and_rebuild_repairs_it(db):
+    user = make_user(db)
+    _order(db, user, make_product(db, price=4))
+    assert order_summary_service.check_summary(db) == []
+
+    db.query(models.UserOrderSummary).update({models.UserOrderSummary.order_count: 5})
+    db.commit()
+
+    problems = order_summary_service.check_summary(db)
+    assert len(problems) == 1
+    assert problems[0]["user_id"] == str(user.id)
+    assert problems[0]["expected"] == (1, Decimal("4.00"))
+    assert problems[0]["actual"][0] == 5
+
+    order_summary_service.rebuild_summary(db)
+    assert order_summary_service.check_summary(db) == []
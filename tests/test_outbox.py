@@ -0,0 +1,42 @@
+import json
+
+from app import models, schemas
+from app.services import order_events, order_service, outbox
+from tests.conftest import make_product, make_user
+
+
+def _drain(db):
+    for event_id in outbox.claim_batch(db):
+        outbox.process_event(event_id)
+
+
+def test_order_events_are_written_with_the_order_and_processed(db):
+    user = make_user(db)
+    product = make_product(db, stock=1)
+    order = order_service.create_order(
+        db, user.id, schemas.OrderCreateRequest(products=[{"product_id": product.id, "quantity": 1}])
+    )
+    order_service.update_order_status(order.id, "processing", db)
+
+    events = db.query(models.OutboxEvent).order_by(models.OutboxEvent.created_at).all()
+    assert [event.event_type for event in events] == [order_events.ORDER_CREATED, order_events.ORDER_STATUS_CHANGED]
+    assert json.loads(events[0].payload)["product_ids"] == [str(product.id)]
+
+    _drain(db)
+
+    db.expire_all()
+    events = db.query(models.OutboxEvent).all()
+    assert all(event.processed_at is not None and event.attempts == 0 for event in events)
+
+
+def test_failed_event_is_backed_off_and_not_reclaimed_immediately(db):
+    outbox.add_event(db, "test.failing", {})
+    db.commit()
+    event_id = outbox.claim_batch(db)[0]
+
+    outbox.record_failure(event_id, RuntimeError("boom"))
+
+    db.expire_all()
+    event = db.get(models.OutboxEvent, event_id)
+    assert event.attempts == 1 and "boom" in event.last_error
+    assert outbox.claim_batch(db) == []
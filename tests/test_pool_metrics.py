@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app import pool_metrics
+from app.pool_metrics import InstrumentedQueuePool, PoolMetrics, instrument_pool
+from tests.conftest import auth_headers, make_user
+
+POOL_TIMEOUT = 0.05
+
+
+@pytest.fixture
+def pool_engine(tmp_path, monkeypatch):
+    # A sized pool like the one used against PostgreSQL; the test database runs on SQLite's own pool
+    monkeypatch.setattr(pool_metrics, "_registry", dict(pool_metrics._registry))
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=POOL_TIMEOUT,
+    )
+    instrument_pool("test", engine)
+    yield engine
+    engine.dispose()
+
+
+def _metrics(name="test"):
+    return pool_metrics.pool_status()[name]
+
+
+def test_wait_histogram_is_cumulative():
+    metrics = PoolMetrics()
+    for seconds in (0.0005, 0.003, 0.003, 20):
+        metrics.observe_wait(seconds)
+
+    wait = metrics.snapshot()["checkout_wait_seconds"]
+
+    assert (wait["buckets"]["0.001"], wait["buckets"]["0.005"], wait["buckets"]["10.0"], wait["buckets"]["+Inf"]) == (1, 3, 3, 4)
+    assert wait["count"] == 4
+    assert wait["sum"] == pytest.approx(20.0065)
+
+
+def test_checkouts_checkins_and_waits_are_counted(pool_engine):
+    for _ in range(3):
+        with pool_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert _metrics()["checked_out"] == 1
+
+    stats = _metrics()
+    assert (stats["connects"], stats["checkouts"], stats["checkins"]) == (1, 3, 3)
+    assert (stats["checked_out"], stats["idle"], stats["size"]) == (0, 1, 1)
+    assert stats["checkout_wait_seconds"]["count"] == 3
+    assert stats["checkout_timeouts"] == 0
+
+
+def test_exhausted_pool_counts_a_timeout_and_its_wait(pool_engine):
+    with pool_engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            pool_engine.connect()
+
+    stats = _metrics()
+    assert stats["checkout_timeouts"] == 1
+    wait = stats["checkout_wait_seconds"]
+    assert wait["count"] == 2
+    assert wait["sum"] >= POOL_TIMEOUT
+    # The timed out checkout waited at least the pool timeout, so it is not in the smallest buckets
+    assert wait["buckets"]["0.01"] == 1
+
+
+def test_invalidations_and_dispose_keep_counting(pool_engine):
+    with pool_engine.connect() as conn:
+        conn.invalidate()
+    pool_engine.dispose()
+    with pool_engine.connect():
+        pass
+
+    stats = _metrics()
+    assert stats["invalidations"] == 1
+    # A fresh pool after dispose() reports into the same counters
+    assert (stats["connects"], stats["checkouts"]) == (2, 2)
+
+
+def test_db_pool_route(client, db, pool_engine):
+    with pool_engine.connect():
+        response = client.get("/api/v1/admin/db-pool", headers=auth_headers(make_user(db, is_admin=True)))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["test"]["checked_out"] == 1
+    assert body["test"]["checkouts"] == 1
+    # The application's own engine has served the request's queries
+    assert body["sync"]["checkouts"] > 0
+    assert body["sync"]["checkouts"] >= body["sync"]["checkins"]
+    assert client.get("/api/v1/admin/db-pool", headers=auth_headers(make_user(db))).status_code == 403
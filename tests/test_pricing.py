@@ -0,0 +1,85 @@
+import os
+import random
+import time
+import uuid
+from decimal import ROUND_HALF_UP, Decimal
+from types import SimpleNamespace
+
+from app.services import pricing
+
+# Order lines priced per benchmark round, spread over orders of 1-10 lines
+BENCH_PRICING_LINES = int(os.getenv("BENCH_PRICING_LINES", "100000"))
+BENCH_PRICING_PRODUCTS = int(os.getenv("BENCH_PRICING_PRODUCTS", "5000"))
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+
+def _catalog(count, seed=0):
+    rng = random.Random(seed)
+    return {uuid.uuid4(): SimpleNamespace(price=rng.randint(1, 50000) / 100) for _ in range(count)}
+
+
+def _orders(product_ids, lines, seed=0):
+    rng = random.Random(seed)
+    orders, remaining = [], lines
+    while remaining:
+        size = min(rng.randint(1, 10), remaining)
+        orders.append({product_id: rng.randint(1, 20) for product_id in rng.sample(product_ids, size)})
+        remaining -= size
+    return orders
+
+
+def _price_one_by_one(orders, products_by_id):
+    # Line by line, converting each float price where it is used
+    return [
+        sum((pricing.to_money(products_by_id[product_id].price) * quantity for product_id, quantity in lines.items()), Decimal("0"))
+        .quantize(pricing.CENT, rounding=ROUND_HALF_UP)
+        for lines in orders
+    ]
+
+
+def _best_ms(fn):
+    best = None
+    for _ in range(BENCH_ROUNDS):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def test_float_prices_become_exact_cents():
+    assert pricing.to_money(19.99) == Decimal("19.99")
+    assert pricing.to_money(0.1 + 0.2) == Decimal("0.30")
+    assert pricing.to_money(2.675) == Decimal("2.68")
+
+
+def test_batch_matches_single_order_pricing():
+    products_by_id = _catalog(50)
+    orders = _orders(list(products_by_id), 300)
+    unit_prices = pricing.unit_prices_for(products_by_id)
+
+    per_order_lines, totals = pricing.price_orders(orders, unit_prices)
+
+    assert totals == [pricing.price_order(lines, unit_prices) for lines in orders]
+    assert totals == _price_one_by_one(orders, products_by_id)
+    assert [len(lines) for lines in per_order_lines] == [len(lines) for lines in orders]
+    assert per_order_lines[0] == [unit_prices[product_id] * quantity for product_id, quantity in orders[0].items()]
+
+
+def test_pricing_benchmark():
+    products_by_id = _catalog(BENCH_PRICING_PRODUCTS)
+    orders = _orders(list(products_by_id), BENCH_PRICING_LINES)
+
+    one_by_one_ms, expected = _best_ms(lambda: _price_one_by_one(orders, products_by_id))
+    prices_ms, unit_prices = _best_ms(lambda: pricing.unit_prices_for(products_by_id))
+    per_order_ms, per_order = _best_ms(lambda: [pricing.price_order(lines, unit_prices) for lines in orders])
+    batch_ms, (_, batch) = _best_ms(lambda: pricing.price_orders(orders, unit_prices))
+
+    print(
+        f"\n{BENCH_PRICING_LINES} lines in {len(orders)} orders, best of {BENCH_ROUNDS}: "
+        f"line by line {one_by_one_ms:.1f} ms, unit_prices_for {prices_ms:.1f} ms, "
+        f"price_order per order {per_order_ms:.1f} ms, price_orders batch {batch_ms:.1f} ms "
+        f"({batch_ms / BENCH_PRICING_LINES * 1e6:.0f} ns/line)"
+    )
+    assert batch == per_order == expected
+    assert prices_ms + batch_ms < one_by_one_ms
@@ -0,0 +1,117 @@
+import os
+import statistics
+import time
+
+from app import models
+from tests.conftest import auth_headers, make_product, make_user
+from tests.datasets import generate_catalog
+
+# Catalog for the sold-out benchmark; 90% of it has no stock left
+BENCH_SOLD_OUT_PRODUCTS = int(os.getenv("BENCH_SOLD_OUT_PRODUCTS", "50000"))
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+
+def _in_stock_ids(client):
+    response = client.get("/api/v1/products?in_stock=true&page_size=100")
+    return [] if response.status_code == 404 else [p["id"] for p in response.json()]
+
+
+def test_selling_the_last_unit_and_restocking_flip_availability(client, db):
+    user, admin = make_user(db), make_user(db, is_admin=True)
+    product = make_product(db, stock=2)
+
+    ordered = client.post(
+        "/api/v1/orders/orders/",
+        json={"products": [{"product_id": str(product.id), "quantity": 2}]},
+        headers=auth_headers(user),
+    )
+    assert ordered.status_code == 201
+
+    sold_out = client.get(f"/api/v1/products/{product.id}").json()
+    assert (sold_out["stock"], sold_out["is_available"]) == (0, False)
+    assert str(product.id) not in _in_stock_ids(client)
+
+    restocked = client.put(f"/api/v1/products/{product.id}", json={"stock": 5}, headers=auth_headers(admin))
+    assert restocked.status_code == 200
+    assert (restocked.json()["stock"], restocked.json()["is_available"]) == (5, True)
+    assert client.get(f"/api/v1/products/{product.id}").json()["is_available"] is True
+    assert str(product.id) in _in_stock_ids(client)
+
+
+def test_restock_keeps_a_product_that_was_taken_off_sale_unavailable(client, db):
+    admin = make_user(db, is_admin=True)
+    product = make_product(db, stock=3)
+
+    client.put(f"/api/v1/products/{product.id}", json={"is_available": False}, headers=auth_headers(admin))
+    response = client.put(f"/api/v1/products/{product.id}", json={"stock": 10}, headers=auth_headers(admin))
+
+    assert response.json()["is_available"] is False
+
+
+def test_setting_stock_to_zero_takes_the_product_off_sale(client, db):
+    admin = make_user(db, is_admin=True)
+    product = make_product(db, stock=3)
+
+    response = client.put(f"/api/v1/products/{product.id}", json={"stock": 0}, headers=auth_headers(admin))
+
+    assert response.json()["is_available"] is False
+
+
+def test_low_stock_report(client, db):
+    admin = make_user(db, is_admin=True)
+    low = make_product(db, stock=2)
+    lowest = make_product(db, stock=1)
+    make_product(db, stock=50)
+    make_product(db, stock=0)
+    disabled = make_product(db, stock=1)
+    disabled.is_available = False
+    db.commit()
+
+    response = client.get("/api/v1/products/low-stock?threshold=5", headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    # Sellable products only, lowest stock first
+    assert [p["id"] for p in response.json()] == [str(lowest.id), str(low.id)]
+    limited = client.get("/api/v1/products/low-stock?threshold=5&limit=1", headers=auth_headers(admin))
+    assert [p["id"] for p in limited.json()] == [str(lowest.id)]
+
+
+def test_low_stock_report_is_for_admins(client, db):
+    member = make_user(db)
+
+    assert client.get("/api/v1/products/low-stock", headers=auth_headers(member)).status_code == 403
+    assert client.get("/api/v1/products/low-stock?threshold=0", headers=auth_headers(make_user(db, is_admin=True))).status_code == 422
+
+
+def _median_ms(client, url, headers=None):
+    samples = []
+    for _ in range(BENCH_ROUNDS):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    return statistics.median(samples), response.json()
+
+
+def test_mostly_sold_out_catalog_benchmark(client, db):
+    generate_catalog(db, BENCH_SOLD_OUT_PRODUCTS, sold_out_ratio=0.9)
+    admin_headers = auth_headers(make_user(db, is_admin=True))
+    deep_page = BENCH_SOLD_OUT_PRODUCTS // 10 // 50
+
+    timings = {
+        "all, first page": _median_ms(client, "/api/v1/products?page_size=50"),
+        "in stock, first page": _median_ms(client, "/api/v1/products?in_stock=true&page_size=50"),
+        "in stock, last page": _median_ms(client, f"/api/v1/products?in_stock=true&page_size=50&page={deep_page}"),
+        "search in stock by price": _median_ms(client, "/api/v1/products/search?in_stock=true&sort_by=price&page_size=50"),
+        "low stock": _median_ms(client, "/api/v1/products/low-stock?threshold=5", admin_headers),
+    }
+
+    print(
+        f"\n{BENCH_SOLD_OUT_PRODUCTS} products, 90% sold out (median): "
+        + ", ".join(f"{label} {ms:.1f} ms" for label, (ms, _) in timings.items())
+    )
+    sellable = db.query(models.Product).filter(models.Product.is_available.is_(True), models.Product.stock > 0).count()
+    assert 0 < sellable < BENCH_SOLD_OUT_PRODUCTS * 0.2
+    for label, (_, body) in timings.items():
+        if label != "all, first page":
+            assert body and all(p["is_available"] and p["stock"] > 0 for p in body), label
@@ -0,0 +1,83 @@
+import asyncio
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import database, models
+from app.services import async_products, product_cache, products, user_cache
+from tests.conftest import make_product, make_user
+
+
+def test_async_lookup_reads_the_database_only_on_a_miss(db):
+    product = make_product(db)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database.engine.url.database}")
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async def lookup_twice():
+        async with AsyncSession(async_engine) as session:
+            first = await product_cache.get_product_async(product.id, session)
+            second = await product_cache.get_product_async(product.id, session)
+        await async_engine.dispose()
+        return first, second
+
+    first, second = asyncio.run(lookup_twice())
+
+    assert first == second
+    assert first["id"] == str(product.id)
+    assert len(statements) == 1
+    # The sync and async routes share the cache entries
+    assert product_cache.get_product(product.id, db) == first
+
+
+def test_load_racing_an_invalidation_is_not_cached(db, monkeypatch):
+    product = make_product(db, price=1)
+    load = products.get_product_by_id
+
+    def load_then_writer_commits(product_id, session):
+        # The row was read before the writer committed and invalidated the entry
+        stale = load(product_id, session)
+        product_cache.invalidate_product(product_id)
+        return stale
+
+    monkeypatch.setattr(products, "get_product_by_id", load_then_writer_commits)
+    assert product_cache.get_product(product.id, db)["id"] == str(product.id)
+    monkeypatch.setattr(products, "get_product_by_id", load)
+
+    # The stale copy was dropped, so the next lookup reloads
+    db.get(models.Product, product.id).price = 2
+    db.commit()
+    assert product_cache.get_product(product.id, db)["price"] == 2
+
+
+def test_async_load_racing_an_invalidation_is_not_cached(db, monkeypatch):
+    product = make_product(db)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database.engine.url.database}")
+    load = async_products.get_product_by_id
+
+    async def load_then_writer_commits(product_id, session):
+        stale = await load(product_id, session)
+        product_cache.invalidate_product(product_id)
+        return stale
+
+    monkeypatch.setattr(async_products, "get_product_by_id", load_then_writer_commits)
+
+    async def lookup():
+        async with AsyncSession(async_engine) as session:
+            await product_cache.get_product_async(product.id, session)
+        await async_engine.dispose()
+
+    asyncio.run(lookup())
+    assert product_cache.stats()["size"] == 0
+
+
+def test_user_load_racing_an_invalidation_is_not_cached(db):
+    user = make_user(db)
+
+    generation = user_cache.generation(user.id)
+    user_cache.invalidate_user(user.id)  # e.g. a role change committed while the load ran
+    user_cache.put_user(user, generation)
+    assert user_cache.get_user(user.id) is None
+
+    user_cache.put_user(user, user_cache.generation(user.id))
+    assert user_cache.get_user(user.id).id == user.id
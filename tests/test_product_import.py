@@ -0,0 +1,112 @@
+import os
+import time
+
+from app import models
+from app.services import product_cache, products
+from tests.conftest import auth_headers, make_product, make_user
+from tests.datasets import generate_catalog
+
+# Rows per benchmark import; half of them update products that already exist
+BENCH_IMPORT_ROWS = int(os.getenv("BENCH_IMPORT_ROWS", "100000"))
+
+
+def _by_name(db, name):
+    db.expire_all()
+    return db.query(models.Product).filter(models.Product.name == name).one_or_none()
+
+
+def test_import_counts_inserts_updates_duplicates_and_invalid_rows(db):
+    existing = make_product(db, name="existing", stock=5, price=1)
+    product_cache.get_product(existing.id, db)
+
+    result = products.import_products(db, [
+        {"name": "existing", "price": "2.50", "stock": 0},
+        {"name": "new", "price": "3.00", "stock": 4, "description": "first"},
+        {"name": "new", "price": "3.10", "stock": 6, "description": "second"},
+        {"name": "bad-price", "price": "-1", "stock": 1},
+        {"price": "1.00", "stock": 1},
+    ])
+
+    assert (result.inserted, result.updated, result.rejected) == (1, 1, 3)
+    assert [error.row for error in result.errors] == [1, 3, 4]
+    assert "Superseded" in result.errors[0].error
+
+    updated = _by_name(db, "existing")
+    assert (float(updated.price), updated.stock, updated.is_available, updated.version) == (2.5, 0, False, 2)
+    # The cached copy of the updated product was dropped
+    assert product_cache.get_product(existing.id, db)["price"] == 2.5
+    assert (_by_name(db, "new").description, _by_name(db, "new").stock) == ("second", 6)
+    assert _by_name(db, "bad-price") is None
+
+
+def test_import_spanning_several_batches(db, monkeypatch):
+    monkeypatch.setattr(products, "PRODUCT_IMPORT_BATCH_SIZE", 2)
+    make_product(db, name="p-1")
+
+    result = products.import_products(db, ({"name": f"p-{i}", "price": "1.00", "stock": i} for i in range(5)))
+
+    assert (result.inserted, result.updated, result.rejected) == (4, 1, 0)
+    assert db.query(models.Product).count() == 5
+
+
+def test_import_caps_reported_errors(db):
+    rows = [{"name": f"bad-{i}", "price": "0", "stock": 1} for i in range(products.PRODUCT_IMPORT_MAX_ERRORS + 5)]
+
+    result = products.import_products(db, rows)
+
+    assert result.rejected == len(rows)
+    assert len(result.errors) == products.PRODUCT_IMPORT_MAX_ERRORS
+
+
+def test_json_import_route(client, db):
+    admin = make_user(db, is_admin=True)
+    make_product(db, name="existing")
+    rows = [{"name": "existing", "price": 4, "stock": 2}, {"name": "fresh", "price": 5, "stock": 1}, {"name": "broken"}]
+
+    response = client.post("/api/v1/products/import", json=rows, headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["inserted"], body["updated"], body["rejected"]) == (1, 1, 1)
+    assert body["errors"][0]["row"] == 2
+
+
+def test_import_routes_require_an_admin(client, db):
+    member = make_user(db)
+
+    response = client.post("/api/v1/products/import", json=[], headers=auth_headers(member))
+
+    assert response.status_code == 403
+
+
+def test_csv_import_route(client, db):
+    admin = make_user(db, is_admin=True)
+    make_product(db, name="existing")
+    csv_body = "\ufeffname,price,stock,description\nexisting,4.00,3,\nfresh,1.25,0,new one\nfresh,1.50,2,\nbroken,abc,1,\n"
+
+    response = client.post(
+        "/api/v1/products/import/csv",
+        files={"file": ("products.csv", csv_body, "text/csv")},
+        headers=auth_headers(admin),
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["inserted"], body["updated"], body["rejected"]) == (1, 1, 2)
+    fresh = _by_name(db, "fresh")
+    # Empty cells fall back to the schema defaults
+    assert (float(fresh.price), fresh.stock, fresh.description, fresh.is_available) == (1.5, 2, None, True)
+
+
+def test_import_benchmark(db):
+    generate_catalog(db, BENCH_IMPORT_ROWS // 2)
+    existing = [name for (name,) in db.query(models.Product.name)]
+    rows = [{"name": name, "price": "9.99", "stock": 7} for name in existing]
+    rows += [{"name": f"imported-{i}", "price": "4.50", "stock": 3} for i in range(BENCH_IMPORT_ROWS - len(rows))]
+
+    started = time.perf_counter()
+    result = products.import_products(db, rows)
+    elapsed = time.perf_counter() - started
+
+    print(f"\nimported {len(rows)} rows in {elapsed:.2f} s ({len(rows) / elapsed:.0f} rows/s)")
+    assert (result.inserted, result.updated, result.rejected) == (len(rows) - len(existing), len(existing), 0)
@@ -0,0 +1,71 @@
+import os
+import statistics
+import time
+
+import pytest
+
+from app import models
+from tests.datasets import generate_catalog
+
+BENCH_SEARCH_PRODUCTS = int(os.getenv("BENCH_SEARCH_PRODUCTS", "50000"))
+BENCH_SEARCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+SEARCHES = {
+    "prefix name": "name=granite&name_match=prefix",
+    "substring name": "name=marble",
+    "price range by price": "min_price=100&max_price=120&sort_by=price",
+    "in stock, newest first": "in_stock=true&sort_order=desc",
+    "price range with total": "min_price=100&max_price=120&include_total=true",
+}
+
+
+def _expected(rows, params):
+    if "name=granite" in params:
+        rows = [r for r in rows if r.name.startswith("granite")]
+    if "name=marble" in params:
+        rows = [r for r in rows if "marble" in r.name]
+    if "min_price" in params:
+        rows = [r for r in rows if 100 <= r.price <= 120]
+    if "in_stock" in params:
+        rows = [r for r in rows if r.is_available and r.stock > 0]
+    if "sort_by=price" in params:
+        rows = sorted(rows, key=lambda r: (r.price, r.id))
+    elif "sort_order=desc" in params:
+        rows = sorted(rows, key=lambda r: (r.created_at, r.id), reverse=True)
+    else:
+        rows = sorted(rows, key=lambda r: (r.created_at, r.id))
+    return rows
+
+
+def test_search_returns_the_matching_page(client, db):
+    generate_catalog(db, 500, sold_out_ratio=0.3)
+    rows = db.query(models.Product).all()
+
+    for params in SEARCHES.values():
+        response = client.get(f"/api/v1/products/search?{params}&page_size=20")
+        assert response.status_code == 200, params
+        expected = _expected(rows, params)
+        assert [p["id"] for p in response.json()] == [str(r.id) for r in expected[:20]], params
+        if "include_total" in params:
+            assert response.headers["X-Total-Count"] == str(len(expected))
+
+
+@pytest.mark.parametrize("params", ["page_size=0", "page_size=101", "page=0", "min_price=-1"])
+def test_search_rejects_out_of_range_parameters(client, params):
+    assert client.get(f"/api/v1/products/search?{params}").status_code == 422
+
+
+def test_search_latency_benchmark(client, db):
+    generate_catalog(db, BENCH_SEARCH_PRODUCTS, sold_out_ratio=0.2)
+
+    report = []
+    for label, params in SEARCHES.items():
+        samples = []
+        for _ in range(BENCH_SEARCH_ROUNDS):
+            started = time.perf_counter()
+            response = client.get(f"/api/v1/products/search?{params}")
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200
+        report.append(f"{label} {statistics.median(samples):.1f} ms")
+
+    print(f"\nproduct search over {BENCH_SEARCH_PRODUCTS} products (median): " + ", ".join(report))
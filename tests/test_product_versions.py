@@ -0,0 +1,54 @@
+from app import database, models, schemas
+from app.services import products, stock_service
+from tests.conftest import auth_headers, make_product, make_user
+
+
+def test_admin_update_racing_a_checkout_succeeds(db):
+    product = make_product(db, stock=10)
+    admin_session = database.SessionLocal()
+    try:
+        # The admin session has the product loaded when a checkout bumps its version underneath it
+        loaded = admin_session.get(models.Product, product.id)
+        assert loaded.version == 1
+        assert stock_service.reserve_stock(db, {product.id: 2}) == []
+        db.commit()
+
+        updated = products.update_product(product.id, schemas.ProductUpdate(price=12.5), admin_session)
+    finally:
+        admin_session.close()
+
+    assert updated.price == 12.5
+    assert updated.stock == 8
+    assert updated.version == 3
+
+
+def test_product_etag_changes_after_update(client, db):
+    product = make_product(db, stock=10)
+    admin = make_user(db, is_admin=True)
+    first = client.get(f"/api/v1/products/{product.id}")
+    assert client.get(f"/api/v1/products/{product.id}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    response = client.put(f"/api/v1/products/{product.id}", json={"price": 20}, headers=auth_headers(admin))
+    assert response.status_code == 200
+
+    second = client.get(f"/api/v1/products/{product.id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_not_modified_product_page_keeps_the_next_cursor(client, db):
+    for _ in range(7):
+        make_product(db)
+    first = client.get("/api/v1/products?page_size=5")
+    assert first.status_code == 200 and first.headers["X-Next-Cursor"]
+
+    revalidated = client.get("/api/v1/products?page_size=5", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    following = client.get(f"/api/v1/products?page_size=5&cursor={revalidated.headers['X-Next-Cursor']}")
+    assert len(following.json()) == 2
+    # The last page has no cursor, before or after revalidation
+    last = client.get(f"/api/v1/products?page_size=5&cursor={revalidated.headers['X-Next-Cursor']}", headers={"If-None-Match": following.headers["ETag"]})
+    assert last.status_code == 304
+    assert "X-Next-Cursor" not in last.headers
@@ -0,0 +1,294 @@
+import json
+import os
+import statistics
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper
+
+from app import database, models
+from app.api.auth_utlis import get_password_hash
+from app.instrumentation import current_stats
+from app.main import app
+from tests.conftest import ORDER_STATUSES, auth_headers
+
+
+# Benchmark of every /api/v1 route against a seeded SQLite database. Statement and ORM row counts are
+# deterministic and checked against BASELINE_FILE; latency percentiles are reported and only enforced
+# when BENCH_LATENCY_FACTOR is set, since they depend on the machine.
+#
+#   BENCH_UPDATE_BASELINE=1 python -m pytest tests/test_route_benchmarks.py   # accept the current counts
+#   BENCH_REPORT=bench.json python -m pytest tests/test_route_benchmarks.py   # write the measurements
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "route_baseline.json")
+BENCH_USERS = int(os.getenv("BENCH_USERS", "40"))
+BENCH_PRODUCTS = int(os.getenv("BENCH_PRODUCTS", "120"))
+BENCH_ORDERS = int(os.getenv("BENCH_ORDERS", "200"))
+BENCH_LINES_PER_ORDER = int(os.getenv("BENCH_LINES_PER_ORDER", "3"))
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+BENCH_UPDATE_BASELINE = os.getenv("BENCH_UPDATE_BASELINE", "false").lower() in ("1", "true", "yes")
+BENCH_REPORT = os.getenv("BENCH_REPORT")
+BENCH_LATENCY_FACTOR = float(os.getenv("BENCH_LATENCY_FACTOR", "0"))
+
+DEFAULT_VOLUMES = {"users": 40, "products": 120, "orders": 200, "lines_per_order": 3}
+VOLUMES = {"users": BENCH_USERS, "products": BENCH_PRODUCTS, "orders": BENCH_ORDERS, "lines_per_order": BENCH_LINES_PER_ORDER}
+PASSWORD = "BenchPass1!"
+_password_hash = None
+
+
+@dataclass
+class Seed:
+    admin: models.User
+    member: models.User
+    users: List[models.User]
+    products: List[models.Product]
+    orders: List[models.Order]
+    statuses: Dict[str, models.OrderStatus]
+
+    @property
+    def admin_headers(self) -> dict:
+        return auth_headers(self.admin)
+
+    @property
+    def member_headers(self) -> dict:
+        return auth_headers(self.member)
+
+
+def seed(db) -> Seed:
+    global _password_hash
+    if _password_hash is None:
+        _password_hash = get_password_hash(PASSWORD)
+
+    def user(name, is_admin=False):
+        return models.User(username=name, email=f"{name}@example.com", hashed_password=_password_hash, is_admin=is_admin, is_active=True)
+
+    admin, member = user("bench-admin", is_admin=True), user("bench-member")
+    users = [user(f"bench-user-{i}") for i in range(BENCH_USERS)]
+    products = [
+        models.Product(name=f"bench-product-{i}", description="seeded", price=5 + i % 50, stock=i % 40, is_available=True)
+        for i in range(BENCH_PRODUCTS)
+    ]
+    db.add_all([admin, member, *users, *products])
+    db.flush()
+
+    statuses = {status.name: status for status in db.query(models.OrderStatus)}
+    started = datetime.now(timezone.utc) - timedelta(days=3)
+    owners = [member, *users]
+    orders = []
+    for i in range(BENCH_ORDERS):
+        lines = [products[(i + j) % len(products)] for j in range(BENCH_LINES_PER_ORDER)]
+        order = models.Order(
+            user_id=owners[i % len(owners)].id,
+            status_id=statuses[ORDER_STATUSES[i % len(ORDER_STATUSES)]].id,
+            total_price=sum(Decimal(str(product.price)) for product in lines),
+            created_at=started + timedelta(minutes=20 * i),
+        )
+        order.order_products = [
+            models.OrderProduct(product_id=product.id, quantity=1, unit_price=Decimal(str(product.price))) for product in lines
+        ]
+        orders.append(order)
+    db.add_all(orders)
+    db.commit()
+    return Seed(admin, member, users, products, orders, statuses)
+
+
+@dataclass
+class Case:
+    method: str
+    path: str
+    # Builds the request for one round; rounds of mutating routes must not depend on each other
+    request: Callable[[Seed, int], dict]
+    expected_status: int = 200
+
+    @property
+    def key(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+def _ndjson_orders(seed: Seed, count: int) -> bytes:
+    return b"".join(
+        json.dumps({"products": [{"product_id": str(seed.products[i].id), "quantity": 1}]}).encode() + b"\n"
+        for i in range(count)
+    )
+
+
+CASES = [
+    Case("POST", "/api/v1/login/login", lambda s, r: {"data": {"username": s.member.username, "password": PASSWORD}}),
+    Case("POST", "/api/v1/login/logout", lambda s, r: {"headers": auth_headers(s.users[r])}, 204),
+    Case("POST", "/api/v1/users/users/", lambda s, r: {"json": {"username": f"new-user-{r}", "email": f"new-user-{r}@example.com", "password": PASSWORD}}, 201),
+    Case("GET", "/api/v1/users/users/{user_id}", lambda s, r: {"url": f"/api/v1/users/users/{s.member.id}", "headers": s.member_headers}),
+    Case("PUT", "/api/v1/users/users/{user_id}", lambda s, r: {"url": f"/api/v1/users/users/{s.users[r].id}", "json": {"email": f"renamed-{r}@example.com", "password": PASSWORD}, "headers": auth_headers(s.users[r])}),
+    Case("DELETE", "/api/v1/users/users/{user_id}", lambda s, r: _delete_own_account(_spare_user(r))),
+    Case("GET", "/api/v1/users/users", lambda s, r: {"headers": s.admin_headers}),
+    Case("GET", "/api/v1/users/users/{user_id}/orders", lambda s, r: {"url": f"/api/v1/users/users/{s.member.id}/orders?page_size=10", "headers": s.member_headers}),
+    Case("GET", "/api/v1/users/users/{user_id}/orders/summary", lambda s, r: {"url": f"/api/v1/users/users/{s.member.id}/orders/summary", "headers": s.member_headers}),
+    Case("PUT", "/api/v1/users/users/change_role", lambda s, r: {"json": {"user_id": str(s.users[r].id), "is_admin": True}, "headers": s.admin_headers}),
+    Case("POST", "/api/v1/statuses/statuses/", lambda s, r: {"json": {"name": f"bench-status-{r}"}, "headers": s.admin_headers}, 201),
+    Case("GET", "/api/v1/statuses/statuses/{status_id}", lambda s, r: {"url": f"/api/v1/statuses/statuses/{s.statuses['pending'].id}", "headers": s.admin_headers}),
+    Case("PUT", "/api/v1/statuses/statuses/{status_id}", lambda s, r: {"url": f"/api/v1/statuses/statuses/{s.statuses['processing'].id}", "json": {"name": f"processing-{r}"}, "headers": s.admin_headers}),
+    Case("DELETE", "/api/v1/statuses/statuses/{status_id}", lambda s, r: {"url": f"/api/v1/statuses/statuses/{_spare_status(r)}", "headers": s.admin_headers}),
+    Case("POST", "/api/v1/orders/orders/", lambda s, r: {"json": {"products": [{"product_id": str(s.products[-1 - r].id), "quantity": 1}]}, "headers": s.member_headers}, 201),
+    Case("GET", "/api/v1/orders/orders/{order_id}", lambda s, r: {"url": f"/api/v1/orders/orders/{s.orders[0].id}", "headers": s.member_headers}),
+    Case("PUT", "/api/v1/orders/orders/{order_id}/status", lambda s, r: {"url": f"/api/v1/orders/orders/{s.orders[r].id}/status", "json": {"status": "processing"}, "headers": s.admin_headers}),
+    Case("DELETE", "/api/v1/orders/orders/{order_id}", lambda s, r: _cancel_own_order(s, r), 204),
+    Case("POST", "/api/v1/orders/orders/bulk", lambda s, r: {"url": "/api/v1/orders/orders/bulk?chunk_size=10", "content": _ndjson_orders(s, 20), "headers": {**s.admin_headers, "Content-Type": "application/x-ndjson"}}),
+    Case("POST", "/api/v1/products/", lambda s, r: {"json": {"name": f"new-product-{r}", "price": "4.50", "stock": 10}, "headers": s.admin_headers}, 201),
+    Case("POST", "/api/v1/products/import", lambda s, r: {"json": [{"name": f"bench-product-{i}", "price": 7, "stock": 3} for i in range(20)] + [{"name": f"imported-{r}-{i}", "price": 7, "stock": 3} for i in range(20)], "headers": s.admin_headers}),
+    Case("POST", "/api/v1/products/import/csv", lambda s, r: {"files": {"file": ("products.csv", "name,price,stock\n" + "".join(f"csv-{r}-{i},3.25,8\n" for i in range(40)), "text/csv")}, "headers": s.admin_headers}),
+    Case("GET", "/api/v1/products/search", lambda s, r: {"params": {"name": "product", "min_price": 10, "page_size": 20, "include_total": True}}),
+    Case("GET", "/api/v1/products/low-stock", lambda s, r: {"params": {"threshold": 5}, "headers": s.admin_headers}),
+    Case("GET", "/api/v1/products/{product_id}", lambda s, r: {"url": f"/api/v1/products/{s.products[r].id}"}),
+    Case("PUT", "/api/v1/products/{product_id}", lambda s, r: {"url": f"/api/v1/products/{s.products[r].id}", "json": {"stock": 99}, "headers": s.admin_headers}),
+    Case("DELETE", "/api/v1/products/{product_id}", lambda s, r: {"url": f"/api/v1/products/{s.products[-1 - r].id}", "headers": s.admin_headers}, 204),
+    Case("GET", "/api/v1/products", lambda s, r: {"params": {"page_size": 20}}),
+    Case("GET", "/api/v1/admin/db-pool", lambda s, r: {"headers": s.admin_headers}),
+    Case("GET", "/api/v1/admin/cache", lambda s, r: {"headers": s.admin_headers}),
+    Case("GET", "/api/v1/admin/jobs", lambda s, r: {"headers": s.admin_headers}),
+    Case("GET", "/api/v1/admin/query-budget", lambda s, r: {"headers": s.admin_headers}),
+    Case("GET", "/api/v1/admin/export/users", lambda s, r: {"headers": s.admin_headers}),
+    Case("GET", "/api/v1/admin/export/products", lambda s, r: {"params": {"format": "ndjson"}, "headers": s.admin_headers}),
+    Case("GET", "/api/v1/admin/export/orders", lambda s, r: {"headers": s.admin_headers}),
+    Case("GET", "/api/v1/admin/analytics/sales", lambda s, r: {"params": {"granularity": "hour"}, "headers": s.admin_headers}),
+    Case("POST", "/api/v1/admin/analytics/sales/refresh", lambda s, r: {"params": {"full": True}, "headers": s.admin_headers}),
+    Case("POST", "/api/v1/admin/idempotency/purge", lambda s, r: {"headers": s.admin_headers}),
+]
+
+
+def _spare_user(round_index: int) -> models.User:
+    # An account without orders, so deleting it is never refused
+    db = database.SessionLocal()
+    try:
+        user = models.User(username=f"spare-{round_index}", email=f"spare-{round_index}@example.com", hashed_password=_password_hash)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+    finally:
+        db.close()
+
+
+def _delete_own_account(user: models.User) -> dict:
+    return {"url": f"/api/v1/users/users/{user.id}", "headers": auth_headers(user)}
+
+
+def _spare_status(round_index: int) -> uuid.UUID:
+    # A status no order refers to, so every round has one to delete
+    db = database.SessionLocal()
+    try:
+        status = models.OrderStatus(name=f"spare-{round_index}")
+        db.add(status)
+        db.commit()
+        return status.id
+    finally:
+        db.close()
+
+
+def _cancel_own_order(seed: Seed, round_index: int) -> dict:
+    # Only pending orders can be canceled, and only by their owner
+    order = [o for o in seed.orders if o.status_id == seed.statuses["pending"].id][round_index]
+    owner = next(user for user in [seed.member, *seed.users] if user.id == order.user_id)
+    return {"url": f"/api/v1/orders/orders/{order.id}", "headers": auth_headers(owner)}
+
+
+class RequestCounter:
+    # Statements and ORM rows of requests only; the drainer and the seeding above are not counted
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+
+    def _statement(self, *args):
+        if current_stats() is not None:
+            self.statements += 1
+
+    def _row(self, target, context):
+        if current_stats() is not None:
+            self.rows += 1
+
+    def __enter__(self):
+        event.listen(database.engine, "before_cursor_execute", self._statement)
+        event.listen(Mapper, "load", self._row)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(database.engine, "before_cursor_execute", self._statement)
+        event.remove(Mapper, "load", self._row)
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _load_baseline() -> dict:
+    try:
+        with open(BASELINE_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"volumes": DEFAULT_VOLUMES, "routes": {}}
+
+
+_baseline = _load_baseline()
+_measured: Dict[str, dict] = {}
+
+
+def test_every_api_route_is_benchmarked():
+    routes = {
+        f"{method} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith("/api/v1")
+        for method in route.methods
+    }
+    assert routes == {case.key for case in CASES}
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case.key for case in CASES])
+def test_route_benchmark(case, client, db):
+    data = seed(db)
+    latencies, statements, rows = [], [], []
+    for round_index in range(BENCH_ROUNDS):
+        kwargs = case.request(data, round_index)
+        url = kwargs.pop("url", case.path)
+        with RequestCounter() as counter:
+            started = time.perf_counter()
+            response = client.request(case.method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+        assert response.status_code == case.expected_status, response.text
+        statements.append(counter.statements)
+        rows.append(counter.rows)
+
+    measured = {
+        "statements": max(statements),
+        "rows": max(rows),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+    }
+    _measured[case.key] = measured
+    if BENCH_UPDATE_BASELINE:
+        return
+
+    budget = _baseline["routes"].get(case.key)
+    assert budget is not None, f"No baseline for {case.key}; run with BENCH_UPDATE_BASELINE=1 to record one"
+    # Statement counts must not grow with the seeded volume, so they are checked for any volume
+    assert measured["statements"] <= budget["statements"], f"{case.key}: {measured['statements']} statements, baseline {budget['statements']}"
+    if VOLUMES == _baseline["volumes"]:
+        assert measured["rows"] <= budget["rows"], f"{case.key}: {measured['rows']} rows, baseline {budget['rows']}"
+    if BENCH_LATENCY_FACTOR:
+        assert measured["p95_ms"] <= budget["p95_ms"] * BENCH_LATENCY_FACTOR, f"{case.key}: p95 {measured['p95_ms']} ms, baseline {budget['p95_ms']} ms"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def write_results():
+    yield
+    if BENCH_UPDATE_BASELINE and len(_measured) == len(CASES):
+        with open(BASELINE_FILE, "w") as f:
+            json.dump({"volumes": VOLUMES, "routes": _measured}, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if BENCH_REPORT:
+        with open(BENCH_REPORT, "w") as f:
+            json.dump({"volumes": VOLUMES, "routes": _measured}, f, indent=2, sort_keys=True)
@@ -0,0 +1,133 @@
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from app import database, models, schemas
+from app.services import analytics_service, order_service
+from tests.conftest import make_product, make_user
+
+# Volume of the generated sales history for the rollup benchmark
+BENCH_SALES_ORDERS = int(os.getenv("BENCH_SALES_ORDERS", "20000"))
+BENCH_SALES_HOURS = int(os.getenv("BENCH_SALES_HOURS", "720"))
+
+
+def _order_at(db, user, product, quantity, created_at):
+    order = order_service.create_order(
+        db, user.id, schemas.OrderCreateRequest(products=[{"product_id": product.id, "quantity": quantity}])
+    )
+    order.created_at = created_at
+    db.commit()
+    return order
+
+
+def _totals(buckets):
+    return sorted((b.bucket.replace(tzinfo=None), b.product_id, b.status, b.units, b.revenue) for b in buckets)
+
+
+def test_incremental_refresh_rewrites_the_watermark_bucket(db):
+    user = make_user(db)
+    product = make_product(db, stock=100, price=2.5)
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+    _order_at(db, user, product, 1, hour + timedelta(minutes=5))
+    analytics_service.refresh_sales_rollup(db, full=True)
+
+    # Pretend the last refresh stopped inside that hour, then add a later sale to the same bucket
+    db.get(models.AnalyticsWatermark, analytics_service.SALES_ROLLUP_WATERMARK).high_water = hour + timedelta(minutes=10)
+    db.commit()
+    _order_at(db, user, product, 2, hour + timedelta(minutes=20))
+
+    result = analytics_service.refresh_sales_rollup(db)
+    assert result.refreshed_from.replace(tzinfo=None) == hour.replace(tzinfo=None)
+
+    rollup = analytics_service.sales_by_bucket_from_rollup(db, "hour", start=hour)
+    assert [(b.units, b.revenue) for b in rollup] == [(3, 7.5)]
+    assert _totals(rollup) == _totals(analytics_service.sales_by_bucket(db, "hour", start=hour))
+
+
+def test_refresh_keeps_sales_of_deleted_products(db):
+    user = make_user(db)
+    product = make_product(db, stock=100, price=4)
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+    _order_at(db, user, product, 3, hour + timedelta(minutes=1))
+    # ON DELETE SET NULL is not enforced by SQLite without the foreign_keys pragma, so emulate it
+    db.query(models.OrderProduct).update({models.OrderProduct.product_id: None})
+    db.delete(db.get(models.Product, product.id))
+    db.commit()
+
+    analytics_service.refresh_sales_rollup(db, full=True)
+
+    rollup = analytics_service.sales_by_bucket_from_rollup(db, "day")
+    assert [(b.product_id, b.units, b.revenue) for b in rollup] == [(None, 3, 12)]
+
+
+def generate_sales(db, orders, hours, products=50, lines_per_order=3, seed=0):
+    # Random order history spread over the last `hours` hours, written with core inserts
+    rng = random.Random(seed)
+    user = make_user(db)
+    product_ids = [make_product(db, stock=1_000_000, price=rng.randint(1, 50)).id for _ in range(products)]
+    status_ids = [status.id for status in db.query(models.OrderStatus)]
+    newest = datetime.now(timezone.utc) - timedelta(seconds=2 * analytics_service.SALES_ROLLUP_LAG_SECONDS)
+    for start in range(0, orders, 5000):
+        order_rows, line_rows = [], []
+        for _ in range(start, min(start + 5000, orders)):
+            order_id = uuid.uuid4()
+            order_rows.append({
+                "id": order_id, "user_id": user.id, "status_id": rng.choice(status_ids), "total_price": 0, "version": 1,
+                "created_at": newest - timedelta(seconds=rng.randrange(hours * 3600)),
+            })
+            line_rows.extend(
+                {"id": uuid.uuid4(), "order_id": order_id, "product_id": rng.choice(product_ids),
+                 "quantity": rng.randint(1, 5), "unit_price": rng.randint(1, 50)}
+                for _ in range(lines_per_order)
+            )
+        db.execute(models.Order.__table__.insert(), order_rows)
+        db.execute(models.OrderProduct.__table__.insert(), line_rows)
+    db.commit()
+
+
+def test_concurrent_refreshes_do_not_double_count(db):
+    generate_sales(db, orders=300, hours=6)
+    barrier = threading.Barrier(4)
+
+    def refresh(_):
+        session = database.SessionLocal()
+        try:
+            barrier.wait()
+            analytics_service.refresh_sales_rollup(session)
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(refresh, range(4)))
+
+    assert _totals(analytics_service.sales_by_bucket_from_rollup(db, "hour")) == _totals(analytics_service.sales_by_bucket(db, "hour"))
+
+
+def _median_ms(func, rounds=5):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def test_rollup_benchmark(db):
+    generate_sales(db, BENCH_SALES_ORDERS, BENCH_SALES_HOURS)
+
+    full_ms, _ = _median_ms(lambda: analytics_service.refresh_sales_rollup(db, full=True), rounds=1)
+    incremental_ms, _ = _median_ms(lambda: analytics_service.refresh_sales_rollup(db))
+    live_ms, live = _median_ms(lambda: analytics_service.sales_by_bucket(db, "day"))
+    rollup_ms, rollup = _median_ms(lambda: analytics_service.sales_by_bucket_from_rollup(db, "day"))
+
+    print(
+        f"\nsales rollup over {BENCH_SALES_ORDERS} orders / {BENCH_SALES_HOURS} h: full refresh {full_ms:.1f} ms, "
+        f"incremental {incremental_ms:.1f} ms, daily report live {live_ms:.1f} ms vs rollup {rollup_ms:.1f} ms"
+    )
+    assert _totals(rollup) == _totals(live)
+    assert rollup_ms < live_ms
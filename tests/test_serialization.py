@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app import models, schemas
+from app.api.serialization import ORDER_LIST_ADAPTER, PRODUCT_LIST_ADAPTER, TimedJSONResponse
+from app.services import order_service
+from tests.conftest import make_user
+from tests.datasets import generate_catalog
+
+# Items per serialized list, and lines per generated order
+BENCH_SERIALIZATION_ITEMS = int(os.getenv("BENCH_SERIALIZATION_ITEMS", "1000"))
+BENCH_ORDER_LINES = int(os.getenv("BENCH_ORDER_LINES", "3"))
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+
+def _generate_orders(db, user, products, count, seed=0):
+    rng = random.Random(seed)
+    statuses = [status.id for status in db.query(models.OrderStatus)]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    orders, lines = [], []
+    for i in range(count):
+        order_id = uuid.uuid4()
+        picked = rng.sample(products, BENCH_ORDER_LINES)
+        for product in picked:
+            lines.append({"id": uuid.uuid4(), "order_id": order_id, "product_id": product.id, "quantity": rng.randint(1, 5), "unit_price": product.price})
+        orders.append({
+            "id": order_id, "user_id": user.id, "status_id": rng.choice(statuses),
+            "total_price": sum(line["quantity"] * line["unit_price"] for line in lines[-BENCH_ORDER_LINES:]),
+            "created_at": start + timedelta(seconds=i), "version": 1,
+        })
+    db.execute(models.Order.__table__.insert(), orders)
+    db.execute(models.OrderProduct.__table__.insert(), lines)
+    db.commit()
+
+
+def _default_path(response_model):
+    # What a route with response_model does: validate and jsonable_encoder, then JSONResponse.render
+    field = create_model_field("Response", response_model)
+
+    def encode(items):
+        content = asyncio.run(serialize_response(field=field, response_content=items, is_coroutine=False))
+        return TimedJSONResponse(content).body
+
+    return encode
+
+
+def _fast_path(adapter):
+    def encode(items):
+        return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+    return encode
+
+
+def _best_us_per_item(encode, items):
+    best = None
+    for _ in range(BENCH_ROUNDS):
+        started = time.perf_counter()
+        body = encode(items)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(items) * 1e6, body
+
+
+def _load(db):
+    db.expire_all()
+    products = db.query(models.Product).order_by(models.Product.created_at).limit(BENCH_SERIALIZATION_ITEMS).all()
+    orders = order_service.order_detail_query(db).order_by(models.Order.created_at).limit(BENCH_SERIALIZATION_ITEMS).all()
+    return products, orders
+
+
+def test_fast_path_encodes_the_same_json_as_the_default_path(db):
+    generate_catalog(db, 20)
+    _generate_orders(db, make_user(db), db.query(models.Product).all(), 10)
+    products, orders = _load(db)
+
+    for response_model, adapter, items in (
+        (List[schemas.ProductResponse], PRODUCT_LIST_ADAPTER, products),
+        (List[schemas.OrderDetailResponse], ORDER_LIST_ADAPTER, orders),
+    ):
+        _, default_body = _best_us_per_item(_default_path(response_model), items)
+        _, fast_body = _best_us_per_item(_fast_path(adapter), items)
+        assert json.loads(fast_body) == json.loads(default_body)
+
+
+def test_serialization_microbenchmark(db):
+    generate_catalog(db, max(BENCH_SERIALIZATION_ITEMS, BENCH_ORDER_LINES))
+    _generate_orders(db, make_user(db), db.query(models.Product).all(), BENCH_SERIALIZATION_ITEMS)
+    products, orders = _load(db)
+
+    results = {}
+    for label, response_model, adapter, items in (
+        ("products", List[schemas.ProductResponse], PRODUCT_LIST_ADAPTER, products),
+        ("orders", List[schemas.OrderDetailResponse], ORDER_LIST_ADAPTER, orders),
+    ):
+        default_us, default_body = _best_us_per_item(_default_path(response_model), items)
+        fast_us, fast_body = _best_us_per_item(_fast_path(adapter), items)
+        assert len(json.loads(fast_body)) == len(json.loads(default_body)) == BENCH_SERIALIZATION_ITEMS
+        results[label] = (default_us, fast_us)
+
+    print(
+        f"\n{BENCH_SERIALIZATION_ITEMS}-item lists, best of {BENCH_ROUNDS}, per item: "
+        + ", ".join(f"{label} default {default:.1f} us, fast {fast:.1f} us ({default / fast:.1f}x)" for label, (default, fast) in results.items())
+    )
+    for default_us, fast_us in results.values():
+        assert fast_us < default_us
@@ -0,0 +1,86 @@
+import uuid
+
+from app import models
+from app.services.status_registry import StatusRegistry, bump_version, registry
+from tests.conftest import ORDER_STATUSES, auth_headers, make_user
+
+
+def _status_loads(statements):
+    return sum(1 for statement in statements if statement.lstrip().startswith("SELECT") and "FROM order_status" in statement)
+
+
+def _add_status(db, name, bump=True):
+    # As another worker would: the row and the version bump, without touching this registry
+    status = models.OrderStatus(name=name)
+    db.add(status)
+    if bump:
+        bump_version(db)
+    db.commit()
+    return status
+
+
+def test_known_names_and_ids_are_served_from_memory(db, count_statements):
+    pending_id = registry.get_id("pending", db)
+
+    with count_statements(requests_only=False) as counter:
+        assert [registry.get_id(name, db) is not None for name in ORDER_STATUSES] == [True] * len(ORDER_STATUSES)
+        assert registry.get_name(pending_id, db) == "pending"
+        assert registry.get_name(None, db) is None
+
+    assert counter.count == 0
+
+
+def test_misses_reload_at_most_once_per_interval(db, count_statements):
+    local = StatusRegistry(miss_reload_interval=60)
+    local.load(db)
+    local._loaded_at -= 60
+
+    with count_statements(requests_only=False) as counter:
+        for _ in range(50):
+            assert local.get_id("no-such-status", db) is None
+            assert local.get_name(uuid.uuid4(), db) is None
+
+    assert _status_loads(counter.statements) == 1
+
+
+def test_misses_reload_again_after_the_interval(db, count_statements):
+    local = StatusRegistry(miss_reload_interval=0)
+    local.load(db)
+
+    with count_statements(requests_only=False) as counter:
+        for _ in range(3):
+            assert local.get_id("no-such-status", db) is None
+
+    assert _status_loads(counter.statements) == 3
+
+
+def test_status_created_elsewhere_is_found_by_the_reload_after_a_miss(db):
+    local = StatusRegistry(miss_reload_interval=0)
+    local.load(db)
+    created = _add_status(db, "on-hold", bump=False)
+
+    assert local.get_id("on-hold", db) == created.id
+    assert local.get_name(created.id, db) == "on-hold"
+
+
+def test_status_created_elsewhere_is_found_within_the_check_interval(db):
+    local = StatusRegistry(check_interval=0, miss_reload_interval=60)
+    local.load(db)
+    assert local.get_id("on-hold", db) is None
+
+    created = _add_status(db, "on-hold")
+
+    # The miss reload is rate limited, but the version check sees the bump and reloads
+    assert local.get_id("on-hold", db) == created.id
+
+
+def test_unknown_status_filter_does_not_reload_on_every_request(client, db, count_statements, monkeypatch):
+    monkeypatch.setattr(registry, "_loaded_at", registry._loaded_at - registry.miss_reload_interval)
+    headers = auth_headers(make_user(db, is_admin=True))
+
+    with count_statements() as counter:
+        for _ in range(20):
+            response = client.get("/api/v1/admin/analytics/sales?order_status=bogus", headers=headers)
+            assert response.status_code == 400
+
+    assert _status_loads(counter.statements) == 1
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app import database, models, schemas
+from app.services import order_service, stock_service
+from tests.conftest import make_product, make_user
+
+
+def _order_request(product_id, quantity):
+    return schemas.OrderCreateRequest(products=[{"product_id": product_id, "quantity": quantity}])
+
+
+def test_reserve_stock_decrements_and_reports_failures(db):
+    in_stock = make_product(db, stock=5)
+    short = make_product(db, stock=1)
+
+    failures = stock_service.reserve_stock(db, {in_stock.id: 3, short.id: 2})
+
+    assert [(f.product_id, f.reason, f.available) for f in failures] == [(short.id, "insufficient_stock", 1)]
+    db.rollback()
+
+
+def test_concurrent_orders_never_oversell(db):
+    stock = 20
+    product = make_product(db, stock=stock)
+    user = make_user(db)
+
+    def place_order(_):
+        session = database.SessionLocal()
+        try:
+            order_service.create_order(session, user.id, _order_request(product.id, 1))
+            return "created"
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(place_order, range(3 * stock)))
+
+    db.expire_all()
+    remaining = db.get(models.Product, product.id).stock
+    created = db.query(models.OrderProduct).filter(models.OrderProduct.product_id == product.id).count()
+
+    assert outcomes.count("created") == created
+    assert remaining == stock - created
+    # Demand is three times the stock, so the product must sell out exactly
+    assert remaining == 0
+    # Every request either got stock or was turned away cleanly; none failed with a server error
+    assert all(outcome == "created" or outcome in (400, 409) for outcome in outcomes)
@@ -0,0 +1,91 @@
+import os
+import time
+
+from fastapi import HTTPException
+from jose import jwt
+
+from app.api.auth_utlis import create_access_token, verify_token
+from app.cache import LRUTTLCache
+from app.services import token_cache
+from tests.conftest import auth_headers, make_user
+
+BENCH_TOKEN_VERIFICATIONS = int(os.getenv("BENCH_TOKEN_VERIFICATIONS", "20000"))
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+CREDENTIALS_EXCEPTION = HTTPException(status_code=401, detail="Could not validate credentials")
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_logout_revokes_only_the_presented_token(client, db):
+    user = make_user(db)
+    url = f"/api/v1/users/users/{user.id}"
+    token, other_token = create_access_token({"sub": str(user.id)}), create_access_token({"sub": str(user.id)})
+    # The verified claims are cached before the logout; revocation still applies to them
+    assert client.get(url, headers=_bearer(token)).status_code == 200
+
+    assert client.post("/api/v1/login/logout", headers=_bearer(token)).status_code == 204
+
+    assert client.get(url, headers=_bearer(token)).status_code == 401
+    assert client.post("/api/v1/login/logout", headers=_bearer(token)).status_code == 401
+    assert client.get(url, headers=_bearer(other_token)).status_code == 200
+
+
+def test_revocation_from_the_shared_store_is_honoured(client, db, monkeypatch):
+    shared = LRUTTLCache(max_size=1000, ttl=60)
+    monkeypatch.setattr(token_cache, "_revocation_backend", shared)
+    user = make_user(db)
+    token = create_access_token({"sub": str(user.id)})
+
+    # As if another worker had handled the logout
+    shared.set(f"revoked:{jwt.get_unverified_claims(token)['jti']}", True)
+
+    assert client.get(f"/api/v1/users/users/{user.id}", headers=_bearer(token)).status_code == 401
+
+
+def test_revoked_entries_are_dropped_once_the_token_expires():
+    revoked = token_cache.RevocationList()
+    revoked.add("expired", time.time() - 1)
+    revoked.add("live", time.time() + 60)
+
+    assert not revoked.contains("expired")
+    assert revoked.contains("live")
+    # The next add purges what has expired
+    revoked.add("other", time.time() + 60)
+    assert len(revoked) == 2
+
+
+def _best_us_per_verification(token):
+    best = None
+    for _ in range(BENCH_ROUNDS):
+        started = time.perf_counter()
+        for _ in range(BENCH_TOKEN_VERIFICATIONS):
+            verify_token(token, CREDENTIALS_EXCEPTION)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / BENCH_TOKEN_VERIFICATIONS * 1e6
+
+
+def test_token_verification_microbenchmark(client, db):
+    user = make_user(db)
+    token = create_access_token({"sub": str(user.id)})
+
+    # A backend that drops every entry on insert: each verification checks the signature again
+    token_cache.set_backend(LRUTTLCache(max_size=0, ttl=0))
+    uncached_us = _best_us_per_verification(token)
+    token_cache.set_backend(LRUTTLCache(max_size=1000, ttl=0))
+    cached_us = _best_us_per_verification(token)
+
+    started = time.perf_counter()
+    for _ in range(100):
+        assert client.get(f"/api/v1/users/users/{user.id}", headers=auth_headers(user)).status_code == 200
+    request_us = (time.perf_counter() - started) / 100 * 1e6
+
+    print(
+        f"\nverify_token, best of {BENCH_ROUNDS} x {BENCH_TOKEN_VERIFICATIONS}: without the token cache {uncached_us:.1f} us, "
+        f"with it {cached_us:.1f} us ({uncached_us / cached_us:.0f}x); a whole authenticated request takes {request_us:.0f} us"
+    )
+    assert token_cache.stats()["hits"] >= BENCH_TOKEN_VERIFICATIONS
+    assert cached_us < uncached_us
@@ -0,0 +1,79 @@
+import os
+import time
+
+from app.cache import LRUTTLCache
+from app.services import order_service, user_cache
+from app import schemas
+from tests.conftest import auth_headers, make_product, make_user
+
+BENCH_AUTH_REQUESTS = int(os.getenv("BENCH_AUTH_REQUESTS", "200"))
+
+
+def _user_lookups(statements):
+    return sum(1 for statement in statements if statement.lstrip().startswith("SELECT") and "FROM users" in statement)
+
+
+def _run_load(client, count_statements, user, url):
+    headers = auth_headers(user)
+    with count_statements() as counter:
+        started = time.perf_counter()
+        for _ in range(BENCH_AUTH_REQUESTS):
+            assert client.get(url, headers=headers).status_code == 200
+        elapsed = time.perf_counter() - started
+    return counter.count / BENCH_AUTH_REQUESTS, _user_lookups(counter.statements), BENCH_AUTH_REQUESTS / elapsed
+
+
+def test_principal_cache_load_before_and_after(client, db, count_statements):
+    user = make_user(db)
+    product = make_product(db, stock=5)
+    order = order_service.create_order(db, user.id, schemas.OrderCreateRequest(products=[{"product_id": product.id, "quantity": 1}]))
+    url = f"/api/v1/orders/orders/{order.id}"
+
+    # "Before": a backend whose entries expire immediately, so every request loads the user
+    user_cache.set_backend(LRUTTLCache(max_size=1000, ttl=0))
+    before = _run_load(client, count_statements, user, url)
+    user_cache.set_backend(LRUTTLCache(max_size=1000, ttl=60))
+    after = _run_load(client, count_statements, user, url)
+
+    print(
+        f"\n{BENCH_AUTH_REQUESTS} authenticated requests: without the principal cache {before[0]:.2f} statements/request, "
+        f"{before[1]} user lookups, {before[2]:.0f} req/s; with it {after[0]:.2f} statements/request, "
+        f"{after[1]} user lookups, {after[2]:.0f} req/s"
+    )
+    assert before[1] == BENCH_AUTH_REQUESTS
+    assert after[1] == 1
+    assert after[0] == before[0] - 1 + 1 / BENCH_AUTH_REQUESTS
+
+
+def test_role_change_takes_effect_on_the_next_request(client, db):
+    admin, member = make_user(db, is_admin=True), make_user(db)
+    assert client.get("/api/v1/users/users", headers=auth_headers(member)).status_code == 403
+
+    response = client.put("/api/v1/users/users/change_role", json={"user_id": str(member.id), "is_admin": True}, headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    assert client.get("/api/v1/users/users", headers=auth_headers(member)).status_code == 200
+
+
+def test_profile_update_refreshes_the_cached_principal(client, db):
+    user = make_user(db)
+    headers = auth_headers(user)
+    assert client.get(f"/api/v1/users/users/{user.id}", headers=headers).status_code == 200
+    assert user_cache.get_user(user.id).username == user.username
+
+    response = client.put(f"/api/v1/users/users/{user.id}", json={"username": "renamed", "password": "Renamed1!"}, headers=headers)
+
+    assert response.status_code == 200
+    assert user_cache.get_user(user.id) is None
+    assert client.get(f"/api/v1/users/users/{user.id}", headers=headers).json()["username"] == "renamed"
+
+
+def test_deleted_user_is_rejected(client, db):
+    user = make_user(db)
+    headers = auth_headers(user)
+    assert client.get(f"/api/v1/users/users/{user.id}", headers=headers).status_code == 200
+
+    assert client.delete(f"/api/v1/users/users/{user.id}", headers=headers).status_code == 200
+
+    assert user_cache.get_user(user.id) is None
+    assert client.get(f"/api/v1/users/users/{user.id}", headers=headers).status_code == 401